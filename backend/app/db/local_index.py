@@ -0,0 +1,466 @@
+"""
+local_index.py
+--------------
+In-process vector index used instead of Pinecone when `VECTOR_STORE=local`.
+It serves retrieval on-box without a network round-trip and lets the
+whole stack run offline.
+
+It mirrors the subset of the Pinecone asyncio index API the app uses
+(`upsert`, `query`, `fetch`, `delete`, `close`), so callers do not care which
+store is configured.
+
+Storage (per namespace, under `LOCAL_INDEX_PATH`):
+    vectors.f32
+        float32 `numpy.memmap` of L2-normalised vectors, one per row, so
+        cosine similarity is a single matrix-vector product.
+    index.sqlite3
+        Row, id and JSON metadata of every stored vector (shared by all
+        namespaces).
+
+Search:
+    - Exact: cosine over all live rows, top-k with `numpy.argpartition`.
+    - Approximate (optional): once a namespace holds more than
+      `LOCAL_INDEX_IVF_MIN_ROWS` vectors, an IVF index (k-means centroids,
+      rows bucketed by nearest centroid) is built in NumPy and only the
+      `LOCAL_INDEX_IVF_NPROBE` closest buckets are scored. It is rebuilt
+      when the namespace has doubled in size since the last build.
+
+Metadata filters use Pinecone's syntax for equality (`{"type": "fact"}`,
+`{"type": {"$eq": "fact"}}`), `$ne`, `$in` and `$nin`, combined with an
+implicit AND. `article_id` and `type` are served from inverted lists;
+other fields are matched by scanning the metadata.
+
+Classes:
+    LocalVectorIndex
+        The index; one instance per process.
+
+Environment Variables:
+    LOCAL_INDEX_PATH (str): Directory of the index (default ".cache/vector_index").
+    LOCAL_INDEX_IVF_MIN_ROWS (int): Rows before the IVF index is used
+        (default 20000; 0 disables it).
+    LOCAL_INDEX_IVF_NPROBE (int): Buckets scored per query (default 8).
+"""
+
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# Metadata fields with inverted lists for fast filtering.
+INDEXED_FIELDS = ("article_id", "type")
+
+
+class _Namespace:
+    """Vectors and metadata of one namespace; guarded by the index lock."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.vectors: Optional[np.memmap] = None
+        self.dim: Optional[int] = None
+        self.ids: List[Optional[str]] = []
+        self.metadata: List[Optional[dict]] = []
+        self.rows: Dict[str, int] = {}
+        self.free: List[int] = []
+        self.alive = np.zeros(0, dtype=bool)
+        self.postings = {field: defaultdict(set) for field in INDEXED_FIELDS}
+        self.ivf = None
+        self.ivf_size = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
+
+    def _path(self) -> str:
+        return os.path.join(self.directory, "vectors.f32")
+
+    def open_vectors(self, dim: int, rows: int) -> None:
+        self.dim = dim
+        if rows and os.path.exists(self._path()):
+            self.vectors = np.memmap(self._path(), dtype=np.float32, mode="r+", shape=(rows, dim))
+
+    def ensure_capacity(self, rows: int) -> None:
+        if len(self.alive) < rows:
+            alive = np.zeros(rows, dtype=bool)
+            alive[: len(self.alive)] = self.alive
+            self.alive = alive
+        capacity = self.vectors.shape[0] if self.vectors is not None else 0
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 1024)
+        os.makedirs(self.directory, exist_ok=True)
+        if self.vectors is not None:
+            self.vectors.flush()
+        with open(self._path(), "ab") as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self.vectors = np.memmap(
+            self._path(), dtype=np.float32, mode="r+", shape=(new_capacity, self.dim)
+        )
+
+    def index_metadata(self, row: int, metadata: Optional[dict]) -> None:
+        for field in INDEXED_FIELDS:
+            if metadata and field in metadata:
+                self.postings[field][metadata[field]].add(row)
+
+    def unindex_metadata(self, row: int) -> None:
+        metadata = self.metadata[row]
+        for field in INDEXED_FIELDS:
+            if metadata and field in metadata:
+                rows = self.postings[field].get(metadata[field])
+                if rows is not None:
+                    rows.discard(row)
+                    if not rows:
+                        del self.postings[field][metadata[field]]
+
+
+def _matches(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition
+    for op, operand in condition.items():
+        if op == "$eq" and value != operand:
+            return False
+        if op == "$ne" and value == operand:
+            return False
+        if op == "$in" and value not in operand:
+            return False
+        if op == "$nin" and value in operand:
+            return False
+        if op not in ("$eq", "$ne", "$in", "$nin"):
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return True
+
+
+def _kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on unit vectors; returns unit-norm centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(data @ centroids.T, axis=1)
+        for c in range(k):
+            members = data[assignment == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+    return centroids
+
+
+class LocalVectorIndex:
+    def __init__(self, path: str, ivf_min_rows: int = 20000, ivf_nprobe: int = 8):
+        self.path = path
+        self.ivf_min_rows = ivf_min_rows
+        self.ivf_nprobe = ivf_nprobe
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.RLock()
+
+        os.makedirs(path, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(path, "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS vectors (
+                namespace TEXT NOT NULL,
+                id TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                metadata TEXT,
+                PRIMARY KEY (namespace, id)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS namespaces (namespace TEXT PRIMARY KEY, dim INTEGER, rows INTEGER)"
+        )
+        self._conn.commit()
+        self._load()
+
+    # Persistence
+
+    def _namespace_dir(self, namespace: str) -> str:
+        return os.path.join(self.path, re.sub(r"[^A-Za-z0-9_.-]+", "_", namespace) or "_")
+
+    def _load(self) -> None:
+        for namespace, dim, rows in self._conn.execute(
+            "SELECT namespace, dim, rows FROM namespaces"
+        ).fetchall():
+            ns = _Namespace(self._namespace_dir(namespace))
+            ns.open_vectors(dim, rows)
+            ns.ids = [None] * rows
+            ns.metadata = [None] * rows
+            for vector_id, row, metadata in self._conn.execute(
+                "SELECT id, row, metadata FROM vectors WHERE namespace = ?", (namespace,)
+            ):
+                ns.ids[row] = vector_id
+                ns.metadata[row] = json.loads(metadata) if metadata else None
+                ns.rows[vector_id] = row
+                ns.index_metadata(row, ns.metadata[row])
+            ns.free = [row for row, vector_id in enumerate(ns.ids) if vector_id is None]
+            ns.alive = np.array([vector_id is not None for vector_id in ns.ids], dtype=bool)
+            self._namespaces[namespace] = ns
+            logger.info(f"Loaded local index namespace '{namespace}' ({ns.size} vectors)")
+
+    def _save_namespace(self, namespace: str, ns: _Namespace) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO namespaces (namespace, dim, rows) VALUES (?, ?, ?)",
+            (namespace, ns.dim, len(ns.ids)),
+        )
+
+    # Writes
+
+    def upsert_sync(self, vectors: List[dict], namespace: str = "default") -> dict:
+        if not vectors:
+            return {"upserted_count": 0}
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None:
+                ns = self._namespaces[namespace] = _Namespace(self._namespace_dir(namespace))
+
+            values = np.asarray([v["values"] for v in vectors], dtype=np.float32)
+            if ns.dim is None:
+                ns.dim = values.shape[1]
+            if values.shape[1] != ns.dim:
+                raise ValueError(
+                    f"Vector dimension {values.shape[1]} does not match index dimension {ns.dim}"
+                )
+            values /= np.linalg.norm(values, axis=1, keepdims=True) + 1e-12
+
+            rows = []
+            for vector in vectors:
+                vector_id = vector["id"]
+                row = ns.rows.get(vector_id)
+                if row is not None:
+                    ns.unindex_metadata(row)
+                elif ns.free:
+                    row = ns.free.pop()
+                else:
+                    row = len(ns.ids)
+                    ns.ids.append(None)
+                    ns.metadata.append(None)
+                rows.append(row)
+                ns.ids[row] = vector_id
+                ns.metadata[row] = vector.get("metadata")
+                ns.rows[vector_id] = row
+                ns.index_metadata(row, ns.metadata[row])
+
+            ns.ensure_capacity(len(ns.ids))
+            ns.vectors[rows] = values
+            ns.alive[rows] = True
+            ns.vectors.flush()
+            if ns.ivf is not None:
+                self._ivf_assign(ns, rows, values)
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (namespace, id, row, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (namespace, v["id"], row, json.dumps(v.get("metadata")))
+                    for v, row in zip(vectors, rows)
+                ],
+            )
+            self._save_namespace(namespace, ns)
+            self._conn.commit()
+        return {"upserted_count": len(vectors)}
+
+    def delete_sync(
+        self,
+        ids: Optional[List[str]] = None,
+        namespace: str = "default",
+        filter: Optional[dict] = None,
+        delete_all: bool = False,
+    ) -> dict:
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None:
+                return {}
+            if delete_all:
+                targets = list(ns.rows)
+            elif filter:
+                targets = [ns.ids[row] for row in self._filter_rows(ns, filter)]
+            else:
+                targets = [vector_id for vector_id in ids or [] if vector_id in ns.rows]
+
+            for vector_id in targets:
+                row = ns.rows.pop(vector_id)
+                ns.unindex_metadata(row)
+                ns.ids[row] = None
+                ns.metadata[row] = None
+                ns.alive[row] = False
+                ns.free.append(row)
+
+            self._conn.executemany(
+                "DELETE FROM vectors WHERE namespace = ? AND id = ?",
+                [(namespace, vector_id) for vector_id in targets],
+            )
+            self._conn.commit()
+        return {}
+
+    # Search
+
+    def _filter_rows(self, ns: _Namespace, filter: dict) -> np.ndarray:
+        """Rows of live vectors matching `filter`."""
+        candidates = None
+        remaining = {}
+        for field, condition in filter.items():
+            if field in INDEXED_FIELDS and (
+                not isinstance(condition, dict) or set(condition) <= {"$eq", "$in"}
+            ):
+                if not isinstance(condition, dict):
+                    values = [condition]
+                else:
+                    values = [condition["$eq"]] if "$eq" in condition else list(condition["$in"])
+                rows = set()
+                for value in values:
+                    rows |= ns.postings[field].get(value, set())
+                candidates = rows if candidates is None else candidates & rows
+            else:
+                remaining[field] = condition
+
+        if candidates is None:
+            candidates = ns.rows.values()
+        rows = [
+            row
+            for row in candidates
+            if all(
+                _matches((ns.metadata[row] or {}).get(field), condition)
+                for field, condition in remaining.items()
+            )
+        ]
+        return np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+
+    def _ivf_build(self, ns: _Namespace) -> None:
+        live = np.nonzero(ns.alive)[0]
+        data = np.asarray(ns.vectors[live])
+        # Never more lists than vectors (k-means seeds from distinct rows).
+        nlist = min(len(live), max(8, int(4 * np.sqrt(len(live)))))
+        sample = data[np.random.default_rng(0).choice(len(data), min(len(data), nlist * 64), replace=False)]
+        centroids = _kmeans(sample, nlist)
+        ns.ivf = {"centroids": centroids, "assignment": np.full(len(ns.ids), -1, dtype=np.int64)}
+        self._ivf_assign(ns, live, data)
+        ns.ivf_size = ns.size
+        logger.info(f"Built IVF index with {nlist} lists over {ns.size} vectors")
+
+    def _ivf_assign(self, ns: _Namespace, rows, values: np.ndarray) -> None:
+        assignment = ns.ivf["assignment"]
+        if len(assignment) < len(ns.ids):
+            grown = np.full(len(ns.ids), -1, dtype=np.int64)
+            grown[: len(assignment)] = assignment
+            ns.ivf["assignment"] = assignment = grown
+        assignment[np.asarray(rows)] = np.argmax(values @ ns.ivf["centroids"].T, axis=1)
+
+    def _candidate_rows(self, ns: _Namespace, query: np.ndarray, top_k: int, filter):
+        """Rows to score, or None to score every row (dead ones masked)."""
+        if filter:
+            return self._filter_rows(ns, filter)
+
+        use_ivf = self.ivf_min_rows and ns.size >= self.ivf_min_rows
+        if use_ivf and (ns.ivf is None or ns.size >= 2 * ns.ivf_size):
+            self._ivf_build(ns)
+        if use_ivf:
+            centroid_scores = ns.ivf["centroids"] @ query
+            probe = np.argsort(-centroid_scores)[: self.ivf_nprobe]
+            assignment = ns.ivf["assignment"][: len(ns.ids)]
+            rows = np.nonzero(np.isin(assignment, probe) & ns.alive[: len(ns.ids)])[0]
+            if len(rows) >= top_k:
+                return rows
+        return None
+
+    def query_sync(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        namespace: str = "default",
+        filter: Optional[dict] = None,
+        include_metadata: bool = False,
+        include_values: bool = False,
+    ) -> dict:
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None or not ns.size:
+                return {"matches": [], "namespace": namespace}
+
+            query = np.asarray(vector, dtype=np.float32)
+            if query.shape != (ns.dim,):
+                raise ValueError(
+                    f"Query dimension {query.shape[0]} does not match index dimension {ns.dim}"
+                )
+            # A new array: the caller's vector is left untouched.
+            query = query / (np.linalg.norm(query) + 1e-12)
+
+            rows = self._candidate_rows(ns, query, top_k, filter)
+            if rows is None:
+                # Exact search: one contiguous matrix-vector product.
+                rows = np.arange(len(ns.ids))
+                scores = ns.vectors[: len(ns.ids)] @ query
+                scores[~ns.alive[: len(ns.ids)]] = -np.inf
+                k = min(top_k, ns.size)
+            else:
+                scores = ns.vectors[rows] @ query
+                k = min(top_k, len(rows))
+            if not k:
+                return {"matches": [], "namespace": namespace}
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+
+            matches = []
+            for i in best:
+                row = int(rows[i])
+                match = {"id": ns.ids[row], "score": float(scores[i])}
+                match["metadata"] = ns.metadata[row] if include_metadata else None
+                if include_values:
+                    match["values"] = ns.vectors[row].tolist()
+                matches.append(match)
+        return {"matches": matches, "namespace": namespace}
+
+    # Pinecone-compatible asyncio API
+
+    async def upsert(self, vectors: List[dict], namespace: str = "default") -> dict:
+        return await asyncio.to_thread(self.upsert_sync, vectors, namespace)
+
+    async def fetch(self, ids: List[str], namespace: str = "default") -> dict:
+        return await asyncio.to_thread(self.fetch_sync, ids, namespace)
+
+    async def delete(self, ids=None, namespace: str = "default", filter=None, delete_all=False) -> dict:
+        return await asyncio.to_thread(self.delete_sync, ids, namespace, filter, delete_all)
+
+    async def query(self, vector, top_k: int = 10, namespace: str = "default", filter=None,
+                    include_metadata: bool = False, include_values: bool = False) -> dict:
+        # Always in a worker thread: the scan (or an IVF build) holds the
+        # index lock, which an upsert in another thread may also be holding.
+        return await asyncio.to_thread(
+            self.query_sync, vector, top_k, namespace, filter, include_metadata, include_values
+        )
+
+    def fetch_sync(self, ids: List[str], namespace: str = "default") -> dict:
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            vectors = {}
+            for vector_id in ids:
+                row = ns.rows.get(vector_id) if ns is not None else None
+                if row is not None:
+                    vectors[vector_id] = {
+                        "id": vector_id,
+                        "values": ns.vectors[row].tolist(),
+                        "metadata": ns.metadata[row],
+                    }
+        return {"vectors": vectors, "namespace": namespace}
+
+    def describe_index_stats(self) -> dict:
+        with self._lock:
+            return {
+                "dimension": next((ns.dim for ns in self._namespaces.values() if ns.dim), None),
+                "namespaces": {
+                    name: {"vector_count": ns.size, "ivf": ns.ivf is not None}
+                    for name, ns in self._namespaces.items()
+                },
+            }
+
+    async def close(self) -> None:
+        with self._lock:
+            for ns in self._namespaces.values():
+                if ns.vectors is not None:
+                    ns.vectors.flush()
@@ -1,62 +1,157 @@
 """
 vector_store.py
 ------------------
-Initializes and manages the Pinecone vector database connection for the Perspective API.
+Initializes and manages the vector database connection for the Perspective API.
 
-This module:
+The store is selected with `VECTOR_STORE`:
+    pinecone
+        The hosted Pinecone index (default).
+    local
+        `app.db.local_index.LocalVectorIndex`, an in-process cosine index
+        persisted under `LOCAL_INDEX_PATH`. It needs no credentials or
+        network and exposes the same asyncio API (`upsert`, `query`,
+        `delete`), so callers are unaffected by the choice.
+
+For Pinecone, this module:
     - Loads Pinecone credentials from environment variables.
     - Creates the Pinecone index if it does not exist.
     - Connects to the specified index for vector operations.
+    - Lazily opens a non-blocking asyncio client for the same index, used
+      on the request path so Pinecone calls never block the event loop.
+
+None of this happens at import time: connecting (including the index
+existence check and creation, which are network calls) is the "pinecone"
+resource of `app.utils.resources` (or "local_index" for the local store),
+run once on first use or at startup warmup.
 
 Attributes:
-    PINECONE_API_KEY (str): API key for authenticating with Pinecone.
     INDEX_NAME (str): Name of the Pinecone index used for storing vectors.
     DIMENSIONS (int): Dimensionality of vector embeddings.
     METRIC (str): Similarity metric used for vector comparison.
-    index (pinecone.Index): Connected Pinecone index instance.
+
+Functions:
+    get_index() -> pinecone.Index
+        Returns a synchronous client for the Pinecone index, connecting on
+        first use.
+
+    get_async_index() -> pinecone.IndexAsyncio | LocalVectorIndex
+        Returns the shared asyncio index client of the configured store,
+        opening it on first use.
+
+    close_async_index() -> None
+        Closes the asyncio index client; called on application shutdown.
+
+Environment Variables:
+    VECTOR_STORE (str): "pinecone" (default) or "local".
+    PINECONE_API_KEY (str): API key for authenticating with Pinecone.
+    LOCAL_INDEX_PATH, LOCAL_INDEX_IVF_MIN_ROWS, LOCAL_INDEX_IVF_NPROBE:
+        Settings of the local store, see `app.db.local_index`.
 
 Raises:
-    ValueError: If `PINECONE_API_KEY` is not set in environment variables.
+    ValueError: If `PINECONE_API_KEY` is not set in environment variables
+        (Pinecone store only).
     RuntimeError: If Pinecone initialization or index connection fails.
 """
 
 import os
-from pinecone import Pinecone, ServerlessSpec, CloudProvider, AwsRegion
+from dotenv import load_dotenv
+from app.utils.resources import resources
 from app.logging.logging_config import setup_logger
 
 
 logger = setup_logger(__name__)
 
-# Load Pinecone credentials from environment variables
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-if not PINECONE_API_KEY:
-    raise ValueError("PINECONE_API_KEY environment variable is required")
-try:
-    # Initialize Pinecone client
-    pc = Pinecone(api_key=PINECONE_API_KEY)
-
-except Exception as e:
-    raise RuntimeError(f"Error occured while intialising pinecone client:{e}")
+load_dotenv()
 
 # Constants
 INDEX_NAME = "perspective"
 DIMENSIONS = 384
 METRIC = "cosine"
 
-# Create index if it doesn't exist
-if not pc.has_index(INDEX_NAME):
-    logger.info(f"Creating index: {INDEX_NAME}")
-    pc.create_index(
-        name=INDEX_NAME,
-        dimension=DIMENSIONS,
-        metric=METRIC,
-        spec=ServerlessSpec(cloud=CloudProvider.AWS, region=AwsRegion.US_EAST_1),
+VECTOR_STORE = os.getenv("VECTOR_STORE", "pinecone").lower()
+if VECTOR_STORE not in ("pinecone", "local"):
+    raise ValueError(f"VECTOR_STORE must be 'pinecone' or 'local', got '{VECTOR_STORE}'")
+
+
+def _connect():
+    """Connect to Pinecone and make sure the index exists; returns (client, host)."""
+    from pinecone import Pinecone, ServerlessSpec, CloudProvider, AwsRegion
+
+    # Load Pinecone credentials from environment variables
+    api_key = os.getenv("PINECONE_API_KEY")
+    if not api_key:
+        raise ValueError("PINECONE_API_KEY environment variable is required")
+    try:
+        # Initialize Pinecone client
+        pc = Pinecone(api_key=api_key)
+
+    except Exception as e:
+        raise RuntimeError(f"Error occured while intialising pinecone client:{e}")
+
+    # Create index if it doesn't exist
+    if not pc.has_index(INDEX_NAME):
+        logger.info(f"Creating index: {INDEX_NAME}")
+        pc.create_index(
+            name=INDEX_NAME,
+            dimension=DIMENSIONS,
+            metric=METRIC,
+            spec=ServerlessSpec(cloud=CloudProvider.AWS, region=AwsRegion.US_EAST_1),
+        )
+    else:
+        logger.info(f"Index '{INDEX_NAME}' already exists")
+
+    try:
+        host = pc.describe_index(INDEX_NAME).host
+    except Exception as e:
+        raise RuntimeError(f"Error occured while connecting to the index {INDEX_NAME}:{e}")
+    return pc, host
+
+
+def _open_local_index():
+    from app.db.local_index import LocalVectorIndex
+
+    path = os.getenv("LOCAL_INDEX_PATH", ".cache/vector_index")
+    logger.info(f"Opening local vector index at {path}")
+    return LocalVectorIndex(
+        path,
+        ivf_min_rows=int(os.getenv("LOCAL_INDEX_IVF_MIN_ROWS", "20000")),
+        ivf_nprobe=int(os.getenv("LOCAL_INDEX_IVF_NPROBE", "8")),
     )
+
+
+# Only the configured store is registered, so startup warmup never tries
+# to reach Pinecone when running on the local index.
+if VECTOR_STORE == "local":
+    resources.register("local_index", _open_local_index)
 else:
-    logger.info(f"Index '{INDEX_NAME}' already exists")
+    resources.register("pinecone", _connect)
+
+
+def get_index():
+    pc, host = resources.get("pinecone")
+    return pc.Index(host=host)
+
+
+_async_index = None
+
+
+async def get_async_index():
+    # The asyncio client owns an aiohttp session, so it has to be created
+    # from inside the running event loop rather than at import time.
+    global _async_index
+    if VECTOR_STORE == "local":
+        return await resources.aget("local_index")
+    if _async_index is None:
+        pc, host = await resources.aget("pinecone")
+        if _async_index is None:
+            _async_index = pc.IndexAsyncio(host=host)
+    return _async_index
+
 
-try:
-    # Connect to the index
-    index = pc.Index(INDEX_NAME)
-except Exception as e:
-    raise RuntimeError(f"Error occured while connecting to the index {INDEX_NAME}:{e}")
+async def close_async_index():
+    global _async_index
+    if VECTOR_STORE == "local" and resources.is_loaded("local_index"):
+        await resources.get("local_index").close()
+    if _async_index is not None:
+        await _async_index.close()
+        _async_index = None
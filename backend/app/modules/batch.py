@@ -0,0 +1,115 @@
+"""
+batch.py
+--------
+Runs the scrape + LangGraph pipeline over many URLs at once for the
+batch `/process` endpoint, streaming one result per URL as it finishes.
+
+Every URL goes through two stages, and each stage has its own concurrency
+limit, so a batch is throttled by upstream rate limits rather than by
+serial processing:
+    1. Scraping (`BATCH_SCRAPE_CONCURRENCY` at a time): network-bound.
+    2. Analysis (`BATCH_LLM_CONCURRENCY` LangGraph runs at a time):
+       bounded by the Groq and search API rate limits.
+The runs' chunk embeddings are batched across articles by the shared
+embedding service (`EMBEDDING_BATCH_MAX_ITEMS`), or by the write-behind
+queue (`VECTOR_WRITE_BATCH_ARTICLES`) in background write mode.
+
+Within a batch, URLs that are identical after normalisation are processed
+once. URLs that resolve to the same article text (same `generate_id`
+hash) share one LangGraph run. Results for duplicates are still reported
+under every submitted URL.
+
+Functions:
+    async process_batch(urls, scrape, analyse) -> AsyncIterator[tuple]
+        Yields `("result", {...})` per submitted URL as its pipeline
+        finishes (`status` "success" or "error"), then `("summary", {...})`
+        with batch counters. If the consumer stops early (e.g. the client
+        disconnects), work that has not started yet is cancelled.
+
+Environment Variables:
+    BATCH_MAX_URLS (int): Maximum URLs per batch request (default 500).
+    BATCH_SCRAPE_CONCURRENCY (int): Concurrent scrapes per batch (default 8).
+    BATCH_LLM_CONCURRENCY (int): Concurrent LangGraph runs per batch
+        (default 2).
+"""
+
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List
+from app.modules.pipeline import article_key
+from app.utils.cache import normalize_url
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "500"))
+SCRAPE_CONCURRENCY = int(os.getenv("BATCH_SCRAPE_CONCURRENCY", "8"))
+LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "2"))
+
+
+async def process_batch(
+    urls: List[str],
+    scrape: Callable[[str], Awaitable[dict]],
+    analyse: Callable[[dict], Awaitable[dict]],
+):
+    started = time.perf_counter()
+    # Normalised URL -> every submitted spelling of it.
+    groups: Dict[str, List[str]] = {}
+    for url in urls:
+        groups.setdefault(normalize_url(url), []).append(url)
+
+    scrape_slots = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+    llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)
+    runs: Dict[str, asyncio.Task] = {}
+
+    async def analyse_once(article: dict) -> dict:
+        async with llm_slots:
+            return await analyse(article)
+
+    async def process(key: str) -> dict:
+        submitted = groups[key]
+        try:
+            async with scrape_slots:
+                article = await scrape(submitted[0])
+            article_id = article_key(article)
+            if not article_id:
+                raise ValueError("No article text could be extracted")
+            # Different URLs with the same article text share one run.
+            if article_id not in runs:
+                runs[article_id] = asyncio.ensure_future(analyse_once(article))
+            data = await asyncio.shield(runs[article_id])
+            status = "error" if data.get("status") != "success" else "success"
+            return {"urls": submitted, "article_id": article_id, "status": status, "data": data}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Batch item {submitted[0]} failed: {e}")
+            return {"urls": submitted, "status": "error", "message": str(e)}
+
+    tasks = [asyncio.ensure_future(process(key)) for key in groups]
+    succeeded = failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if result["status"] == "success":
+                succeeded += len(result["urls"])
+            else:
+                failed += len(result["urls"])
+            for url in result["urls"]:
+                yield "result", {"url": url, **{k: v for k, v in result.items() if k != "urls"}}
+    finally:
+        for task in [*tasks, *runs.values()]:
+            task.cancel()
+
+    summary = {
+        "urls": len(urls),
+        "unique_urls": len(groups),
+        "unique_articles": len(runs),
+        "succeeded": succeeded,
+        "failed": failed,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info(f"Batch finished: {summary}")
+    yield "summary", summary
@@ -4,47 +4,49 @@ check_bias.py
 Provides functionality to evaluate the bias score of an article using the Groq API.
 
 This module:
-    - Loads environment variables for Groq API credentials.
-    - Connects to the Groq client.
+    - Calls Groq through the shared, rate-limited `app.utils.llm_gateway`.
     - Defines `check_bias()` to analyze a given article's bias and return a score.
+    - Scores long articles on their lead and keyword-dense paragraphs,
+      within the "bias" token budget (`app.utils.text_budget`).
 
 Functions:
-    check_bias(text: str) -> dict:
-        Analyzes the input article text and returns a bias score between 0 and 100,
-        where 0 indicates the least bias and 100 indicates the highest bias.
+    check_bias(article: dict | str) -> dict:
+        Analyzes the scraped article (`cleaned_text` and `keywords`) or plain
+        text and returns a bias score between 0 and 100, where 0 indicates
+        the least bias and 100 indicates the highest bias.
 
 Environment Variables:
     GROQ_API_KEY (str): API key for authenticating with Groq.
 
 Raises:
-    ValueError: If `text` is missing or empty.
+    ValueError: If the article text is missing or empty.
     Exception: For errors during API interaction or response parsing.
 """
 
 
-import os
-from groq import Groq
-from dotenv import load_dotenv
 import json
+from app.utils.llm_gateway import llm_gateway
+from app.utils.text_budget import budget, fit_text
 from app.logging.logging_config import setup_logger
 
 logger = setup_logger(__name__)
 
-load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
-
-def check_bias(text):
+async def check_bias(article):
     try:
+        if isinstance(article, dict):
+            text, keywords = article.get("cleaned_text"), article.get("keywords")
+        else:
+            text, keywords = article, None
         logger.debug(f"Raw article text: {text}")
         logger.debug(f"JSON dump of text: {json.dumps(text)}")
 
         if not text:
             logger.error("Missing or empty 'cleaned_text'")
             raise ValueError("Missing or empty 'cleaned_text'")
+        text = fit_text(text, budget("bias"), keywords)
 
-        chat_completion = client.chat.completions.create(
+        chat_completion = await llm_gateway.chat(
             messages=[
                 {
                     "role": "system",
@@ -5,12 +5,14 @@ Provides functionality to generate vector embeddings for text queries using
 the Sentence Transformers library.
 
 This module:
-    - Loads a pre-trained "all-MiniLM-L6-v2" model.
+    - Uses the pre-trained "all-MiniLM-L6-v2" model through the shared,
+      micro-batching `embedding_service`, so concurrent chat queries are
+      encoded together in one batch.
     - Defines a helper function `embed_query()` to encode a query string into
       a list of numerical embeddings.
 
 Functions:
-    embed_query(query: str) -> list[float]:
+    async embed_query(query: str) -> list[float]:
         Encodes the given query into a numerical vector representation.
 
 Model:
@@ -20,12 +22,10 @@ Model:
 """
 
 
-from sentence_transformers import SentenceTransformer
+from app.modules.vector_store.embedding_service import embedding_service
 
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
 
-
-def embed_query(query: str):
-    embeddings = embedder.encode(query).tolist()
+async def embed_query(query: str):
+    (embeddings,) = await embedding_service.encode([query])
 
     return embeddings
@@ -1,45 +1,47 @@
 """
 get_rag_data.py
 ---------------
-Provides functionality to perform semantic search queries on the Pinecone
-vector database for Retrieval-Augmented Generation (RAG) workflows.
+Provides functionality to perform semantic search queries on the vector
+database for Retrieval-Augmented Generation (RAG) workflows.
 
 This module:
-    - Loads Pinecone credentials from environment variables.
-    - Connects to the "perspective" index in Pinecone.
+    - Uses the shared asyncio client of the configured vector store
+      (Pinecone or the local index) from `app.db.vector_store`.
     - Defines `search_pinecone()` to search stored vector embeddings and
       retrieve the most relevant matches.
 
 Functions:
-    search_pinecone(query: str, top_k: int = 5) -> list[dict]:
-        Encodes the input query, searches Pinecone for the most similar
-        vectors, and returns a list of matches with metadata.
+    async search_pinecone(query: str, top_k: int = 5, filter: dict = None) -> list[dict]:
+        Encodes the input query, searches the vector store for the most
+        similar vectors (optionally restricted by a metadata filter such as
+        `{"article_id": ..., "type": "fact"}`), and returns a list of
+        matches with metadata.
 
 Environment Variables:
+    VECTOR_STORE (str): "pinecone" (default) or "local".
     PINECONE_API_KEY (str): API key for authenticating with Pinecone.
 
 Dependencies:
     - app.modules.chat.embed_query (for generating embeddings)
-    - pinecone (Pinecone client library)
+    - app.db.vector_store (vector index clients)
 """
 
 
-from pinecone import Pinecone
-from dotenv import load_dotenv
+from app.db.vector_store import get_async_index
 from app.modules.chat.embed_query import embed_query
-import os
 
-load_dotenv()
 
-pc = Pinecone(os.getenv("PINECONE_API_KEY"))
-index = pc.Index("perspective")
+async def search_pinecone(query: str, top_k: int = 5, filter: dict = None):
+    # Encoding is CPU-bound; keep it off the event loop.
+    embeddings = await embed_query(query)
 
-
-def search_pinecone(query: str, top_k: int = 5):
-    embeddings = embed_query(query)
-
-    results = index.query(
-        vector=embeddings, top_k=top_k, include_metadata=True, namespace="default"
+    index = await get_async_index()
+    results = await index.query(
+        vector=embeddings,
+        top_k=top_k,
+        include_metadata=True,
+        namespace="default",
+        filter=filter,
     )
 
     matches = []
@@ -4,10 +4,11 @@ llm_processing.py
 Handles Large Language Model (LLM) interactions for context-based question answering.
 
 This module:
-    - Connects to the Groq API using credentials from environment variables.
+    - Uses the shared Groq client through `app.utils.llm_gateway`, as
+      "interactive" calls that are admitted ahead of pipeline work.
     - Builds a context string from retrieved documents.
     - Sends user questions along with context to the LLM.
-    - Returns generated answers.
+    - Returns generated answers, either whole or streamed token by token.
 
 Functions:
     build_context(docs: list[dict]) -> str:
@@ -18,22 +19,21 @@ Functions:
         Builds context from the provided documents, sends it along with the
         question to the LLM, and returns the model's answer.
 
+    stream_llm(question: str, docs: list[dict]) -> AsyncIterator[str]:
+        Same request with `stream=True`; yields the answer's text deltas as
+        they arrive. Closing the generator (e.g. when the client
+        disconnects) closes the upstream response, aborting generation.
+
 Environment Variables:
     GROQ_API_KEY (str): API key for authenticating with Groq.
 """
 
 
-import os
-from groq import Groq
-from dotenv import load_dotenv
+from app.utils.llm_gateway import llm_gateway
 from app.logging.logging_config import setup_logger
 
 logger = setup_logger(__name__)
 
-load_dotenv()
-
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
 
 def build_context(docs):
     return "\n".join(
@@ -42,7 +42,7 @@ def build_context(docs):
     )
 
 
-def ask_llm(question, docs):
+def _messages(question, docs):
     context = build_context(docs)
     logger.debug(f"Generated context for LLM:\n{context}")
     prompt = f"""You are an assistant that answers based on context.
@@ -53,13 +53,39 @@ Context:
 Question:
 {question}
 """
+    return [
+        {"role": "system", "content": "Use only the context to answer."},
+        {"role": "user", "content": prompt},
+    ]
+
 
-    response = client.chat.completions.create(
+async def ask_llm(question, docs):
+    response = await llm_gateway.chat(
+        priority="interactive",
+        cache=False,
         model="gemma2-9b-it",
-        messages=[
-            {"role": "system", "content": "Use only the context to answer."},
-            {"role": "user", "content": prompt},
-        ],
+        messages=_messages(question, docs),
     )
     logger.info("LLM response retrieved successfully.")
     return response.choices[0].message.content
+
+
+async def stream_llm(question, docs):
+    stream = await llm_gateway.chat(
+        priority="interactive",
+        model="gemma2-9b-it",
+        messages=_messages(question, docs),
+        stream=True,
+    )
+    completed = False
+    try:
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+        completed = True
+        logger.info("LLM response streamed successfully.")
+    finally:
+        if not completed:
+            logger.info("LLM stream closed before completion; aborting generation.")
+        await stream.close()
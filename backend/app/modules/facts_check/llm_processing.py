@@ -4,71 +4,112 @@ llm_processing.py
 Handles claim extraction and fact verification tasks using the Groq LLM API.
 
 This module:
-    - Connects to the Groq API with credentials from environment variables.
-    - Extracts verifiable factual claims from text.
+    - Calls Groq through the shared, rate-limited `app.utils.llm_gateway`.
+    - Extracts verifiable factual claims from text. Articles longer than
+      the "claims" token budget (`app.utils.text_budget`) are split into
+      chunks that are extracted in parallel; the claims are then merged,
+      taking one from each chunk in turn.
     - Verifies claims using provided search results and evidence.
     - Returns structured responses with verdicts and explanations.
 
 Functions:
     run_claim_extractor_sdk(state: dict) -> dict:
         Extracts up to three concise, verifiable claims from the input text
-        stored in the `state` dictionary.
+        stored in the `state` dictionary, as bullet points.
+
+    verify_claim(result: dict) -> dict:
+        Evaluates a single claim against its web search evidence and
+        returns the parsed JSON verdict.
 
     run_fact_verifier_sdk(search_results: list[dict]) -> dict:
-        Evaluates provided claims against web search evidence and returns
-        structured JSON verdicts for each claim.
+        Evaluates provided claims against web search evidence concurrently
+        and returns structured JSON verdicts for each claim, in input order.
 
 Environment Variables:
     GROQ_API_KEY (str): API key for authenticating with Groq.
+    FACT_CHECK_CONCURRENCY (int): Maximum number of claims searched and
+        verified at the same time (default 4).
 """
 
 
 import os
-from groq import Groq
+import asyncio
 from dotenv import load_dotenv
 import json
 import re
+from app.utils.llm_gateway import llm_gateway
+from app.utils.text_budget import budget, map_chunks, split_text
 from app.logging.logging_config import setup_logger
 
 logger = setup_logger(__name__)
 
 load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
-
-def run_claim_extractor_sdk(state):
+FACT_CHECK_CONCURRENCY = int(os.getenv("FACT_CHECK_CONCURRENCY", "4"))
+MAX_CLAIMS = 3
+
+
+async def _extract_claims(text):
+    chat_completion = await llm_gateway.chat(
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "You are an assistant that extracts "
+                    "verifiable factual claims from articles. "
+                    "Each claim must be short, fact-based, and"
+                    " independently verifiable through internet search. "
+                    "Only return a list of 3 clear bullet-point claims."
+                ),
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"Extract verifiable claims "
+                    f"from the following article:\n\n{text}"
+                ),
+            },
+        ],
+        model="gemma2-9b-it",
+        temperature=0.3,
+        max_tokens=512,
+    )
+
+    return chat_completion.choices[0].message.content.strip()
+
+
+def _merge_claims(outputs):
+    """Bullet list of up to MAX_CLAIMS claims, taken from each chunk in turn."""
+    per_chunk = [
+        [c.strip() for c in re.findall(r"^[\*\-•]\s+(.*)", output, re.MULTILINE) if c.strip()]
+        for output in outputs
+    ]
+    merged, seen = [], set()
+    for rank in range(max(map(len, per_chunk), default=0)):
+        for claims in per_chunk:
+            if rank < len(claims) and claims[rank].lower() not in seen:
+                seen.add(claims[rank].lower())
+                merged.append(claims[rank])
+    return "\n".join(f"- {claim}" for claim in merged[:MAX_CLAIMS])
+
+
+async def run_claim_extractor_sdk(state):
     try:
         text = state.get("cleaned_text")
         if not text:
             raise ValueError("Missing or empty 'cleaned_text' in state")
 
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an assistant that extracts "
-                        "verifiable factual claims from articles. "
-                        "Each claim must be short, fact-based, and"
-                        " independently verifiable through internet search. "
-                        "Only return a list of 3 clear bullet-point claims."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"Extract verifiable claims "
-                        f"from the following article:\n\n{text}"
-                    ),
-                },
-            ],
-            model="gemma2-9b-it",
-            temperature=0.3,
-            max_tokens=512,
-        )
-
-        extracted_claims = chat_completion.choices[0].message.content.strip()
+        chunks = split_text(text, budget("claims"), state.get("keywords"))
+        if len(chunks) == 1:
+            extracted_claims = await _extract_claims(chunks[0])
+        else:
+            outcomes = await map_chunks(chunks, _extract_claims)
+            outputs = [o for o in outcomes if not isinstance(o, Exception)]
+            if not outputs:
+                raise outcomes[0]
+            if len(outputs) < len(outcomes):
+                logger.warning(f"Claim extraction failed for {len(outcomes) - len(outputs)} chunk(s)")
+            extracted_claims = _merge_claims(outputs)
         logger.debug(f"Extracted claims:\n{extracted_claims}")
 
 
@@ -87,65 +128,107 @@ def run_claim_extractor_sdk(state):
         }
 
 
-def run_fact_verifier_sdk(search_results):
+async def verify_claim(result):
+    """
+    Verify a single claim against its web search evidence.
+
+    Args:
+        result (dict): Search result with `claim`, `title`, `snippet` and `link`.
+
+    Returns:
+        dict: Parsed verdict with `verdict`, `explanation`, `original_claim`
+        and `source_link`.
+
+    Raises:
+        Exception: If the Groq call fails or its output is not valid JSON.
+    """
+    source = result.get("link", "N/A")
+    claim = result.get("claim", "N/A")
+    evidence = (
+        f"{result.get('title', '')}"
+        f"\n{result.get('snippet', '')}"
+        f"\nLink: {source}"
+    )
+
+    chat_completion = await llm_gateway.chat(
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "You are a fact-checking assistant. "
+                    "Your job is to determine whether the given"
+                    " claim is True, False"
+                    "based on the provided web search evidence."
+                    " Keep it concise and structured."
+                ),
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"Claim: {claim}\n\n"
+                    f"Web Evidence:\n{evidence}\n\n"
+                    "Based on this evidence, is the claim true?\n"
+                    "Respond only in this JSON format:\n\n"
+                    "{\n"
+                    '  "verdict": "True" | "False",\n'
+                    '  "explanation": "...",\n'
+                    f'  "original_claim": "{claim}",\n'
+                    f'  "source_link": "{source}"\n'
+                    "}"
+                ),
+            },
+        ],
+        model="gemma2-9b-it",
+        temperature=0.3,
+        max_tokens=256,
+        validate=lambda completion: _parse_verdict(completion) is not None,
+    )
+
+    content = _verdict_text(chat_completion)
+    logger.debug(f"Raw LLM fact verification output:\n{content}")
+
+    try:
+        return json.loads(content)
+    except Exception as parse_err:
+        logger.error(f"LLM JSON parse error: {parse_err}")
+        raise
+
+
+def _verdict_text(chat_completion) -> str:
+    content = chat_completion.choices[0].message.content.strip()
+    # Strip markdown code blocks if present
+    return re.sub(r"^```json|```$", "", content).strip()
+
+
+def _parse_verdict(chat_completion):
+    """The verdict JSON of a completion, or None if it does not parse."""
+    try:
+        return json.loads(_verdict_text(chat_completion))
+    except ValueError:
+        return None
+
+
+async def run_fact_verifier_sdk(search_results):
     try:
         results_list = []
+        claim = None
+        semaphore = asyncio.Semaphore(FACT_CHECK_CONCURRENCY)
 
-        for result in search_results:
-            source = result.get("link", "N/A")
+        async def bounded_verify(result):
+            async with semaphore:
+                return await verify_claim(result)
+
+        # Claims are verified concurrently; results keep the input order and
+        # a failure on one claim does not discard the others.
+        outcomes = await asyncio.gather(
+            *(bounded_verify(r) for r in search_results), return_exceptions=True
+        )
+        for result, outcome in zip(search_results, outcomes):
             claim = result.get("claim", "N/A")
-            evidence = (
-                f"{result.get('title', '')}"
-                f"\n{result.get('snippet', '')}"
-                f"\nLink: {source}"
-            )
-
-            chat_completion = client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a fact-checking assistant. "
-                            "Your job is to determine whether the given"
-                            " claim is True, False"
-                            "based on the provided web search evidence."
-                            " Keep it concise and structured."
-                        ),
-                    },
-                    {
-                        "role": "user",
-                        "content": (
-                            f"Claim: {claim}\n\n"
-                            f"Web Evidence:\n{evidence}\n\n"
-                            "Based on this evidence, is the claim true?\n"
-                            "Respond only in this JSON format:\n\n"
-                            "{\n"
-                            '  "verdict": "True" | "False",\n'
-                            '  "explanation": "...",\n'
-                            f'  "original_claim": "{claim}",\n'
-                            f'  "source_link": "{source}"\n'
-                            "}"
-                        ),
-                    },
-                ],
-                model="gemma2-9b-it",
-                temperature=0.3,
-                max_tokens=256,
-            )
-
-            content = chat_completion.choices[0].message.content.strip()
-
-            # Strip markdown code blocks if present
-            content = re.sub(r"^```json|```$", "", content).strip()
-            logger.debug(f"Raw LLM fact verification output:\n{content}")
-
-            # Try parsing the JSON response
-            try:
-                parsed = json.loads(content)
-            except Exception as parse_err:
-                logger.error(f"LLM JSON parse error: {parse_err}")
-
-            results_list.append(parsed)
+            if isinstance(outcome, Exception):
+                logger.error(f"Verification failed for claim: {claim} -> {outcome}")
+            else:
+                results_list.append(outcome)
 
         return {
             "claim": claim,
@@ -5,11 +5,12 @@ Provides a simple wrapper for performing Google Custom Search queries.
 
 This module:
     - Loads the Google Search API key from environment variables.
-    - Sends search requests to the Google Custom Search API.
+    - Sends search requests to the Google Custom Search API through the
+      shared asynchronous HTTP client.
     - Returns the first search result with title, link, and snippet.
 
 Functions:
-    search_google(query: str) -> list[dict]:
+    async search_google(query: str) -> list[dict]:
         Executes a Google search for the given query and returns the top result
         in a list containing its title, link, and snippet.
 
@@ -18,8 +19,8 @@ Environment Variables:
 """
 
 
-import requests
 from dotenv import load_dotenv
+from app.utils.http_client import fetch
 import os
 
 load_dotenv()
@@ -27,9 +28,10 @@ load_dotenv()
 GOOGLE_SEARCH = os.getenv("SEARCH_KEY")
 
 
-def search_google(query):
-    results = requests.get(
-        f"https://www.googleapis.com/customsearch/v1?key={GOOGLE_SEARCH}&cx=f637ab77b5d8b4a3c&q={query}"
+async def search_google(query):
+    results = await fetch(
+        "https://www.googleapis.com/customsearch/v1",
+        params={"key": GOOGLE_SEARCH, "cx": "f637ab77b5d8b4a3c", "q": query},
     )
     res = results.json()
     first = {}
@@ -0,0 +1,401 @@
+"""
+jobs.py
+-------
+Durable background jobs for long-running `/process` work. Submitting a URL
+returns a job ID immediately. A pool of local workers scrapes the article
+and runs the LangGraph workflow, and clients poll for the status and the
+result.
+
+Jobs are rows in a SQLite table (`JOBS_DB_PATH`), so queued work survives
+restarts. Jobs that were running when the process stopped are re-queued at
+startup.
+
+The workers run a checkpointed copy of the workflow with one LangGraph
+thread per job. LangGraph saves the state after every step in a SQLite
+checkpointer (`langgraph-checkpoint-sqlite`, `JOBS_CHECKPOINT_PATH`). If
+a worker dies or a node raises (e.g. `judge_perspective`), the next
+attempt resumes from the last completed node, so sentiment analysis and
+fact-checking are not repeated. If the SQLite checkpointer is not
+installed, an in-memory one is used. That still resumes retries within the
+process, but restarts begin the graph again.
+
+Job statuses: "queued" -> "running" -> "succeeded" | "failed". A failed
+attempt is retried up to `JOBS_MAX_ATTEMPTS` times. That covers a run
+that raises, and a run that ends in the error handler (e.g. the judge's
+LLM call failed). Retries wait with exponential backoff
+(`JOBS_RETRY_BACKOFF_SECONDS`, doubling per attempt), so a short upstream
+outage does not use up every attempt at once. A retry continues the
+job's thread from the last checkpoint before the failure rather than
+starting over. For a failure in the parallel sentiment / fact-checking
+branches that is the fan-out after START, so both branches run again
+(the LLM cache makes the branch that succeeded cheap). Once a job has
+succeeded or failed for good, its checkpoints are deleted. Submitting a
+URL that already has a queued or running job returns that job.
+
+Classes:
+    JobQueue
+        SQLite job table, the checkpointed workflow and the worker pool.
+
+Attributes:
+    job_queue (JobQueue): The shared queue.
+
+Environment Variables:
+    JOBS_DB_PATH (str): SQLite file of the job table
+        (default ".cache/jobs.sqlite3").
+    JOBS_CHECKPOINT_PATH (str): SQLite file of the LangGraph checkpoints
+        (default ".cache/checkpoints.sqlite3").
+    JOBS_WORKERS (int): Jobs processed concurrently (default 2).
+    JOBS_MAX_ATTEMPTS (int): Attempts before a job fails (default 3).
+    JOBS_RETRY_BACKOFF_SECONDS (float): Delay before the first retry; each
+        further retry waits twice as long (default 5).
+    JOBS_RETRY_MAX_SECONDS (float): Retry delay cap (default 300).
+"""
+
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+from fastapi.encoders import jsonable_encoder
+from app.modules.langgraph_builder import build_langgraph
+from app.modules.pipeline import run_scraper_pipeline, run_langgraph_workflow
+from app.utils.cache import normalize_url
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+DB_PATH = os.getenv("JOBS_DB_PATH", ".cache/jobs.sqlite3")
+CHECKPOINT_PATH = os.getenv("JOBS_CHECKPOINT_PATH", ".cache/checkpoints.sqlite3")
+WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+RETRY_BACKOFF_SECONDS = float(os.getenv("JOBS_RETRY_BACKOFF_SECONDS", "5"))
+RETRY_MAX_SECONDS = float(os.getenv("JOBS_RETRY_MAX_SECONDS", "300"))
+WORKER_BACKOFF_MAX_SECONDS = 30.0
+
+_COLUMNS = (
+    "id", "url", "status", "attempts", "error", "created_at", "started_at", "finished_at"
+)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+async def _open_checkpointer(path: str):
+    """SQLite checkpointer if installed, else an in-memory one; returns (saver, conn)."""
+    try:
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError:
+        from langgraph.checkpoint.memory import InMemorySaver
+
+        logger.warning(
+            "langgraph-checkpoint-sqlite is not installed; job checkpoints are kept "
+            "in memory and do not survive restarts"
+        )
+        return InMemorySaver(), None
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = await aiosqlite.connect(path)
+    return AsyncSqliteSaver(conn), conn
+
+
+class JobQueue:
+    def __init__(
+        self,
+        db_path: str,
+        checkpoint_path: str,
+        workers: int,
+        max_attempts: int,
+        retry_backoff_seconds: float = RETRY_BACKOFF_SECONDS,
+    ):
+        self.db_path = db_path
+        self.checkpoint_path = checkpoint_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._tasks: list = []
+        self._started = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workflow = None
+        self._checkpoint_conn = None
+
+    # Storage
+
+    def _execute(self, sql: str, params=()) -> list:
+        with self._lock:
+            if self._conn is None:
+                self._conn = _connect(self.db_path)
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        id TEXT PRIMARY KEY,
+                        url TEXT NOT NULL,
+                        url_key TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        error TEXT,
+                        result TEXT,
+                        created_at REAL NOT NULL,
+                        started_at REAL,
+                        finished_at REAL,
+                        not_before REAL NOT NULL DEFAULT 0
+                    )
+                    """
+                )
+                columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+                if "not_before" not in columns:
+                    # Tables created before retries were delayed.
+                    self._conn.execute(
+                        "ALTER TABLE jobs ADD COLUMN not_before REAL NOT NULL DEFAULT 0"
+                    )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            rows = self._conn.execute(sql, params).fetchall()
+            self._conn.commit()
+            return rows
+
+    # Lifecycle
+
+    async def start(self) -> None:
+        """Open the checkpointer, re-queue interrupted jobs and start the workers."""
+        if self._started:
+            return
+        self._started = True
+        self._wakeup = asyncio.Event()
+        checkpointer, self._checkpoint_conn = await _open_checkpointer(self.checkpoint_path)
+        self._workflow = build_langgraph(checkpointer=checkpointer)
+        interrupted = await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET status = 'queued' WHERE status = 'running' RETURNING id",
+        )
+        if interrupted:
+            logger.info(f"Re-queued {len(interrupted)} interrupted job(s)")
+        self._wakeup.set()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        # Running jobs stay "running" in the table and are re-queued (and
+        # resumed from their checkpoints) on the next start.
+        for task in self._tasks:
+            task.cancel()
+        # Let the workers unwind before their checkpointer is closed.
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._started = False
+        if self._checkpoint_conn is not None:
+            await self._checkpoint_conn.close()
+            self._checkpoint_conn = None
+
+    async def resume_pending(self) -> None:
+        """Start the workers at startup if a previous run left jobs behind."""
+        if not os.path.exists(self.db_path):
+            return
+        pending = await asyncio.to_thread(
+            self._execute, "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+        )
+        if pending[0][0]:
+            await self.start()
+
+    # API
+
+    async def submit(self, url: str) -> dict:
+        """Queue `url` for processing; returns the new (or in-flight) job."""
+        await self.start()
+        key = normalize_url(url)
+        job_id = uuid.uuid4().hex
+
+        def insert():
+            # Check and insert under one lock so concurrent submits of a URL
+            # cannot both create a job.
+            with self._lock:
+                existing = self._execute(
+                    "SELECT id, status FROM jobs WHERE url_key = ? AND status IN ('queued', 'running')",
+                    (key,),
+                )
+                if existing:
+                    return {"job_id": existing[0][0], "status": existing[0][1]}
+                self._execute(
+                    "INSERT INTO jobs (id, url, url_key, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                    (job_id, url, key, time.time()),
+                )
+            return {"job_id": job_id, "status": "queued"}
+
+        job = await asyncio.to_thread(insert)
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: str, with_result: bool = False) -> Optional[dict]:
+        columns = _COLUMNS + (("result",) if with_result else ())
+        rows = self._execute(f"SELECT {', '.join(columns)} FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        job = dict(zip(columns, rows[0]))
+        if with_result and job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        job["job_id"] = job.pop("id")
+        return job
+
+    def stats(self) -> dict:
+        counts = dict(self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+        oldest = self._execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'")[0][0]
+        return {
+            "workers": self.workers,
+            "running_workers": len(self._tasks),
+            "checkpointer": None
+            if self._workflow is None
+            else "sqlite" if self._checkpoint_conn is not None else "memory",
+            "jobs": counts,
+            "queue_lag_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+        }
+
+    # Workers
+
+    def _claim(self) -> Optional[tuple]:
+        rows = self._execute(
+            """
+            UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?
+            WHERE id = (
+                SELECT id FROM jobs WHERE status = 'queued' AND not_before <= ?
+                ORDER BY created_at LIMIT 1
+            )
+            RETURNING id, url, attempts
+            """,
+            (time.time(), time.time()),
+        )
+        return rows[0] if rows else None
+
+    def _next_due(self) -> Optional[float]:
+        return self._execute("SELECT MIN(not_before) FROM jobs WHERE status = 'queued'")[0][0]
+
+    async def _wait_for_work(self) -> None:
+        due = await asyncio.to_thread(self._next_due)
+        timeout = None if due is None else max(0.0, due - time.time())
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _finish(self, job_id: str, status: str, result=None, error=None, not_before: float = 0.0) -> None:
+        self._execute(
+            """
+            UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, not_before = ?
+            WHERE id = ?
+            """,
+            (
+                status,
+                json.dumps(jsonable_encoder(result)) if result is not None else None,
+                error,
+                time.time() if status in ("succeeded", "failed") else None,
+                not_before,
+                job_id,
+            ),
+        )
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                self._wakeup.clear()
+                job = await asyncio.to_thread(self._claim)
+                if job is None:
+                    await self._wait_for_work()
+                    continue
+                # Other idle workers may have jobs to claim too.
+                self._wakeup.set()
+                await self._process(*job)
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # E.g. a locked or unavailable job database: keep the worker
+                # alive and try again later.
+                failures += 1
+                delay = min(WORKER_BACKOFF_MAX_SECONDS, 0.5 * 2**failures)
+                logger.exception(f"Job worker error, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def _resume_config(self, job_id: str) -> dict:
+        """
+        Config to run a job's thread with. An interrupted run resumes where
+        it stopped; a run that ended in the error handler is forked from
+        the newest checkpoint taken before anything failed: one that does
+        not route to the error handler and carries no branch `errors`
+        (which would send `join_analysis` straight back to it).
+        """
+        config = {"configurable": {"thread_id": job_id}}
+        snapshot = await self._workflow.aget_state(config)
+        if not snapshot.values or snapshot.next:
+            return config
+        if snapshot.values.get("status") == "success":
+            return config
+        async for earlier in self._workflow.aget_state_history(config):
+            if (
+                earlier.next
+                and "error_handler" not in earlier.next
+                and not earlier.values.get("errors")
+            ):
+                logger.info(f"Job {job_id} resumes at {earlier.next}")
+                return earlier.config
+        return config
+
+    async def _delete_checkpoints(self, job_id: str) -> None:
+        try:
+            await self._workflow.checkpointer.adelete_thread(job_id)
+        except Exception as e:
+            logger.warning(f"Could not delete checkpoints of job {job_id}: {e}")
+
+    async def _process(self, job_id: str, url: str, attempts: int) -> None:
+        logger.info(f"Job {job_id} started (attempt {attempts}): {url}")
+        result = None
+        try:
+            article = await run_scraper_pipeline(url)
+            result = await run_langgraph_workflow(
+                article,
+                workflow=self._workflow,
+                config=await self._resume_config(job_id),
+            )
+            if result.get("status") != "success":
+                raise RuntimeError(
+                    json.dumps(jsonable_encoder({"error_from": result.get("error_from"), "message": result.get("message")}))
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            retry = attempts < self.max_attempts
+            delay = min(RETRY_MAX_SECONDS, self.retry_backoff_seconds * 2 ** (attempts - 1))
+            logger.error(
+                f"Job {job_id} failed{f' and will be retried in {delay:.1f}s' if retry else ''}: {e}"
+            )
+            await asyncio.to_thread(
+                self._finish,
+                job_id,
+                "queued" if retry else "failed",
+                result,
+                str(e),
+                time.time() + delay if retry else 0.0,
+            )
+            if retry:
+                self._wakeup.set()
+            else:
+                await self._delete_checkpoints(job_id)
+            return
+
+        await asyncio.to_thread(self._finish, job_id, "succeeded", result)
+        await self._delete_checkpoints(job_id)
+        logger.info(f"Job {job_id} succeeded")
+
+
+job_queue = JobQueue(DB_PATH, CHECKPOINT_PATH, WORKERS, MAX_ATTEMPTS)
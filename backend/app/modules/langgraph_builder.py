@@ -6,16 +6,21 @@ cleaned article text through multiple NLP tasks, with error handling
 and retry logic.
 
 Workflow:
-    1. Sentiment analysis on the cleaned text.
-    2. Fact-checking detected claims.
-    3. Generating a counter-perspective.
-    4. Judging the quality of the generated perspective.
-    5. Storing results and sending them downstream.
-    6. Error handling at any step if failures occur.
+    1. Sentiment analysis and fact-checking, run in parallel on the
+       cleaned text and joined once both have finished.
+    2. Generating a counter-perspective.
+    3. Judging the quality of the generated perspective.
+    4. Storing results and sending them downstream.
+    5. Error handling at any step if failures occur.
 
 Core Features:
     - Uses a TypedDict (`MyState`) to define the shape of the pipeline's
       state, ensuring structured data flow between nodes.
+    - Fans out from the entry point to the independent sentiment and
+      fact-checking branches. Each branch only writes its own key
+      (`sentiment` / `facts`); branch failures are collected in the
+      `errors` list through an additive reducer and surfaced by the
+      `join_analysis` node, which routes to the error handler.
     - Employs conditional edges to handle branching:
         * Routes to error handler if a node signals `"status": "error"`.
         * Retries perspective generation up to 3 times if judged score
@@ -25,13 +30,21 @@ Core Features:
     - Ensures the graph terminates only after successful storage.
 
 Functions:
-    build_langgraph() -> CompiledGraph
+    join_analysis(state: dict) -> dict
+        Joins the parallel sentiment and fact-checking branches and
+        signals an error if either branch failed.
+
+    build_langgraph(checkpointer=None) -> CompiledGraph
         Creates the StateGraph, adds processing nodes, defines
-        transitions, and compiles the graph for execution.
+        transitions, and compiles the graph for execution. With a
+        checkpointer, the state is saved after every step so an
+        interrupted run can resume from its last completed node.
 """
 
 
-from langgraph.graph import StateGraph
+import operator
+from typing import Annotated
+from langgraph.graph import StateGraph, START
 from app.modules.langgraph_nodes import (
     sentiment,
     fact_check,
@@ -46,35 +59,70 @@ from typing_extensions import TypedDict
 
 class MyState(TypedDict):
     cleaned_text: str
+    keywords: list[str]
     facts: list[dict]
     sentiment: str
     perspective: str
     score: int
     retries: int
     status: str
+    error_from: str
+    message: str
+    # Failures reported by parallel branches; concatenated across branches.
+    errors: Annotated[list[dict], operator.add]
+
+
+def _branch(node, output_key):
+    """
+    Adapt a node for a parallel branch so it only writes `output_key`.
+
+    Parallel branches run in the same step, so they must not both write
+    shared keys such as `status`. Failures are reported via `errors`.
+    """
+
+    async def run(state):
+        result = await node(state)
+        if result.get("status") == "error":
+            return {
+                "errors": [
+                    {
+                        "error_from": result.get("error_from"),
+                        "message": result.get("message"),
+                    }
+                ]
+            }
+        return {output_key: result[output_key]}
+
+    return run
+
 
+def join_analysis(state):
+    """Join the parallel branches and surface the first branch error."""
+    errors = state.get("errors") or []
+    if errors:
+        return {"status": "error", **errors[0]}
+    return {"status": "success"}
 
-def build_langgraph():
+
+def build_langgraph(checkpointer=None):
     graph = StateGraph(MyState)
 
-    graph.add_node("sentiment_analysis", sentiment.run_sentiment_sdk)
-    graph.add_node("fact_checking", fact_check.run_fact_check)
+    graph.add_node(
+        "sentiment_analysis", _branch(sentiment.run_sentiment_sdk, "sentiment")
+    )
+    graph.add_node("fact_checking", _branch(fact_check.run_fact_check, "facts"))
+    graph.add_node("join_analysis", join_analysis)
     graph.add_node("generate_perspective", generate_perspective.generate_perspective)
     graph.add_node("judge_perspective", judge.judge_perspective)
     graph.add_node("store_and_send", store_and_send.store_and_send)
     graph.add_node("error_handler", error_handler.error_handler)
 
-    graph.set_entry_point(
-        "sentiment_analysis",
-    )
-
-    graph.add_conditional_edges(
-        "sentiment_analysis",
-        lambda x: ("error_handler" if x.get("status") == "error" else "fact_checking"),
-    )
+    graph.add_edge(START, "sentiment_analysis")
+    graph.add_edge(START, "fact_checking")
+    graph.add_edge(["sentiment_analysis", "fact_checking"], "join_analysis")
 
     graph.add_conditional_edges(
-        "fact_checking",
+        "join_analysis",
         lambda x: (
             "error_handler" if x.get("status") == "error" else "generate_perspective"
         ),
@@ -108,4 +156,4 @@ def build_langgraph():
 
     graph.set_finish_point("store_and_send")
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
@@ -5,7 +5,11 @@ Generates an alternative perspective for a given article based on verified claim
 
 This module:
     - Uses a LangChain pipeline with Groq's LLM to produce a reasoning chain
-      and an opposite perspective.
+      and an opposite perspective. The chain is the "perspective_chain"
+      resource of `app.utils.resources`, built once on first use; its Groq
+      calls go through `app.utils.llm_gateway`.
+    - Fits the article into the "perspective" token budget
+      (`app.utils.text_budget`) before prompting.
     - Validates required inputs before generation.
     - Handles errors gracefully and returns structured responses.
 
@@ -23,6 +27,9 @@ Functions:
 from app.utils.prompt_templates import generation_prompt
 from langchain_groq import ChatGroq
 from pydantic import BaseModel, Field
+from app.utils.resources import resources
+from app.utils.llm_gateway import llm_gateway
+from app.utils.text_budget import budget, fit_text
 from app.logging.logging_config import setup_logger
 
 logger = setup_logger(__name__)
@@ -38,15 +45,21 @@ class PerspectiveOutput(BaseModel):
 
 my_llm = "llama-3.3-70b-versatile"
 
-llm = ChatGroq(model=my_llm, temperature=0.7)
 
-structured_llm = llm.with_structured_output(PerspectiveOutput)
+@resources.register("perspective_chain")
+def _perspective_chain():
+    # Sampled at temperature 0.7 (and re-run by the judge's retry loop),
+    # so responses are never served from the LLM cache.
+    llm = ChatGroq(
+        model=my_llm,
+        temperature=0.7,
+        async_client=llm_gateway.completions("bulk", cache=False),
+    )
+    structured_llm = llm.with_structured_output(PerspectiveOutput)
+    return prompt | structured_llm
 
 
-chain = prompt | structured_llm
-
-
-def generate_perspective(state):
+async def generate_perspective(state):
     try:
         retries = state.get("retries", 0)
         state["retries"] = retries + 1
@@ -68,9 +81,12 @@ def generate_perspective(state):
             ]
         )
 
-        result = chain.invoke(
+        chain = resources.get("perspective_chain")
+        result = await chain.ainvoke(
             {
-                "cleaned_article": text,
+                "cleaned_article": fit_text(
+                    text, budget("perspective"), state.get("keywords")
+                ),
                 "facts": facts_str,
                 "sentiment": state.get("sentiment", "neutral"),
             }
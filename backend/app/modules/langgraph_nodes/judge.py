@@ -4,7 +4,9 @@ judge.py
 Evaluates a generated counter-perspective using an LLM-based scoring system.
 
 This module:
-    - Uses Groq's LLM to rate the originality, reasoning quality,
+    - Uses Groq's LLM (the "judge_llm" resource of `app.utils.resources`,
+      created on first use and calling Groq through `app.utils.llm_gateway`)
+      to rate the originality, reasoning quality,
       and factual grounding of a generated perspective.
     - Returns a score from 0 (very poor) to 100 (excellent).
     - Handles parsing errors and unexpected responses gracefully.
@@ -18,19 +20,38 @@ Functions:
 import re
 from langchain_groq import ChatGroq
 from langchain.schema import HumanMessage
+from app.utils.resources import resources
+from app.utils.llm_gateway import llm_gateway
 from app.logging.logging_config import setup_logger
 
 logger = setup_logger(__name__)
 
-# Init once
-groq_llm = ChatGroq(
-    model="gemma2-9b-it",
-    temperature=0.0,
-    max_tokens=10,
-)
 
+def _parse_score(raw: str):
+    """The first integer in `raw`, clamped to 0–100, or None."""
+    m = re.search(r"\b(\d{1,3})\b", raw or "")
+    if not m:
+        return None
+    return max(0, min(100, int(m.group(1))))
 
-def judge_perspective(state):
+
+def _has_score(completion) -> bool:
+    return _parse_score(completion.choices[0].message.content) is not None
+
+
+# Init once, on first use
+@resources.register("judge_llm")
+def _judge_llm():
+    return ChatGroq(
+        model="gemma2-9b-it",
+        temperature=0.0,
+        max_tokens=10,
+        # Replies without a score are not cached.
+        async_client=llm_gateway.completions("bulk", validate=_has_score),
+    )
+
+
+async def judge_perspective(state):
     try:
         perspective_obj = state.get("perspective")
         text = getattr(perspective_obj, "perspective", "").strip()
@@ -46,7 +67,7 @@ a single integer score from 0 (very poor) to 100 (excellent).
 {text}
 """
 
-        response = groq_llm.invoke([HumanMessage(content=prompt)])
+        response = await resources.get("judge_llm").ainvoke([HumanMessage(content=prompt)])
 
         if isinstance(response, list) and response:
             raw = response[0].content.strip()
@@ -55,13 +76,10 @@ a single integer score from 0 (very poor) to 100 (excellent).
         else:
             raw = str(response).strip()
 
-        # 5) Pull the first integer 0–100
-        m = re.search(r"\b(\d{1,3})\b", raw)
-        if not m:
+        score = _parse_score(raw)
+        if score is None:
             raise ValueError(f"Couldn’t parse a score from: '{raw}'")
 
-        score = max(0, min(100, int(m.group(1))))
-
         return {**state, "score": score, "status": "success"}
 
     except Exception as e:
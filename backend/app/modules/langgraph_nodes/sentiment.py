@@ -5,7 +5,9 @@ Performs sentiment analysis on cleaned article text using Groq's LLM.
 
 This module:
     - Accepts pre-processed article text from the pipeline state.
-    - Uses an LLM to classify sentiment as Positive, Negative, or Neutral.
+    - Uses an LLM (through the rate-limited `app.utils.llm_gateway`)
+      to classify sentiment as Positive, Negative, or Neutral, on the
+      article cut to its "sentiment" token budget (`app.utils.text_budget`).
     - Returns the sentiment label along with updated pipeline state.
 
 Functions:
@@ -14,25 +16,22 @@ Functions:
 """
 
 
-import os
-from groq import Groq
-from dotenv import load_dotenv
+from app.utils.llm_gateway import llm_gateway
+from app.utils.text_budget import budget, fit_text
 from app.logging.logging_config import setup_logger
 
 logger = setup_logger(__name__)
 
-load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
-
-def run_sentiment_sdk(state):
+async def run_sentiment_sdk(state):
     try:
         text = state.get("cleaned_text")
         if not text:
             raise ValueError("Missing or empty 'cleaned_text' in state")
+        # A 3-token answer needs only a sample of a long article.
+        text = fit_text(text, budget("sentiment"), state.get("keywords"))
 
-        chat_completion = client.chat.completions.create(
+        chat_completion = await llm_gateway.chat(
             messages=[
                 {
                     "role": "system",
@@ -5,10 +5,15 @@ Handles chunking, embedding, and storing of data into a vector database.
 
 Workflow:
     1. Chunk raw data for retrieval-augmented generation (RAG).
-    2. Generate embeddings for the chunks.
-    3. Store the vectors in a vector database (Pinecone).
+    2. Generate embeddings for the chunks that are not already indexed
+       unchanged (see `index_manifest.py`).
+    3. Store those vectors in the vector database.
     4. Return the updated pipeline state.
 
+With `VECTOR_WRITE_MODE=background`, only step 1 runs here: the chunks
+are handed to the durable write-behind queue (`write_behind.py`), which
+embeds and stores them after the response has been sent.
+
 Functions:
     store_and_send(state: dict) -> dict:
         Processes the given state through chunking, embedding, and storage.
@@ -16,14 +21,14 @@ Functions:
 
 
 from app.modules.vector_store.chunk_rag_data import chunk_rag_data
-from app.modules.vector_store.embed import embed_chunks
-from app.utils.store_vectors import store
+from app.modules.vector_store.index_manifest import index_chunks
+from app.modules.vector_store.write_behind import write_behind, WRITE_MODE
 from app.logging.logging_config import setup_logger
 
 logger = setup_logger(__name__)
 
 
-def store_and_send(state):
+async def store_and_send(state):
     # to store data in vector db
     try:
         logger.debug(f"Received state for vector storage: {state}")
@@ -33,15 +38,12 @@ def store_and_send(state):
             raise Exception(f"Missing required data field for chunking: {e}")
         except Exception as e:
             raise Exception(f"Failed to chunk data: {e}")
-        try:
-            vectors = embed_chunks(chunks)
-            if vectors:
-                logger.info(f"Embedding complete — {len(vectors)} vectors generated.")
-        except Exception as e:
-            raise Exception(f"failed to embed chunks: {e}")
-        
-        store(vectors)
-        logger.info("Vectors successfully stored in Pinecone.")
+        if WRITE_MODE == "background":
+            await write_behind.submit(chunks)
+            logger.info(f"{len(chunks)} chunks queued for background indexing.")
+        else:
+            result = await index_chunks(chunks)
+            logger.info(f"Vectors successfully stored ({result['embedded']} new or changed).")
 
     except Exception as e:
         logger.exception(f"Error in store_and_send: {e}")
@@ -16,56 +16,209 @@ Workflow:
         - Identifies important keywords from the cleaned article 
           using RAKE-based `extract_keywords`.
     4. LangGraph Processing:
-        - Passes structured state into a pre-compiled LangGraph 
-          workflow (`_LANGGRAPH_WORKFLOW`) for sentiment analysis, 
+        - Passes structured state into a compiled LangGraph workflow
+          (the "langgraph" resource, compiled once) for sentiment analysis, 
           fact-checking, perspective generation, judging, and 
           storage.
+    5. Result Caching:
+        - Scraper output is cached per normalized URL and LangGraph
+          output per article hash (`generate_id(cleaned_text)`), so
+          repeat submissions of the same article skip scraping and
+          every LLM/search call. See `app.utils.cache` for backends
+          and configuration.
+
+All stages are coroutines: network-bound work is awaited on the event
+loop and CPU-bound cleaning/keyword extraction runs in a worker thread.
 
 Core Functions:
-    run_scraper_pipeline(url: str) -> dict
+    async run_scraper_pipeline(url: str) -> dict
         Executes the scraping, cleaning, and keyword extraction stages, 
         returning a dictionary containing the cleaned text and keywords.
     
-    run_langgraph_workflow(state: dict) -> dict
+    async run_langgraph_workflow(state: dict, workflow=None, config: dict = None) -> dict
         Invokes the pre-compiled LangGraph workflow with the provided 
-        state dictionary and returns the result.
+        state dictionary and returns the result. A checkpointed
+        `workflow` with a `thread_id` in `config` resumes that thread
+        from its last completed node if it was interrupted.
+
+    async stream_langgraph_workflow(state: dict) -> AsyncIterator[tuple]
+        Runs the same workflow but yields `(event, data)` pairs as it
+        progresses: one per completed node (only the keys that node
+        produced), one per verified fact, and a final "result" with the
+        same payload `run_langgraph_workflow` returns.
+
+    async run_bias_detection(article: dict) -> dict
+        Scores the bias of a scraped article, reusing a cached score
+        for previously seen article text.
+
+    article_key(article: dict) -> str | None
+        Returns the content hash (`generate_id`) of an article's cleaned
+        text, used as the cache and coalescing key.
+
+    cache_stats() -> dict
+        Returns hit/miss counters and entry counts for every result cache.
 """
 
 
 from app.modules.scraper.extractor import Article_extractor
+from app.modules.scraper.page_cache import page_cache
 from app.modules.scraper.cleaner import clean_extracted_text
 from app.modules.scraper.keywords import extract_keywords
 from app.modules.langgraph_builder import build_langgraph
+from app.modules.bias_detection.check_bias import check_bias
+from app.utils.cache import build_cache, normalize_url
+from app.utils.resources import resources
+from app.utils.generate_chunk_id import generate_id
 from app.logging.logging_config import setup_logger
+import asyncio
 import json
 
 logger = setup_logger(__name__)
 
-# Compile once when module loads
-_LANGGRAPH_WORKFLOW = build_langgraph()
+# Compile once, on first use or at startup warmup
+resources.register("langgraph", build_langgraph)
 
+_SCRAPE_CACHE = build_cache("scrape")
+_WORKFLOW_CACHE = build_cache("workflow")
+_BIAS_CACHE = build_cache("bias")
+
+
+def article_key(article: dict):
+    """Content hash of an article, or None when there is no text to hash."""
+    text = article.get("cleaned_text")
+    return generate_id(text) if text else None
 
-def run_scraper_pipeline(url: str) -> dict:
-    extractor = Article_extractor(url)
-    raw_text = extractor.extract()
 
-    # Clean the text
-    result = {}
-    cleaned_text = clean_extracted_text(raw_text["text"])
-    result["cleaned_text"] = cleaned_text
+def _clean_and_extract_keywords(raw_text: str) -> dict:
+    cleaned_text = clean_extracted_text(raw_text)
+    return {"cleaned_text": cleaned_text, "keywords": extract_keywords(cleaned_text)}
 
-    # Extract keywords
-    keywords = extract_keywords(cleaned_text)
-    result["keywords"] = keywords
+
+async def run_scraper_pipeline(url: str) -> dict:
+    cache_key = normalize_url(url)
+    cached = await _SCRAPE_CACHE.aget(cache_key)
+    if cached is not None:
+        logger.info(f"Scraper cache hit for URL: {url}")
+        return cached
+
+    extractor = Article_extractor(url)
+    raw_text = await extractor.extract()
+
+    # Clean the text and extract keywords
+    result = await asyncio.to_thread(_clean_and_extract_keywords, raw_text["text"])
+    cleaned_text = result["cleaned_text"]
 
     logger.info(f"Scraper pipeline completed for URL: {url}")
     logger.debug(f"Scraper output: {json.dumps(result, ensure_ascii=False, indent=2)}")
 
+    if cleaned_text:
+        await _SCRAPE_CACHE.aset(cache_key, result)
+
     return result
 
 
-def run_langgraph_workflow(state: dict):
-    """Execute the pre-compiled LangGraph workflow."""
-    result = _LANGGRAPH_WORKFLOW.invoke(state)
+async def run_langgraph_workflow(state: dict, workflow=None, config: dict = None):
+    """Execute the pre-compiled (or the given checkpointed) LangGraph workflow."""
+    cache_key = article_key(state)
+    if cache_key:
+        cached = await _WORKFLOW_CACHE.aget(cache_key)
+        if cached is not None:
+            logger.info(f"LangGraph cache hit for article: {cache_key}")
+            return cached
+
+    if workflow is None:
+        workflow = await resources.aget("langgraph")
+    snapshot = await workflow.aget_state(config) if config else None
+    if snapshot is not None and snapshot.next:
+        # An earlier attempt stopped mid-graph: continue from its checkpoint
+        # instead of re-running the nodes that already completed.
+        logger.info(f"Resuming LangGraph run at {snapshot.next}")
+        result = await workflow.ainvoke(None, config)
+    else:
+        result = await workflow.ainvoke(state, config)
     logger.info("LangGraph workflow executed successfully.")
+
+    # Only successful runs are cached so failures are retried next time.
+    if cache_key and result.get("status") == "success":
+        await _WORKFLOW_CACHE.aset(cache_key, result)
     return result
+
+
+async def run_bias_detection(article: dict) -> dict:
+    """Score the bias of a scraped article, reusing cached scores."""
+    cache_key = article_key(article)
+    if cache_key:
+        cached = await _BIAS_CACHE.aget(cache_key)
+        if cached is not None:
+            logger.info(f"Bias cache hit for article: {cache_key}")
+            return cached
+
+    result = await check_bias(article)
+
+    if cache_key and result.get("status") == "success":
+        await _BIAS_CACHE.aset(cache_key, result)
+    return result
+
+
+# Keys each node contributes to the streamed output; nodes return the
+# whole state, so the rest (e.g. the article text) is left out.
+_NODE_OUTPUTS = {
+    "sentiment_analysis": ("sentiment",),
+    "fact_checking": ("facts",),
+    "generate_perspective": ("perspective", "retries"),
+    "judge_perspective": ("score",),
+    "store_and_send": ("status",),
+    "error_handler": ("status", "from", "error"),
+}
+
+# Stream event names of the nodes.
+_NODE_EVENTS = {
+    "sentiment_analysis": "sentiment",
+    "fact_checking": "facts",
+    "generate_perspective": "perspective",
+    "judge_perspective": "judge",
+    "store_and_send": "storage",
+    "error_handler": "error",
+}
+
+
+async def stream_langgraph_workflow(state: dict):
+    """Run the LangGraph workflow, yielding `(event, data)` as nodes finish."""
+    cache_key = article_key(state)
+    if cache_key:
+        cached = await _WORKFLOW_CACHE.aget(cache_key)
+        if cached is not None:
+            logger.info(f"LangGraph cache hit for article: {cache_key}")
+            yield "result", cached
+            return
+
+    workflow = await resources.aget("langgraph")
+    result = None
+    async for mode, chunk in workflow.astream(
+        state, stream_mode=["updates", "custom", "values"]
+    ):
+        if mode == "values":
+            result = chunk
+        elif mode == "custom":
+            yield chunk["type"], {k: v for k, v in chunk.items() if k != "type"}
+        else:
+            for node, update in chunk.items():
+                if node in _NODE_OUTPUTS and update:
+                    yield _NODE_EVENTS[node], {
+                        key: update[key] for key in _NODE_OUTPUTS[node] if key in update
+                    }
+    logger.info("LangGraph workflow streamed successfully.")
+
+    if cache_key and result and result.get("status") == "success":
+        await _WORKFLOW_CACHE.aset(cache_key, result)
+    yield "result", result
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters and entry counts for every result cache."""
+    return {
+        "scrape": _SCRAPE_CACHE.stats(),
+        "workflow": _WORKFLOW_CACHE.stats(),
+        "bias": _BIAS_CACHE.stats(),
+        "pages": page_cache.stats(),
+    }
@@ -6,10 +6,13 @@ junk lines, and excessive whitespace. Helps prepare text for downstream
 processing like NLP, fact-checking, and embedding.
 
 Main Features:
-    - Normalizes line breaks.
     - Removes common boilerplate phrases and copyright notices.
     - Filters out lines that are too short to be meaningful.
     - Tidies spacing and formatting for readability.
+    - Does all of the above in one pass over the lines, running the
+      (precompiled) boilerplate regexes only on lines that contain one of
+      their literal phrases; `benchmarks/bench_cleaner.py` compares it with
+      the previous per-pattern implementation.
 
 Functions:
     clean_extracted_text(text: str) -> str
@@ -18,88 +21,147 @@ Functions:
 """
 
 import re
-import nltk
 
-try:
-    nltk.data.find("corpora/stopwords")
-    nltk.data.find("corpora/punkt_tab")
 
-except LookupError:
-    nltk.download("stopwords")
-    nltk.download("punkt_tab")
+# Common boilerplate patterns (example: "Read more at...", "Subscribe", etc.)
+BOILERPLATE_PHRASES = [
+    r"read more at.*",
+    r"subscribe to.*",
+    r"click here to.*",
+    r"follow us on.*",
+    r"advertisement",
+    r"sponsored content",
+    r"promoted by.*",
+    r"recommended for you",
+    r"© \d{4}.*",  # copyright lines
+    r"all rights reserved",
+    r"terms of service",
+    r"privacy policy",
+    r"cookie policy",
+    r"about us",
+    r"contact us",
+    r"share this article",
+    r"sign up for our newsletter",
+    r"report this ad",
+    r"this story was originally published.*",
+    r"originally appeared on.*",
+    r"download our app.*",
+    r"view comments",
+    r"comment below",
+    r"leave a comment",
+    r"next article",
+    r"previous article",
+    r"related articles",
+    r"top stories",
+    r"breaking news",
+    r"editor's picks",
+    r"latest news",
+    r"trending now",
+    r"this content is provided by.*",
+    r"image source:.*",
+    r"photo by.*",
+    r"disclaimer:.*",
+    r"support independent journalism.*",
+    r"if you enjoyed this article.*",
+    r"don’t miss out on.*",
+    r"watch the video",
+    r"listen to the podcast",
+    r"stay connected with.*",
+    r"visit our homepage.*",
+    r"post a job on.*",
+    r"powered by .*",
+]
+
+# Compiled once at import. None of the patterns can match across a line
+# break, and each one starts with a literal phrase (its "anchor") that must
+# be present, case-insensitively, wherever it matches. So the anchors are
+# located with plain substring search in a lower-cased copy of the text,
+# and only lines containing one go through the patterns, in their original
+# order, exactly as the whole text used to (skipping patterns whose anchor
+# is not in the line, which could not have matched anyway).
+_ANCHORED_PATTERNS = [
+    (re.split(r"[\\.]", phrase, maxsplit=1)[0].lower(), re.compile(phrase, re.IGNORECASE))
+    for phrase in BOILERPLATE_PHRASES
+]
+_ANCHORS = sorted({anchor for anchor, _ in _ANCHORED_PATTERNS})
+# Non-ASCII characters that `re.IGNORECASE` matches against ASCII letters
+# but `str.lower` does not turn into them. Replacing "İ" first also keeps the
+# lower-cased copy the same length as the text (it is the only character
+# whose lower case is two characters long).
+_CASE_FOLDS = (("İ", "i"), ("ı", "i"), ("ſ", "s"), ("K", "k"))
+_MULTIPLE_SPACES = re.compile(r"[ \t]{2,}")
+
+
+def _fold(text: str) -> str:
+    """Lower-case `text` the way `re.IGNORECASE` compares ASCII letters."""
+    if not text.isascii():
+        for char, ascii_char in _CASE_FOLDS:
+            if char in text:
+                text = text.replace(char, ascii_char)
+    return text.lower()
+
+
+def _boilerplate_offsets(text: str) -> list[int]:
+    """Sorted offsets in `text` where a boilerplate phrase may start."""
+    folded = _fold(text)
+    offsets = []
+    for anchor in _ANCHORS:
+        position = folded.find(anchor)
+        while position != -1:
+            offsets.append(position)
+            position = folded.find(anchor, position + 1)
+    offsets.sort()
+    return offsets
+
+
+def _remove_boilerplate(line: str) -> str:
+    folded = _fold(line)
+    for anchor, pattern in _ANCHORED_PATTERNS:
+        if anchor in folded:
+            removed = pattern.sub("", line)
+            if removed != line:
+                line = removed
+                folded = _fold(line)
+    return line
 
 
 def clean_extracted_text(text: str):
     """
     Clean up the extracted article text to remove boilerplate,
     repetitive lines, excessive whitespace, and unwanted junk.
+
+    Works in a single pass over the lines of `text`: boilerplate is
+    removed, lines of 30 characters or fewer (likely junk) are dropped,
+    runs of spaces and tabs are collapsed, and the surviving lines are
+    joined with a double newline as paragraphs.
     """
     if not text:
         return ""
 
-    # 1. Removing multiple line breaks to single line break
-    text = re.sub(r"\n{2,}", "\n\n", text)
-
-    # 2. Removing common boilerplate patterns
-    # (example: "Read more at...", "Subscribe", etc.)
-    boilerplate_phrases = [
-        r"read more at.*",
-        r"subscribe to.*",
-        r"click here to.*",
-        r"follow us on.*",
-        r"advertisement",
-        r"sponsored content",
-        r"promoted by.*",
-        r"recommended for you",
-        r"© \d{4}.*",  # copyright lines
-        r"all rights reserved",
-        r"terms of service",
-        r"privacy policy",
-        r"cookie policy",
-        r"about us",
-        r"contact us",
-        r"share this article",
-        r"sign up for our newsletter",
-        r"report this ad",
-        r"this story was originally published.*",
-        r"originally appeared on.*",
-        r"download our app.*",
-        r"view comments",
-        r"comment below",
-        r"leave a comment",
-        r"next article",
-        r"previous article",
-        r"related articles",
-        r"top stories",
-        r"breaking news",
-        r"editor's picks",
-        r"latest news",
-        r"trending now",
-        r"this content is provided by.*",
-        r"image source:.*",
-        r"photo by.*",
-        r"disclaimer:.*",
-        r"support independent journalism.*",
-        r"if you enjoyed this article.*",
-        r"don’t miss out on.*",
-        r"watch the video",
-        r"listen to the podcast",
-        r"stay connected with.*",
-        r"visit our homepage.*",
-        r"post a job on.*",
-        r"powered by .*",
-    ]
-    for pattern in boilerplate_phrases:
-        text = re.sub(pattern, "", text, flags=re.IGNORECASE)
-
-    # 3. Remove lines with too few characters (likely junk)
-    lines = text.split("\n")
-    cleaned_lines = [line.strip() for line in lines if len(line.strip()) > 30]
-
-    # 4. Join lines back with a double newline for paragraphs
-    cleaned_text = "\n\n".join(cleaned_lines)
-
-    # 5. Optional: Fix multiple spaces and trim
-    cleaned_text = re.sub(r"[ \t]{2,}", " ", cleaned_text).strip()
-
-    return cleaned_text
+    offsets = _boilerplate_offsets(text)
+    next_hit = 0
+    line_start = 0
+    cleaned_lines = []
+    for line in text.split("\n"):
+        line_end = line_start + len(line)
+        has_boilerplate = False
+        while next_hit < len(offsets) and offsets[next_hit] <= line_end:
+            has_boilerplate = True
+            next_hit += 1
+        line_start = line_end + 1
+
+        # Removing boilerplate only ever shortens a line, so lines that are
+        # already too short can be dropped without looking at them.
+        stripped = line.strip()
+        if len(stripped) <= 30:
+            continue
+
+        if has_boilerplate:
+            line = _remove_boilerplate(line)
+            stripped = line.strip()
+            if len(stripped) <= 30:
+                continue
+
+        cleaned_lines.append(_MULTIPLE_SPACES.sub(" ", stripped))
+
+    return "\n\n".join(cleaned_lines)
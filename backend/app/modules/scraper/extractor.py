@@ -11,49 +11,77 @@ approaches in order:
 If one method fails, it falls back to the next until a valid article
 body is found.
 
+The order is learnt per domain: `strategy_stats.plan` puts the method with
+the best history on the publisher's domain first and skips methods that
+recently failed there (for `EXTRACTOR_COOLDOWN_SECONDS`). The chain stops
+at the first result passing `strategy_stats.is_acceptable`; when none
+does, the first result with any text is returned.
+
+The page is downloaded exactly once, through the shared pooled HTTP
+client (`app.utils.http_client`), and the same HTML is handed to every
+extraction method in turn. Parsing is CPU-bound and runs in a worker
+thread, so extraction never blocks the event loop.
+
+Race mode (opt-in via `EXTRACTOR_RACE_MODE=1` or `race=True`) runs the
+planned methods concurrently on the fetched HTML and returns the first result
+that passes `strategy_stats.is_acceptable`; the remaining runs are
+cancelled (their worker threads finish in the background and their output
+is discarded). If no result passes the check, the highest-priority result
+with any text is returned, as in sequential mode. Each method's run time
+and outcome is recorded per domain in `strategy_stats`; cancelled runs
+are not recorded, since losing a race says nothing about the method.
+
+Downloads and extractions are cached per URL in `page_cache`. Recently
+fetched pages are served straight from the cache; older ones are
+revalidated with a conditional GET and reuse the cached extraction when
+the publisher answers `304 Not Modified`.
+
 Classes:
     ArticleExtractor
         Encapsulates all extraction methods and fallback logic.
 """
 
+import asyncio
+import os
+import time
 import trafilatura
 from newspaper import Article
 from bs4 import BeautifulSoup
 from readability import Document
-import requests
+import httpx
 import logging
 import json
+from urllib.parse import urlsplit
+from app.utils.http_client import fetch
+from app.modules.scraper.page_cache import page_cache
+from app.modules.scraper import strategy_stats
+
+RACE_MODE = os.getenv("EXTRACTOR_RACE_MODE", "0").lower() in ("1", "true", "yes")
 
 # This class contains extractors that are more and more advanced from top to
 # bottom and they will try to extract any article.
 
 
 class Article_extractor:
-    def __init__(self, url):
+    def __init__(self, url, race=None):
         self.url = url
-        self.headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-                " AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/113.0 Safari/537.36"
-            )
-        }
+        self.race = RACE_MODE if race is None else race
+        self.domain = (urlsplit(url).hostname or "").lower()
 
-    def _fetch_html(self):
+    async def _fetch(self, headers=None):
         try:
-            res = requests.get(self.url, self.headers, timeout=10)
-            res.raise_for_status()
-            return res.text
-        except requests.RequestException as e:
+            res = await fetch(self.url, headers=headers)
+            if res.status_code != 304:
+                res.raise_for_status()
+            return res
+        except httpx.HTTPError as e:
             logging.error(f"failed to fetch: {self.url}-{e}")
-            return ""
+            return None
 
-    def extract_with_trafilatura(self):
-        downloaded = trafilatura.fetch_url(self.url)
-        if not downloaded:
-            return {}
+    def extract_with_trafilatura(self, html) -> dict:
         result = trafilatura.extract(
-            downloaded,
+            html,
+            url=self.url,
             no_fallback=True,
             include_comments=False,
             include_tables=False,
@@ -64,10 +92,10 @@ class Article_extractor:
             return json.loads(result)
         return {}
 
-    def extract_with_newspaper(self) -> dict:
+    def extract_with_newspaper(self, html) -> dict:
         try:
             article = Article(self.url)
-            article.download()
+            article.download(input_html=html)
             article.parse()
             return {
                 "title": article.title,
@@ -81,11 +109,7 @@ class Article_extractor:
             logging.error(f"Newspaper3k failed: {e}")
             return {}
 
-    def extract_with_bs4(self) -> dict:
-        html = self._fetch_html()
-        if not html:
-            return {}
-
+    def extract_with_bs4(self, html) -> dict:
         try:
             doc = Document(html)
             soup = BeautifulSoup(doc.summary(), "html.parser")
@@ -96,15 +120,111 @@ class Article_extractor:
             logging.error(f"BS4 + Readability fallback failed: {e}")
             return {}
 
-    def extract(self):
-        methods = [
-            self.extract_with_trafilatura,
-            self.extract_with_newspaper,
-            self.extract_with_bs4,
-        ]
-        for method in methods:
-            result = method()
-            if result and result.get("text"):
-                result["url"] = self.url
-                return result
+    def _methods(self):
+        methods = {
+            "trafilatura": self.extract_with_trafilatura,
+            "newspaper": self.extract_with_newspaper,
+            "bs4": self.extract_with_bs4,
+        }
+        order = strategy_stats.plan(self.domain, list(methods))
+        return {name: methods[name] for name in order}
+
+    def _run_timed(self, method, html):
+        started = time.perf_counter()
+        try:
+            result = method(html) or {}
+        except Exception as e:
+            logging.error(f"{method.__name__} failed: {e}")
+            result = {}
+        return result, time.perf_counter() - started
+
+    def _finish(self, result) -> dict:
+        if result and result.get("text"):
+            result["url"] = self.url
+            return result
         return {"url": self.url, "text": "", "error": "Failed to extract article."}
+
+    def extract_from_html(self, html) -> dict:
+        fallback = None
+        for name, method in self._methods().items():
+            result, elapsed = self._run_timed(method, html)
+            acceptable = strategy_stats.is_acceptable(result)
+            strategy_stats.record(self.domain, name, elapsed, acceptable, acceptable)
+            if acceptable:
+                return self._finish(result)
+            if fallback is None and result.get("text"):
+                fallback = result
+        return self._finish(fallback)
+
+    async def race_from_html(self, html) -> dict:
+        # The routing table is SQLite-backed: read and update it off the loop.
+        methods = await asyncio.to_thread(self._methods)
+        tasks = {
+            asyncio.create_task(asyncio.to_thread(self._run_timed, method, html)): name
+            for name, method in methods.items()
+        }
+        results = {}
+        winner = None
+        pending = set(tasks)
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    name = tasks[task]
+                    result, elapsed = task.result()
+                    acceptable = strategy_stats.is_acceptable(result)
+                    results[name] = (result, elapsed, acceptable)
+                    if acceptable and winner is None:
+                        winner = name
+        finally:
+            # Cancelled runs are not recorded: they neither failed nor
+            # succeeded, and counting them would skew the routing table.
+            for task in pending:
+                task.cancel()
+
+        if winner is None:
+            # Nothing passed the quality check: keep the sequential priority.
+            winner = next(
+                (
+                    name
+                    for name in methods
+                    if name in results and results[name][0].get("text")
+                ),
+                None,
+            )
+
+        await asyncio.to_thread(
+            strategy_stats.record_many,
+            self.domain,
+            [
+                (name, elapsed, acceptable, name == winner)
+                for name, (_, elapsed, acceptable) in results.items()
+            ],
+        )
+
+        if winner:
+            logging.info(f"Extraction race for {self.domain} won by {winner}")
+        return self._finish(results[winner][0] if winner else {})
+
+    async def extract(self):
+        cached = await page_cache.lookup(self.url)
+        if cached and page_cache.is_fresh(cached):
+            return cached["extraction"]
+
+        res = await self._fetch(page_cache.conditional_headers(cached))
+        if res is not None and res.status_code == 304 and cached:
+            logging.info(f"Page not modified, reusing cached extraction: {self.url}")
+            return await page_cache.mark_revalidated(self.url, cached)
+        if res is None or not res.text:
+            return {"url": self.url, "text": "", "error": "Failed to fetch article."}
+
+        if self.race:
+            result = await self.race_from_html(res.text)
+        else:
+            # Parsing is CPU-bound; run the whole fallback chain off the event loop.
+            result = await asyncio.to_thread(self.extract_from_html, res.text)
+        if result.get("text"):
+            await page_cache.store(self.url, res.text, res.headers, result)
+        return result
@@ -16,11 +16,29 @@ Functions:
         Higher-level helper function that packages extracted
         keywords along with the top phrase and the total count
         into a single dictionary for convenient downstream use.
+
+The NLTK corpora RAKE relies on (stopwords, punkt_tab) are the "nltk_data"
+resource of `app.utils.resources`: checked, and downloaded if missing,
+once per process on first use or at startup warmup.
 """
 
 
+import nltk
 from rake_nltk import Rake
 from typing import Dict
+from app.utils.resources import resources
+
+
+@resources.register("nltk_data")
+def _nltk_data():
+    try:
+        nltk.data.find("corpora/stopwords")
+        nltk.data.find("corpora/punkt_tab")
+
+    except LookupError:
+        nltk.download("stopwords")
+        nltk.download("punkt_tab")
+    return True
 
 
 def extract_keywords(text: str, max_keywords: int = 15):
@@ -34,6 +52,7 @@ def extract_keywords(text: str, max_keywords: int = 15):
     Returns:
         List[str]: A list of important keywords/phrases.
     """
+    resources.get("nltk_data")
     rake = Rake()
     rake.extract_keywords_from_text(text)
     keywords_with_scores = rake.get_ranked_phrases_with_scores()
@@ -0,0 +1,125 @@
+"""
+page_cache.py
+-------------
+Persistent cache of downloaded article pages and their extractions, used
+by `Article_extractor` to avoid re-downloading and re-parsing articles
+that have not changed.
+
+Each entry, keyed by normalized URL, stores:
+    - the raw HTML (zlib-compressed),
+    - the extracted `{title, text, authors, publish_date}` record,
+    - the `ETag` and `Last-Modified` validators sent by the publisher,
+    - the time the page was last fetched or revalidated.
+
+Lookup policy:
+    - Entries younger than `PAGE_CACHE_FRESH_SECONDS` are served without
+      any network request.
+    - Older entries are revalidated with a conditional GET
+      (`If-None-Match` / `If-Modified-Since`); a `304 Not Modified`
+      response serves the cached extraction.
+    - Entries are evicted least-recently-used once the cache exceeds
+      `PAGE_CACHE_MAX_BYTES`, or after `PAGE_CACHE_TTL` seconds.
+
+Reads and writes (including compressing the HTML) run in a worker
+thread, so the SQLite backend never blocks the event loop.
+
+Classes:
+    PageCache
+        Wraps a `TTLCache` with freshness and revalidation helpers.
+
+Environment Variables:
+    PAGE_CACHE_BACKEND (str): "sqlite" (default) or "memory".
+    PAGE_CACHE_PATH (str): SQLite file for the disk backend.
+    PAGE_CACHE_MAX_BYTES (int): Stored bytes before eviction (default 256 MiB).
+    PAGE_CACHE_MAX_ENTRIES (int): Pages kept before eviction (default 20000).
+    PAGE_CACHE_TTL (int): Seconds before an entry is discarded (default 7 days).
+    PAGE_CACHE_FRESH_SECONDS (int): Seconds an entry is served without
+        revalidation (default 600).
+"""
+
+
+import asyncio
+import os
+import threading
+import time
+import zlib
+from typing import Optional
+from app.utils.cache import TTLCache, create_backend, normalize_url
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class PageCache:
+    def __init__(self, cache: TTLCache, fresh_seconds: float):
+        self.cache = cache
+        self.fresh_seconds = fresh_seconds
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+
+    async def lookup(self, url: str) -> Optional[dict]:
+        """Return the cached entry for `url`, or None."""
+        return await self.cache.aget(normalize_url(url))
+
+    def is_fresh(self, entry: dict) -> bool:
+        fresh = time.time() - entry["fetched_at"] < self.fresh_seconds
+        if fresh:
+            with self._lock:
+                self.fresh_hits += 1
+        return fresh
+
+    @staticmethod
+    def conditional_headers(entry: Optional[dict]) -> dict:
+        """Validator headers for a conditional GET against `entry`."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    async def mark_revalidated(self, url: str, entry: dict) -> dict:
+        """Record a `304 Not Modified` and return the cached extraction."""
+        with self._lock:
+            self.revalidated += 1
+        await self.cache.aset(normalize_url(url), {**entry, "fetched_at": time.time()})
+        return entry["extraction"]
+
+    async def store(self, url: str, html: str, headers, extraction: dict) -> None:
+        await asyncio.to_thread(self._store, url, html, headers, extraction)
+
+    def _store(self, url: str, html: str, headers, extraction: dict) -> None:
+        self.cache.set(
+            normalize_url(url),
+            {
+                "html": zlib.compress(html.encode("utf-8")),
+                "extraction": extraction,
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+                "fetched_at": time.time(),
+            },
+        )
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+        }
+
+
+def _build_page_cache() -> PageCache:
+    backend = create_backend(
+        os.getenv("PAGE_CACHE_BACKEND", "sqlite").lower(),
+        path=os.getenv("PAGE_CACHE_PATH", ".cache/pages.sqlite3"),
+        max_entries=int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "20000")),
+        max_bytes=int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    )
+    cache = TTLCache(
+        "pages", backend, ttl=float(os.getenv("PAGE_CACHE_TTL", str(7 * 24 * 3600)))
+    )
+    return PageCache(cache, float(os.getenv("PAGE_CACHE_FRESH_SECONDS", "600")))
+
+
+page_cache = _build_page_cache()
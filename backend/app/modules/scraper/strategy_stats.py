@@ -0,0 +1,267 @@
+"""
+strategy_stats.py
+-----------------
+Persistent per-domain routing table for the article extraction strategies,
+plus the quality check used to decide whether an extraction is good enough.
+
+For every (domain, method) pair the following are tracked:
+    - attempts: times the method was run on a page from the domain.
+    - successes: runs whose output passed `is_acceptable`.
+    - wins: runs whose output was the one returned to the caller.
+    - total_time: cumulative run time in seconds.
+    - cooldown_until: time before which the method is skipped for the
+      domain after it last failed to produce acceptable text.
+
+The table lives in a small SQLite file, so what has been learnt about
+each domain survives restarts and is shared by the workers of one host:
+runs are added with increments done in SQL (never by writing back a
+worker's own copy), and `plan` and `snapshot` re-read the rows other
+workers may have updated. With `EXTRACTOR_STATS_PATH` empty the table is
+kept in memory, per process.
+
+Routing:
+    `plan(domain, methods)` orders the methods by their smoothed success
+    rate on the domain (untried methods score 0.5), then by average run
+    time, then by their default priority, and leaves out methods that are
+    cooling down. When every method is cooling down, all of them are
+    returned so the page still gets a chance.
+
+Functions:
+    is_acceptable(result: dict) -> bool
+        Returns True when an extraction has enough text and most of it
+        sits in paragraph-length lines rather than menu/boilerplate lines.
+
+    plan(domain: str, methods: list[str]) -> list[str]
+        Returns the methods to try for `domain`, best first.
+
+    record(domain, method, elapsed, success, won) -> None
+        Adds one run to the table; a failed run starts the cooldown.
+
+    record_many(domain, runs) -> None
+        Adds several `(method, elapsed, success, won)` runs in one commit.
+
+    snapshot() -> dict
+        Returns the table with derived win rates and average times.
+
+Environment Variables:
+    EXTRACTOR_MIN_TEXT_LENGTH (int): Minimum characters of text (default 500).
+    EXTRACTOR_MIN_CONTENT_RATIO (float): Minimum share of characters in lines
+        longer than 30 characters (default 0.6).
+    EXTRACTOR_COOLDOWN_SECONDS (int): Seconds a failed method is skipped for
+        a domain (default 3600).
+    EXTRACTOR_STATS_PATH (str): SQLite file holding the table (default
+        ".cache/extractor_stats.sqlite3"); empty keeps it in memory only.
+"""
+
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+MIN_TEXT_LENGTH = int(os.getenv("EXTRACTOR_MIN_TEXT_LENGTH", "500"))
+MIN_CONTENT_RATIO = float(os.getenv("EXTRACTOR_MIN_CONTENT_RATIO", "0.6"))
+COOLDOWN_SECONDS = float(os.getenv("EXTRACTOR_COOLDOWN_SECONDS", "3600"))
+STATS_PATH = os.getenv("EXTRACTOR_STATS_PATH", ".cache/extractor_stats.sqlite3")
+
+_FIELDS = ("attempts", "successes", "wins", "total_time", "cooldown_until")
+
+_stats: dict[str, dict[str, dict]] = {}
+_conn: Optional[sqlite3.Connection] = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def _new_entry() -> dict:
+    return {
+        "attempts": 0,
+        "successes": 0,
+        "wins": 0,
+        "total_time": 0.0,
+        "cooldown_until": 0.0,
+    }
+
+
+def _load() -> None:
+    """Open the SQLite table and read it into memory (caller holds `_lock`)."""
+    global _conn, _loaded
+    if _loaded:
+        return
+    _loaded = True
+    if not STATS_PATH:
+        return
+
+    try:
+        directory = os.path.dirname(STATS_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _conn = sqlite3.connect(STATS_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS strategy_stats (
+                domain TEXT NOT NULL,
+                method TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                successes INTEGER NOT NULL,
+                wins INTEGER NOT NULL,
+                total_time REAL NOT NULL,
+                cooldown_until REAL NOT NULL,
+                PRIMARY KEY (domain, method)
+            )
+            """
+        )
+        _conn.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"Extractor stats not persisted ({STATS_PATH}): {e}")
+        _conn = None
+        return
+
+    _refresh()
+    logger.info(f"Loaded extractor routing table for {len(_stats)} domains")
+
+
+def _refresh(domain: Optional[str] = None) -> None:
+    """
+    Re-read the rows of `domain` (all rows if None) as written by every
+    worker (caller holds `_lock`).
+    """
+    if _conn is None:
+        return
+    query = f"SELECT domain, method, {', '.join(_FIELDS)} FROM strategy_stats"
+    try:
+        if domain is None:
+            rows = _conn.execute(query).fetchall()
+        else:
+            rows = _conn.execute(f"{query} WHERE domain = ?", (domain,)).fetchall()
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to read extractor stats: {e}")
+        return
+    for row_domain, method, *values in rows:
+        _stats.setdefault(row_domain, {})[method] = dict(zip(_FIELDS, values))
+
+
+def _add(domain: str, method: str, elapsed: float, success: bool, won: bool) -> None:
+    """Add one run in memory and in SQLite (caller holds `_lock` and commits)."""
+    cooldown_until = 0.0 if success else time.time() + COOLDOWN_SECONDS
+    entry = _stats.setdefault(domain, {}).setdefault(method, _new_entry())
+    entry["attempts"] += 1
+    entry["successes"] += int(success)
+    entry["wins"] += int(won)
+    entry["total_time"] += elapsed
+    entry["cooldown_until"] = cooldown_until
+    if _conn is None:
+        return
+    # Increments happen in SQL, so concurrent workers never lose each
+    # other's runs.
+    _conn.execute(
+        f"""
+        INSERT INTO strategy_stats (domain, method, {', '.join(_FIELDS)})
+        VALUES (?, ?, 1, ?, ?, ?, ?)
+        ON CONFLICT (domain, method) DO UPDATE SET
+            attempts = attempts + 1,
+            successes = successes + excluded.successes,
+            wins = wins + excluded.wins,
+            total_time = total_time + excluded.total_time,
+            cooldown_until = excluded.cooldown_until
+        """,
+        (domain, method, int(success), int(won), elapsed, cooldown_until),
+    )
+
+
+def is_acceptable(result: dict) -> bool:
+    text = (result or {}).get("text") or ""
+    if len(text) < MIN_TEXT_LENGTH:
+        return False
+
+    # Same rule as the cleaner: lines of 30 characters or fewer are junk.
+    content_chars = sum(len(line) for line in text.split("\n") if len(line.strip()) > 30)
+    return content_chars / len(text) >= MIN_CONTENT_RATIO
+
+
+def plan(domain: str, methods: list[str]) -> list[str]:
+    """
+    Order `methods` for `domain`, best first, skipping those cooling down.
+
+    Args:
+        domain (str): Host name of the article.
+        methods (list[str]): Method names in their default priority order.
+
+    Returns:
+        list[str]: Methods to try, in order.
+    """
+    now = time.time()
+    with _lock:
+        _load()
+        _refresh(domain)
+        known = {
+            method: dict(entry) for method, entry in _stats.get(domain, {}).items()
+        }
+
+    def rank(method: str):
+        entry = known.get(method) or _new_entry()
+        score = (entry["successes"] + 1) / (entry["attempts"] + 2)
+        avg_time = entry["total_time"] / entry["attempts"] if entry["attempts"] else 0.0
+        return (-score, avg_time, methods.index(method))
+
+    ordered = sorted(methods, key=rank)
+    available = [
+        method
+        for method in ordered
+        if (known.get(method) or _new_entry())["cooldown_until"] <= now
+    ]
+    return available or ordered
+
+
+def record(
+    domain: str,
+    method: str,
+    elapsed: float,
+    success: bool,
+    won: bool,
+) -> None:
+    """Add one run of `method` on `domain` to the table."""
+    record_many(domain, [(method, elapsed, success, won)])
+
+
+def record_many(domain: str, runs: list[tuple]) -> None:
+    """Add `(method, elapsed, success, won)` runs on `domain` in one commit."""
+    with _lock:
+        _load()
+        try:
+            for method, elapsed, success, won in runs:
+                _add(domain, method, elapsed, success, won)
+            if _conn is not None:
+                _conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to persist extractor stats for {domain}: {e}")
+
+
+def snapshot() -> dict:
+    now = time.time()
+    with _lock:
+        _load()
+        _refresh()
+        return {
+            domain: {
+                method: {
+                    "attempts": entry["attempts"],
+                    "successes": entry["successes"],
+                    "wins": entry["wins"],
+                    "total_time": round(entry["total_time"], 4),
+                    "win_rate": round(entry["wins"] / entry["attempts"], 4)
+                    if entry["attempts"]
+                    else 0.0,
+                    "avg_time": round(entry["total_time"] / entry["attempts"], 4)
+                    if entry["attempts"]
+                    else 0.0,
+                    "cooling_down": entry["cooldown_until"] > now,
+                }
+                for method, entry in methods.items()
+            }
+            for domain, methods in _stats.items()
+        }
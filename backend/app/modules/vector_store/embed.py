@@ -12,23 +12,24 @@ Workflow:
     3. Packages each embedding with its corresponding chunk ID and
        metadata for downstream storage in a vector database.
 
+Encoding goes through the shared, micro-batching `embedding_service`, so
+chunk and query embeddings use a single model instance per process.
+
 This enables semantic search, similarity comparison, and contextual
 retrieval in RAG (Retrieval-Augmented Generation) pipelines.
 
 Functions:
-    embed_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]
+    async embed_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]
         Generates and returns a list of embedding dictionaries with
         associated IDs and metadata.
 """
 
 
-from sentence_transformers import SentenceTransformer
 from typing import List, Dict, Any
-
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+from app.modules.vector_store.embedding_service import embedding_service
 
 
-def embed_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+async def embed_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     if not chunks:
         return []
 
@@ -40,7 +41,7 @@ def embed_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             )
 
     texts = [chunk["text"] for chunk in chunks]
-    embeddings = embedder.encode(texts).tolist()
+    embeddings = await embedding_service.encode(texts)
 
     vectors = []
     for chunk, embedding in zip(chunks, embeddings):
@@ -0,0 +1,107 @@
+"""
+embedding_backends.py
+---------------------
+Selectable CPU inference backends for the sentence embedding model, all
+behind the SentenceTransformer `encode()` interface the embedding service
+uses.
+
+Backends (`EMBEDDING_BACKEND`):
+    torch
+        Full-precision PyTorch model (default; the original behaviour).
+    onnx
+        ONNX Runtime via sentence-transformers' ONNX backend. Requires the
+        optional "onnx" extra (`uv sync --extra onnx`). `EMBEDDING_ONNX_FILE`
+        selects a specific export from the model repository, e.g.
+        "onnx/model_qint8_avx512_vnni.onnx" for a pre-quantized int8 model.
+    int8
+        The PyTorch model with its Linear layers dynamically quantized to
+        int8 (`torch.ao.quantization.quantize_dynamic`); no extra
+        dependencies, CPU only.
+
+The model is the shared "embedder" resource of `app.utils.resources`,
+loaded once per process. Vectors from different backends differ slightly,
+so `EMBEDDER_ID` (used to key the embedding cache) includes the backend
+for anything but the default one. `benchmarks/bench_embeddings.py` checks
+each backend's cosine similarity to the fp32 baseline and reports its
+latency, throughput and memory.
+
+Functions:
+    load_embedder(backend: str, model: str) -> SentenceTransformer
+        Loads `model` for the given backend.
+
+    embedder_id(backend: str, model: str) -> str
+        Identifier of the vectors produced by `backend` + `model`.
+
+Environment Variables:
+    EMBEDDING_MODEL (str): SentenceTransformer model name
+        (default "all-MiniLM-L6-v2").
+    EMBEDDING_BACKEND (str): "torch" (default), "onnx" or "int8".
+    EMBEDDING_ONNX_FILE (str): Optional ONNX file inside the model repository.
+"""
+
+
+import os
+from dotenv import load_dotenv
+from app.utils.resources import resources
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+load_dotenv()
+
+BACKENDS = ("torch", "onnx", "int8")
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE")
+
+
+def embedder_id(backend: str, model: str) -> str:
+    if backend == "torch":
+        return model
+    if backend == "onnx" and ONNX_FILE:
+        return f"{model}@onnx:{ONNX_FILE}"
+    return f"{model}@{backend}"
+
+
+EMBEDDER_ID = embedder_id(EMBEDDING_BACKEND, EMBEDDING_MODEL)
+
+
+def load_embedder(backend: str = EMBEDDING_BACKEND, model: str = EMBEDDING_MODEL):
+    """
+    Load `model` for the given inference backend.
+
+    Raises:
+        ValueError: If `backend` is not one of `BACKENDS`.
+        RuntimeError: If the ONNX backend's optional dependencies are missing.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+
+    # Imported here: importing sentence_transformers pulls in torch.
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model)
+
+    if backend == "onnx":
+        model_kwargs = {"file_name": ONNX_FILE} if ONNX_FILE else None
+        try:
+            return SentenceTransformer(model, backend="onnx", model_kwargs=model_kwargs)
+        except ImportError as e:
+            raise RuntimeError(
+                f"The ONNX embedding backend needs the 'onnx' extra (uv sync --extra onnx): {e}"
+            )
+
+    import torch
+
+    embedder = SentenceTransformer(model, device="cpu")
+    return torch.ao.quantization.quantize_dynamic(
+        embedder, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+@resources.register("embedder")
+def _embedder():
+    logger.info(f"Loading embedding model '{EMBEDDING_MODEL}' ({EMBEDDING_BACKEND})")
+    return load_embedder()
@@ -0,0 +1,342 @@
+"""
+embedding_cache.py
+------------------
+Two-tier cache of text embeddings, so repeated strings (popular chat
+questions, claims and perspectives of a re-processed article) never reach
+the transformer again.
+
+Keys are the model name plus the SHA-256 of the text (see
+`embedding_key`), in the style of `app.utils.generate_chunk_id`.
+
+Tiers:
+    Memory
+        LRU of the most recently used vectors (`EMBEDDING_CACHE_MEMORY_ENTRIES`).
+    Disk
+        A float32 `numpy.memmap` file holding one vector per row, with a
+        small SQLite table mapping keys to rows. Vectors survive restarts
+        and are shared by the workers of one host: every read and write
+        holds an `fcntl` lock on a `.lock` file next to the data, and a
+        writer re-reads the next free row from SQLite under that lock, so
+        workers never hand out the same row twice. The file is a ring of
+        at most `EMBEDDING_CACHE_DISK_ROWS` rows: when it is full the
+        oldest row is overwritten. Without `fcntl` (Windows) the disk tier
+        is only safe for a single process.
+
+Vectors returned by `get_many` are read-only arrays that nothing ever
+writes to again, so callers may hold them as long as they like: evicting
+or overwriting an entry replaces the cache's reference, never the array.
+Memory hits are returned without copying. A disk hit is copied once out
+of the memmap, into an array shared with the memory tier. Views straight
+into the memmap are deliberately not handed out: another worker may
+reuse the row (the ring wraps) while the caller still holds the view.
+
+Classes:
+    EmbeddingCache
+        The cache for one model.
+
+Functions:
+    embedding_key(model: str, text: str) -> str
+        Cache key of `text` embedded by `model`.
+
+    build_embedding_cache(model: str) -> EmbeddingCache | None
+        Creates the cache for `model` from environment variables, or
+        returns None when caching is disabled.
+
+Environment Variables:
+    EMBEDDING_CACHE (bool): Set to 0 to disable the cache (default 1).
+    EMBEDDING_CACHE_DIR (str): Directory of the disk tier (default
+        ".cache/embeddings"); empty keeps only the memory tier.
+    EMBEDDING_CACHE_MEMORY_ENTRIES (int): Vectors kept in memory (default 10000).
+    EMBEDDING_CACHE_DISK_ROWS (int): Vectors kept on disk (default 500000).
+"""
+
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from app.logging.logging_config import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+# Rows added to the memmap file each time it has to grow.
+_GROW_ROWS = 4096
+
+
+def embedding_key(model: str, text: str) -> str:
+    hashed_text = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{hashed_text}"
+
+
+def _frozen(vector: np.ndarray) -> np.ndarray:
+    """Mark a cache-owned array read-only, so it can be shared without copies."""
+    vector.setflags(write=False)
+    return vector
+
+
+class EmbeddingCache:
+    """
+    Memory + memmap cache of the embeddings produced by one model.
+
+    Args:
+        model (str): Model name; part of every key and of the file names.
+        directory (str): Directory for the disk tier, or "" for memory only.
+        memory_entries (int): Size of the in-memory LRU.
+        disk_rows (int): Capacity of the on-disk ring.
+    """
+
+    def __init__(self, model: str, directory: str, memory_entries: int, disk_rows: int):
+        self.model = model
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_rows = disk_rows
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._opened = False
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock_file = None
+        self._vectors: Optional[np.memmap] = None
+        self._dim: Optional[int] = None
+        self._next_row = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # Disk tier
+
+    def _paths(self):
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.model)
+        base = os.path.join(self.directory, slug)
+        return f"{base}.f32", f"{base}.sqlite3", f"{base}.lock"
+
+    def _open(self) -> None:
+        """Open (or create) the disk tier on first use; caller holds `_lock`."""
+        if self._opened:
+            return
+        self._opened = True
+        if not self.directory:
+            return
+
+        _, index_path, lock_path = self._paths()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_file = open(lock_path, "a+b")
+            self._conn = sqlite3.connect(index_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors "
+                "(key TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)"
+            )
+            self._conn.commit()
+            with self._file_lock(exclusive=False):
+                self._sync()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Embedding cache disk tier disabled ({index_path}): {e}")
+            self._conn = None
+            return
+
+        logger.info(
+            f"Opened embedding cache for '{self.model}' "
+            f"({self._vectors.shape[0] if self._vectors is not None else 0} rows)"
+        )
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Hold the cross-process lock of the disk tier."""
+        if fcntl is None or self._lock_file is None:
+            yield
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _sync(self) -> None:
+        """
+        Pick up what other processes wrote: the dimension, the next free row
+        and any growth of the file. Caller holds the file lock.
+        """
+        meta = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+        self._dim = meta.get("dim", self._dim)
+        self._next_row = meta.get("next_row", 0)
+        vectors_path, _, _ = self._paths()
+        if not self._dim or not os.path.exists(vectors_path):
+            return
+        rows = os.path.getsize(vectors_path) // (4 * self._dim)
+        allocated = self._vectors.shape[0] if self._vectors is not None else 0
+        if rows > allocated:
+            self._vectors = np.memmap(
+                vectors_path, dtype=np.float32, mode="r+", shape=(rows, self._dim)
+            )
+
+    def _ensure_rows(self, rows: int) -> None:
+        """Grow the memmap file to hold at least `rows` rows."""
+        allocated = self._vectors.shape[0] if self._vectors is not None else 0
+        if rows <= allocated:
+            return
+        new_rows = min(self.disk_rows, max(rows, allocated + _GROW_ROWS))
+        vectors_path, _, _ = self._paths()
+        if self._vectors is not None:
+            self._vectors.flush()
+        with open(vectors_path, "ab") as f:
+            f.truncate(new_rows * self._dim * 4)
+        self._vectors = np.memmap(
+            vectors_path, dtype=np.float32, mode="r+", shape=(new_rows, self._dim)
+        )
+
+    def _disk_get(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Read-only copies of the vectors of `keys` found on disk."""
+        if self._conn is None or not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._file_lock(exclusive=False):
+            self._sync()
+            if self._vectors is None:
+                return {}
+            rows = self._conn.execute(
+                f"SELECT key, row FROM vectors WHERE key IN ({placeholders})", list(keys)
+            ).fetchall()
+            return {
+                key: _frozen(np.array(self._vectors[row], copy=True))
+                for key, row in rows
+                if row < self._vectors.shape[0]
+            }
+
+    def _disk_put(self, items: Dict[str, np.ndarray]) -> None:
+        """Write vectors to the ring."""
+        if self._conn is None:
+            return
+        with self._file_lock(exclusive=True):
+            # Another worker may have written since; allocate after its rows.
+            self._sync()
+            self._disk_write(items)
+
+    def _disk_write(self, items: Dict[str, np.ndarray]) -> None:
+        if self._dim is None:
+            self._dim = len(next(iter(items.values())))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('dim', ?)", (self._dim,)
+            )
+
+        for key, vector in items.items():
+            if len(vector) != self._dim:
+                continue
+            row = self._next_row
+            self._next_row = (row + 1) % self.disk_rows
+            self._ensure_rows(row + 1)
+
+            # Reusing a row evicts whatever it held before.
+            previous = self._conn.execute(
+                "SELECT key FROM vectors WHERE row = ?", (row,)
+            ).fetchone()
+            if previous is not None:
+                self._conn.execute("DELETE FROM vectors WHERE row = ?", (row,))
+            self._conn.execute("DELETE FROM vectors WHERE key = ?", (key,))
+
+            self._vectors[row] = vector
+            self._conn.execute("INSERT INTO vectors (key, row) VALUES (?, ?)", (key, row))
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('next_row', ?)",
+            (self._next_row,),
+        )
+        self._vectors.flush()
+        self._conn.commit()
+
+    # Memory tier
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # Public API
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached vector of each text, or None where it is not cached."""
+        keys = [embedding_key(self.model, text) for text in texts]
+        with self._lock:
+            self._open()
+            in_memory: Dict[str, np.ndarray] = {}
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    in_memory[key] = self._memory[key]
+
+            on_disk = self._disk_get(
+                [key for key in dict.fromkeys(keys) if key not in in_memory]
+            )
+            for key, vector in on_disk.items():
+                self._remember(key, vector)
+
+            for key in keys:
+                if key in in_memory:
+                    self.memory_hits += 1
+                elif key in on_disk:
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+        found = {**on_disk, **in_memory}
+        return [found.get(key) for key in keys]
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Store the embeddings of `texts`."""
+        items = {
+            embedding_key(self.model, text): _frozen(np.array(vector, dtype=np.float32, copy=True))
+            for text, vector in zip(texts, vectors)
+        }
+        if not items:
+            return
+        with self._lock:
+            self._open()
+            try:
+                self._disk_put(items)
+            except (OSError, sqlite3.Error, ValueError) as e:
+                logger.warning(f"Failed to write embeddings to disk cache: {e}")
+            for key, vector in items.items():
+                self._remember(key, vector)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_rows = 0
+            if self._conn is not None:
+                (disk_rows,) = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()
+            return {
+                "model": self.model,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4)
+                if lookups
+                else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_rows": disk_rows,
+            }
+
+
+def build_embedding_cache(model: str) -> Optional[EmbeddingCache]:
+    """Create the embedding cache for `model`, or None when disabled."""
+    if os.getenv("EMBEDDING_CACHE", "1").lower() in ("0", "false", "no"):
+        return None
+    return EmbeddingCache(
+        model,
+        directory=os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings"),
+        memory_entries=int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "10000")),
+        disk_rows=int(os.getenv("EMBEDDING_CACHE_DISK_ROWS", "500000")),
+    )
@@ -0,0 +1,244 @@
+"""
+embedding_service.py
+--------------------
+Process-wide embedding service shared by query embedding (`/chat`) and
+chunk embedding (`store_and_send`).
+
+Callers submit texts with `await embedding_service.encode(texts)`. A
+single background worker collects the requests that arrive within a short
+window (`EMBEDDING_BATCH_MAX_WAIT_MS` after the first one, or until
+`EMBEDDING_BATCH_MAX_ITEMS` texts are waiting), encodes them as one batch
+on the shared "embedder" model (see `embedding_backends` for the
+torch / ONNX / int8 choice) in a worker thread, and hands each caller
+its own vectors. Under concurrent chat load, many single-query requests
+become one model call; while a batch is being encoded, the next one
+accumulates.
+
+Texts already embedded before are served from `embedding_cache` (memory
+LRU over an on-disk memmap) and never reach the batcher; only the
+distinct uncached texts of a request are encoded.
+
+No caller is left waiting forever: if the worker stops (it is restarted
+on the next request) or the service is closed, every request still
+queued or in its batch fails with a RuntimeError.
+
+Classes:
+    EmbeddingService
+        Micro-batching front end to the shared SentenceTransformer model.
+
+Attributes:
+    embedding_service (EmbeddingService): The shared instance.
+
+Metrics (`embedding_service.stats()`):
+    requests, texts, batches, avg/max batch size (texts per model call),
+    avg/max queue latency (seconds from submission to the start of its
+    batch), average encode time per batch, and the cache hit rates.
+
+Environment Variables:
+    EMBEDDING_BATCH_MAX_ITEMS (int): Texts per batch before it is sent
+        without waiting further (default 64).
+    EMBEDDING_BATCH_MAX_WAIT_MS (float): Milliseconds a batch waits for more
+        requests after the first one arrives (default 5).
+"""
+
+
+import asyncio
+import os
+import threading
+import time
+from typing import List, Optional
+from app.modules.vector_store.embedding_cache import build_embedding_cache
+from app.modules.vector_store.embedding_backends import EMBEDDER_ID
+from app.utils.resources import resources
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+MAX_BATCH_ITEMS = int(os.getenv("EMBEDDING_BATCH_MAX_ITEMS", "64"))
+MAX_WAIT_SECONDS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5")) / 1000
+
+
+def _fail(requests: list, error: BaseException) -> None:
+    """Fail the futures of `requests` that are still waiting."""
+    for _, future, _ in requests:
+        if not future.done():
+            try:
+                future.set_exception(error)
+            except RuntimeError:
+                # Its event loop is already closed; nobody is waiting.
+                pass
+
+
+def _drain(queue: asyncio.Queue) -> list:
+    requests = []
+    while True:
+        try:
+            requests.append(queue.get_nowait())
+        except asyncio.QueueEmpty:
+            return requests
+
+
+class EmbeddingService:
+    def __init__(self, max_batch_items: int, max_wait_seconds: float, cache=None):
+        self.max_batch_items = max_batch_items
+        self.max_wait_seconds = max_wait_seconds
+        self.cache = cache
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "texts": 0,
+            "batches": 0,
+            "max_batch_size": 0,
+            "queue_latency_total": 0.0,
+            "queue_latency_max": 0.0,
+            "encode_time_total": 0.0,
+        }
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        # The queue and worker belong to the running event loop, so they are
+        # created on first use (and again if the app is restarted on a new loop).
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            if self._queue is not None:
+                # Requests left in the old queue would never be answered.
+                _fail(_drain(self._queue), RuntimeError("Embedding worker stopped"))
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        return self._queue
+
+    async def encode(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed `texts`, batched together with concurrent requests.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            List[List[float]]: One vector per text, in order.
+        """
+        if not texts:
+            return []
+        if self.cache is None:
+            return await self._submit(list(texts))
+
+        cached = await asyncio.to_thread(self.cache.get_many, texts)
+        missing = list(
+            dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None)
+        )
+        computed = {}
+        if missing:
+            vectors = await self._submit(missing)
+            computed = dict(zip(missing, vectors))
+            await asyncio.to_thread(self.cache.put_many, missing, vectors)
+        return [
+            vector.tolist() if vector is not None else computed[text]
+            for text, vector in zip(texts, cached)
+        ]
+
+    async def _submit(self, texts: List[str]) -> List[List[float]]:
+        future = asyncio.get_running_loop().create_future()
+        self._ensure_worker().put_nowait((texts, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> list:
+        requests = [await self._queue.get()]
+        size = len(requests[0][0])
+        deadline = time.perf_counter() + self.max_wait_seconds
+        while size < self.max_batch_items:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            requests.append(request)
+            size += len(request[0])
+        return requests
+
+    async def _run(self) -> None:
+        requests = []
+        try:
+            while True:
+                requests = await self._collect()
+                # Callers that gave up (e.g. client disconnected) need no vectors.
+                requests = [r for r in requests if not r[1].done()]
+                if not requests:
+                    continue
+
+                texts = [text for request in requests for text in request[0]]
+                started = time.perf_counter()
+                try:
+                    embedder = await resources.aget("embedder")
+                    vectors = await asyncio.to_thread(embedder.encode, texts)
+                    vectors = vectors.tolist()
+                except Exception as e:
+                    logger.exception(f"Embedding batch of {len(texts)} texts failed: {e}")
+                    _fail(requests, e)
+                    continue
+
+                self._record(requests, len(texts), started, time.perf_counter() - started)
+                offset = 0
+                for request_texts, future, _ in requests:
+                    if not future.done():
+                        future.set_result(vectors[offset : offset + len(request_texts)])
+                    offset += len(request_texts)
+        except BaseException as e:
+            # The batch in hand when the worker stops would never be answered.
+            stopped = isinstance(e, asyncio.CancelledError)
+            _fail(requests, RuntimeError("Embedding worker stopped") if stopped else e)
+            raise
+
+    def _record(self, requests, size: int, started: float, encode_time: float) -> None:
+        latencies = [started - submitted for _, _, submitted in requests]
+        with self._lock:
+            metrics = self._metrics
+            metrics["requests"] += len(requests)
+            metrics["texts"] += size
+            metrics["batches"] += 1
+            metrics["max_batch_size"] = max(metrics["max_batch_size"], size)
+            metrics["queue_latency_total"] += sum(latencies)
+            metrics["queue_latency_max"] = max(metrics["queue_latency_max"], *latencies)
+            metrics["encode_time_total"] += encode_time
+
+    def stats(self) -> dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+        batches = metrics["batches"]
+        requests = metrics["requests"]
+        return {
+            "requests": requests,
+            "texts": metrics["texts"],
+            "batches": batches,
+            "avg_batch_size": round(metrics["texts"] / batches, 2) if batches else 0.0,
+            "max_batch_size": metrics["max_batch_size"],
+            "avg_queue_latency": round(metrics["queue_latency_total"] / requests, 6)
+            if requests
+            else 0.0,
+            "max_queue_latency": round(metrics["queue_latency_max"], 6),
+            "avg_encode_time": round(metrics["encode_time_total"] / batches, 6)
+            if batches
+            else 0.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    async def close(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            if self._loop is asyncio.get_running_loop():
+                await asyncio.gather(self._worker, return_exceptions=True)
+        if self._queue is not None:
+            _fail(_drain(self._queue), RuntimeError("Embedding service closed"))
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+
+embedding_service = EmbeddingService(
+    MAX_BATCH_ITEMS, MAX_WAIT_SECONDS, cache=build_embedding_cache(EMBEDDER_ID)
+)
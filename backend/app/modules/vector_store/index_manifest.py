@@ -0,0 +1,273 @@
+"""
+index_manifest.py
+-----------------
+Local manifest of what is already in the vector index, so reprocessing an
+article does not re-embed and re-upsert chunks that have not changed.
+
+Chunk IDs are deterministic (`{article_id}-perspective`,
+`{article_id}-fact-{i}`). The manifest stores a content hash for each
+stored chunk id. The hash covers the chunk text, its metadata and the
+embedder (`EMBEDDER_ID`), so switching the embedding model or backend
+re-embeds everything. `index_chunks` embeds and upserts only new or
+changed chunks. It also deletes chunks an article no longer has (e.g. a
+fact that disappeared on re-run) and then records the result.
+
+Entries are scoped to the configured vector store (Pinecone index or local
+index path), so one manifest never vouches for another store's content.
+With `INDEX_MANIFEST_VERIFY` enabled, chunks the manifest reports as
+stored are confirmed with a `fetch` against the index first. Anything
+missing (e.g. deleted out of band) is indexed again. A fetch is a cheap
+read compared with an embed plus upsert.
+
+The SQLite file is opened on first use, not at import.
+
+Classes:
+    IndexManifest
+        SQLite table of (store, namespace, chunk id) -> content hash.
+
+Functions:
+    async index_chunks(chunks: List[Dict[str, Any]], namespace: str = "default") -> Dict[str, int]
+        Embeds and stores the new or changed chunks, deletes stale ones,
+        and returns how many were embedded, skipped and deleted.
+
+Attributes:
+    index_manifest (IndexManifest | None): The shared manifest, or None
+        when disabled.
+
+Environment Variables:
+    INDEX_MANIFEST (bool): Set to "0"/"false" to always re-index every
+        chunk (default enabled).
+    INDEX_MANIFEST_PATH (str): SQLite file of the manifest
+        (default ".cache/index_manifest.sqlite3").
+    INDEX_MANIFEST_VERIFY (bool): Confirm manifest entries against the
+        vector store before skipping (default disabled).
+"""
+
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.db.vector_store import get_async_index, INDEX_NAME, VECTOR_STORE
+from app.modules.vector_store.embed import embed_chunks
+from app.modules.vector_store.embedding_backends import EMBEDDER_ID
+from app.utils.store_vectors import store
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+MANIFEST_PATH = os.getenv("INDEX_MANIFEST_PATH", ".cache/index_manifest.sqlite3")
+VERIFY = os.getenv("INDEX_MANIFEST_VERIFY", "0").lower() in ("1", "true", "yes")
+
+_FETCH_BATCH = 100
+
+
+def _store_id() -> str:
+    if VECTOR_STORE == "local":
+        path = os.getenv("LOCAL_INDEX_PATH", ".cache/vector_index")
+        return f"local:{os.path.abspath(path)}"
+    return f"pinecone:{INDEX_NAME}"
+
+
+def chunk_hash(chunk: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"text": chunk["text"], "metadata": chunk.get("metadata"), "embedder": EMBEDDER_ID},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IndexManifest:
+    def __init__(self, path: str, store_id: str):
+        self.path = path
+        self.store_id = store_id
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = {"embedded": 0, "skipped": 0, "deleted": 0, "verify_misses": 0}
+
+    def _db(self) -> sqlite3.Connection:
+        """The manifest database, opened on first use (caller holds `_lock`)."""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS manifest (
+                    store TEXT NOT NULL,
+                    namespace TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    article_id TEXT,
+                    content_hash TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    PRIMARY KEY (store, namespace, chunk_id)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS manifest_article ON manifest (store, namespace, article_id)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def count(self, **increments) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def plan(
+        self, chunks: List[Dict[str, Any]], namespace: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[str]]:
+        """
+        Split chunks into (changed, unchanged) and list stale chunk ids:
+        ids recorded for the same articles that are no longer produced.
+        """
+        article_ids = {c.get("metadata", {}).get("article_id") for c in chunks} - {None}
+        with self._lock:
+            conn = self._db()
+            stored = {}
+            for article_id in article_ids:
+                stored.update(
+                    conn.execute(
+                        """
+                        SELECT chunk_id, content_hash FROM manifest
+                        WHERE store = ? AND namespace = ? AND article_id = ?
+                        """,
+                        (self.store_id, namespace, article_id),
+                    ).fetchall()
+                )
+            for chunk in chunks:
+                if chunk["id"] not in stored:
+                    row = conn.execute(
+                        """
+                        SELECT content_hash FROM manifest
+                        WHERE store = ? AND namespace = ? AND chunk_id = ?
+                        """,
+                        (self.store_id, namespace, chunk["id"]),
+                    ).fetchone()
+                    if row:
+                        stored[chunk["id"]] = row[0]
+
+        changed, unchanged = [], []
+        for chunk in chunks:
+            if stored.get(chunk["id"]) == chunk_hash(chunk):
+                unchanged.append(chunk)
+            else:
+                changed.append(chunk)
+        ids = {chunk["id"] for chunk in chunks}
+        stale = [chunk_id for chunk_id in stored if chunk_id not in ids]
+        return changed, unchanged, stale
+
+    def record(self, chunks: List[Dict[str, Any]], namespace: str) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._db()
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO manifest
+                    (store, namespace, chunk_id, article_id, content_hash, stored_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        self.store_id,
+                        namespace,
+                        chunk["id"],
+                        chunk.get("metadata", {}).get("article_id"),
+                        chunk_hash(chunk),
+                        now,
+                    )
+                    for chunk in chunks
+                ],
+            )
+            conn.commit()
+
+    def forget(self, chunk_ids: Iterable[str], namespace: str) -> None:
+        with self._lock:
+            conn = self._db()
+            conn.executemany(
+                "DELETE FROM manifest WHERE store = ? AND namespace = ? AND chunk_id = ?",
+                [(self.store_id, namespace, chunk_id) for chunk_id in chunk_ids],
+            )
+            conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            if self._conn is None and not os.path.exists(self.path):
+                # Never used: don't create the manifest just to report on it.
+                stats["chunks"] = 0
+            else:
+                stats["chunks"] = self._db().execute(
+                    "SELECT COUNT(*) FROM manifest WHERE store = ?", (self.store_id,)
+                ).fetchone()[0]
+        return stats
+
+
+def _build_manifest() -> Optional[IndexManifest]:
+    if os.getenv("INDEX_MANIFEST", "1").lower() in ("0", "false", "no"):
+        return None
+    return IndexManifest(MANIFEST_PATH, _store_id())
+
+
+index_manifest = _build_manifest()
+
+
+async def _missing_from_index(chunk_ids: List[str], namespace: str) -> set:
+    index = await get_async_index()
+    present = set()
+    for start in range(0, len(chunk_ids), _FETCH_BATCH):
+        response = await index.fetch(ids=chunk_ids[start : start + _FETCH_BATCH], namespace=namespace)
+        present.update(response["vectors"].keys())
+    return set(chunk_ids) - present
+
+
+async def index_chunks(chunks: List[Dict[str, Any]], namespace: str = "default") -> Dict[str, int]:
+    """
+    Embed and store the chunks that are not already indexed unchanged.
+
+    Raises:
+        ValueError: If chunks is empty or malformed.
+        RuntimeError: If storing the vectors fails.
+    """
+    if not chunks:
+        raise ValueError("Chunks list cannot be empty")
+    # The same chunk may appear twice (e.g. an article queued twice); keep the latest.
+    chunks = list({chunk["id"]: chunk for chunk in chunks}.values())
+
+    if index_manifest is None:
+        await store(await embed_chunks(chunks), namespace)
+        return {"embedded": len(chunks), "skipped": 0, "deleted": 0}
+
+    changed, unchanged, stale = await asyncio.to_thread(index_manifest.plan, chunks, namespace)
+
+    if VERIFY and unchanged:
+        missing = await _missing_from_index([chunk["id"] for chunk in unchanged], namespace)
+        if missing:
+            logger.warning(f"{len(missing)} chunk(s) in the manifest are missing from the index")
+            index_manifest.count(verify_misses=len(missing))
+            changed += [chunk for chunk in unchanged if chunk["id"] in missing]
+            unchanged = [chunk for chunk in unchanged if chunk["id"] not in missing]
+
+    if changed:
+        await store(await embed_chunks(changed), namespace)
+        await asyncio.to_thread(index_manifest.record, changed, namespace)
+    if stale:
+        index = await get_async_index()
+        await index.delete(ids=stale, namespace=namespace)
+        await asyncio.to_thread(index_manifest.forget, stale, namespace)
+
+    result = {"embedded": len(changed), "skipped": len(unchanged), "deleted": len(stale)}
+    index_manifest.count(**result)
+    logger.info(
+        f"Indexed {result['embedded']} chunk(s), skipped {result['skipped']} unchanged, "
+        f"deleted {result['deleted']} stale"
+    )
+    return result
@@ -0,0 +1,344 @@
+"""
+write_behind.py
+---------------
+Durable write-behind queue for RAG indexing. With
+`VECTOR_WRITE_MODE=background`, `store_and_send` only chunks the finished
+article and enqueues the chunks here. Embedding and upserting happen
+afterwards, so `/process` returns without waiting for them.
+
+Queued articles are rows in a SQLite table (`VECTOR_WRITE_QUEUE_PATH`).
+They are deleted only after their vectors are stored, so anything still
+queued when the process stops is replayed by the worker on the next
+start. Upserts are keyed by chunk id and are therefore idempotent.
+
+The worker takes up to `VECTOR_WRITE_BATCH_ARTICLES` queued articles at a
+time. It embeds all of their chunks in one call to the embedding service,
+which gives larger model batches than one article at a time, and then
+stores them. Both steps go through `index_manifest.index_chunks`, so
+chunks that are already indexed unchanged are skipped. A batch that
+fails with a transient error (the store is unavailable even after
+`store_vectors`' own retries) is retried as a whole later, with
+exponential backoff. Any other failure splits the batch in halves, each
+retried at once, down to single articles, so one bad article does not
+hold back (or kill) the rest of its batch; the halves that succeed skip
+their already-indexed chunks. Only an article that fails on its own is
+retried later. After `VECTOR_WRITE_MAX_ATTEMPTS` failed attempts an
+article is marked dead and kept for inspection. Errors of the queue
+itself (e.g. a locked SQLite file) do not stop the worker; it backs off
+and carries on.
+
+Classes:
+    WriteBehindQueue
+        SQLite-backed queue plus its background worker.
+
+Attributes:
+    write_behind (WriteBehindQueue): The shared queue.
+
+Metrics (`write_behind.stats()`):
+    pending and dead articles, age of the oldest pending article (the
+    current lag), average and maximum lag of stored articles (enqueue to
+    stored), batches, average articles and chunks per batch, failures.
+
+Environment Variables:
+    VECTOR_WRITE_MODE (str): "sync" (default) indexes inside the
+        `store_and_send` node, "background" queues articles here.
+    VECTOR_WRITE_QUEUE_PATH (str): SQLite file of the queue
+        (default ".cache/write_behind.sqlite3").
+    VECTOR_WRITE_QUEUE_SIZE (int): Pending articles before `submit()`
+        waits for the worker (default 1000).
+    VECTOR_WRITE_BATCH_ARTICLES (int): Articles embedded and stored
+        together (default 16).
+    VECTOR_WRITE_BATCH_WAIT_MS (float): Time the worker waits for more
+        articles after the first one arrives (default 50).
+    VECTOR_WRITE_MAX_ATTEMPTS (int): Attempts before an article is marked
+        dead (default 5).
+"""
+
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from app.modules.vector_store.index_manifest import index_chunks
+from app.utils.store_vectors import BACKOFF_SECONDS, is_transient
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+WRITE_MODE = os.getenv("VECTOR_WRITE_MODE", "sync").lower()
+QUEUE_PATH = os.getenv("VECTOR_WRITE_QUEUE_PATH", ".cache/write_behind.sqlite3")
+QUEUE_SIZE = int(os.getenv("VECTOR_WRITE_QUEUE_SIZE", "1000"))
+BATCH_ARTICLES = int(os.getenv("VECTOR_WRITE_BATCH_ARTICLES", "16"))
+BATCH_WAIT_SECONDS = float(os.getenv("VECTOR_WRITE_BATCH_WAIT_MS", "50")) / 1000
+MAX_ATTEMPTS = int(os.getenv("VECTOR_WRITE_MAX_ATTEMPTS", "5"))
+RETRY_MAX_SECONDS = 60.0
+WORKER_BACKOFF_MAX_SECONDS = 30.0
+
+
+def _is_outage(error: Optional[BaseException]) -> bool:
+    """Whether `error`, or an error that caused it, is transient."""
+    while error is not None:
+        if isinstance(error, Exception) and is_transient(error):
+            return True
+        error = error.__cause__
+    return False
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        path: str,
+        max_pending: int,
+        batch_articles: int,
+        batch_wait_seconds: float,
+        max_attempts: int,
+    ):
+        self.path = path
+        self.max_pending = max_pending
+        self.batch_articles = batch_articles
+        self.batch_wait_seconds = batch_wait_seconds
+        self.max_attempts = max_attempts
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._metrics = {
+            "stored": 0,
+            "chunks": 0,
+            "batches": 0,
+            "failures": 0,
+            "lag_total": 0.0,
+            "lag_max": 0.0,
+        }
+
+    # Storage
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS write_queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    namespace TEXT NOT NULL,
+                    chunks TEXT NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL DEFAULT 0,
+                    dead INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT
+                )
+                """
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _execute(self, sql: str, params=()) -> list:
+        with self._db_lock:
+            conn = self._db()
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows
+
+    def pending(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM write_queue WHERE dead = 0")[0][0]
+
+    # Producer side
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    async def start(self) -> None:
+        """Start the worker; replays anything left queued by a previous run."""
+        self._ensure_worker()
+        pending = await asyncio.to_thread(self.pending)
+        if pending:
+            logger.info(f"Replaying {pending} queued article(s) for indexing")
+            self._wakeup.set()
+
+    async def submit(self, chunks: List[Dict[str, Any]], namespace: str = "default") -> None:
+        """Durably queue an article's chunks for embedding and storage."""
+        if not chunks:
+            raise ValueError("Chunks list cannot be empty")
+        self._ensure_worker()
+        # Backpressure: wait while the worker is too far behind.
+        while await asyncio.to_thread(self.pending) >= self.max_pending:
+            await asyncio.sleep(0.1)
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO write_queue (namespace, chunks, enqueued_at) VALUES (?, ?, ?)",
+            (namespace, json.dumps(chunks), time.time()),
+        )
+        self._wakeup.set()
+
+    # Worker side
+
+    def _claim(self) -> list:
+        return self._execute(
+            """
+            SELECT id, namespace, chunks, enqueued_at, attempts FROM write_queue
+            WHERE dead = 0 AND next_attempt_at <= ?
+            ORDER BY id LIMIT ?
+            """,
+            (time.time(), self.batch_articles),
+        )
+
+    def _next_due(self) -> Optional[float]:
+        row = self._execute("SELECT MIN(next_attempt_at) FROM write_queue WHERE dead = 0")
+        return row[0][0]
+
+    async def _wait_for_work(self) -> None:
+        due = await asyncio.to_thread(self._next_due)
+        timeout = None if due is None else max(0.0, due - time.time())
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                # Cleared before claiming, so a submit() racing with the claim
+                # still wakes the next wait.
+                self._wakeup.clear()
+                rows = await asyncio.to_thread(self._claim)
+                if not rows:
+                    await self._wait_for_work()
+                    continue
+                if len(rows) < self.batch_articles and self.batch_wait_seconds:
+                    # Let concurrent /process requests join this batch.
+                    await asyncio.sleep(self.batch_wait_seconds)
+                    rows = await asyncio.to_thread(self._claim)
+                await self._process(rows)
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # E.g. a locked or unavailable queue database: keep the worker
+                # alive and try again later.
+                failures += 1
+                delay = min(WORKER_BACKOFF_MAX_SECONDS, 0.5 * 2**failures)
+                logger.exception(f"Write-behind worker error, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def _process(self, rows: list) -> None:
+        rows = await self._store(rows)
+        if not rows:
+            return
+        ids = [row[0] for row in rows]
+        await asyncio.to_thread(
+            self._execute,
+            f"DELETE FROM write_queue WHERE id IN ({','.join('?' * len(ids))})",
+            ids,
+        )
+        now = time.time()
+        lags = [now - row[3] for row in rows]
+        with self._lock:
+            metrics = self._metrics
+            metrics["stored"] += len(rows)
+            metrics["chunks"] += sum(len(json.loads(row[2])) for row in rows)
+            metrics["batches"] += 1
+            metrics["lag_total"] += sum(lags)
+            metrics["lag_max"] = max(metrics["lag_max"], *lags)
+        logger.info(f"Indexed {len(rows)} queued article(s) (max lag {max(lags):.2f}s)")
+
+    async def _store(self, rows: list) -> list:
+        """
+        Index the chunks of `rows` and return the rows that were stored. A
+        batch that fails for a non-transient reason is bisected, so only
+        articles that fail on their own are passed to `_fail`.
+        """
+        by_namespace: Dict[str, List[dict]] = {}
+        for _, namespace, chunks, _, _ in rows:
+            by_namespace.setdefault(namespace, []).extend(json.loads(chunks))
+
+        try:
+            for namespace, chunks in by_namespace.items():
+                await index_chunks(chunks, namespace)
+        except Exception as e:
+            if len(rows) == 1 or _is_outage(e):
+                # An outage would fail every half too: back off instead.
+                await asyncio.to_thread(self._fail, rows, e)
+                return []
+            logger.warning(f"Indexing {len(rows)} queued articles failed, retrying in halves: {e}")
+            middle = len(rows) // 2
+            return await self._store(rows[:middle]) + await self._store(rows[middle:])
+        return rows
+
+    def _fail(self, rows: list, error: Exception) -> None:
+        with self._lock:
+            self._metrics["failures"] += 1
+        dead_rows = 0
+        for row_id, _, _, _, attempts in rows:
+            attempts += 1
+            dead = attempts >= self.max_attempts
+            dead_rows += dead
+            delay = random.uniform(0, min(RETRY_MAX_SECONDS, BACKOFF_SECONDS * 2**attempts))
+            self._execute(
+                """
+                UPDATE write_queue
+                SET attempts = ?, next_attempt_at = ?, dead = ?, last_error = ?
+                WHERE id = ?
+                """,
+                (attempts, time.time() + delay, int(dead), str(error), row_id),
+            )
+        logger.error(
+            f"Indexing {len(rows)} queued article(s) failed "
+            f"({dead_rows} gave up after {self.max_attempts} attempts): {error}"
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+        if self._conn is None and not os.path.exists(self.path):
+            # Never used (sync mode): don't create the queue just to report on it.
+            pending = dead = oldest = None
+        else:
+            pending, dead, oldest = self._execute(
+                """
+                SELECT SUM(dead = 0), SUM(dead = 1), MIN(CASE WHEN dead = 0 THEN enqueued_at END)
+                FROM write_queue
+                """
+            )[0]
+        stored, batches = metrics["stored"], metrics["batches"]
+        return {
+            "pending": pending or 0,
+            "dead": dead or 0,
+            "lag_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            "stored": stored,
+            "avg_lag": round(metrics["lag_total"] / stored, 3) if stored else 0.0,
+            "max_lag": round(metrics["lag_max"], 3),
+            "batches": batches,
+            "avg_articles_per_batch": round(stored / batches, 2) if batches else 0.0,
+            "avg_chunks_per_batch": round(metrics["chunks"] / batches, 2) if batches else 0.0,
+            "failures": metrics["failures"],
+        }
+
+    async def close(self) -> None:
+        # Whatever is still queued (including an interrupted batch) stays in
+        # SQLite and is replayed on the next start.
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+        self._worker = None
+        self._wakeup = None
+        self._loop = None
+
+
+write_behind = WriteBehindQueue(
+    QUEUE_PATH, QUEUE_SIZE, BATCH_ARTICLES, BATCH_WAIT_SECONDS, MAX_ATTEMPTS
+)
@@ -17,26 +17,108 @@ Endpoints:
         LangGraph workflow for sentiment analysis, fact-checking, perspective generation,
         and final result assembly.
 
+    POST /process/stream
+        Same as /process, but streams each stage as it completes: "scrape"
+        (cleaned text and keywords), "sentiment", "fact" (each verified
+        fact as soon as it is checked), "facts", "perspective", "judge"
+        (one pair per retry), "storage", then "result" with the full
+        /process payload, or "error". Server-Sent Events by default;
+        NDJSON with `?format=ndjson` or `Accept: application/x-ndjson`.
+
+    POST /process/batch
+        Accepts a list of URLs and runs the /process pipeline over all of
+        them with separate scrape and LLM concurrency limits, processing
+        duplicate URLs and duplicate articles once. Streams one "result"
+        per URL as it finishes, then a "summary" (SSE, or NDJSON as for
+        /process/stream).
+
+    POST /jobs
+        Queues a URL for background processing and returns its job ID at
+        once (see `app.modules.jobs`).
+
+    GET /jobs/stats
+        Reports job counts by status, queue lag and the checkpointer in use.
+
+    GET /jobs/{job_id}
+        Reports a job's status, attempts, last error and timestamps.
+
+    GET /jobs/{job_id}/result
+        Returns the /process payload of a finished job (202 while it is
+        still queued or running, 404 for an unknown job).
+
     POST /chat
         Accepts a user query, searches stored vector data in Pinecone, and queries an LLM
         to produce a contextual answer.
 
+    POST /chat/stream
+        Same as /chat, but streams Server-Sent Events: "sources" (ids and
+        scores of the retrieved chunks) first, then one "token" per LLM
+        text delta, then "done" with the full answer, or "error". If the
+        client disconnects, the upstream generation is aborted.
+
+    GET /cache/stats
+        Reports hit/miss counters and entry counts of the result and page caches.
+
+    GET /extractor/stats
+        Reports per-domain attempts, win rates and average run times of each
+        article extraction method.
+
+    GET /embeddings/stats
+        Reports batch sizes and queue latency of the shared embedding service,
+        and the hit rates of its embedding cache.
+
+    GET /vectors/stats
+        Reports upsert and retry counters of the vector write pipeline, the
+        backlog and lag of the write-behind indexing queue, and how many
+        chunks the index manifest let through or skipped.
+
+    GET /llm/stats
+        Reports per-model Groq limits, calls in flight and queued, time
+        spent waiting for admission, rate-limit, retry and cache-hit
+        counters, and the hit rate and size of the LLM response cache.
+
+    GET /resources
+        Reports startup time and which shared models/clients are loaded,
+        with their load times.
+
 Core Components:
     - run_scraper_pipeline: Extracts and cleans article text, then identifies keywords.
     - run_langgraph_workflow: Executes the LangGraph pipeline for deep content analysis.
-    - check_bias: Scores and analyzes potential bias in article content.
+    - run_bias_detection: Scores and analyzes potential bias in article content.
     - search_pinecone: Retrieves relevant RAG data for a given query.
     - ask_llm: Generates a natural language answer using retrieved context.
+
+Concurrent requests for the same URL (scraping) or the same article hash
+(bias scoring, LangGraph run) are coalesced through `SingleFlight`, so a
+burst of identical submissions triggers a single computation whose result
+is shared by every waiting request.
 """
 
 
-from fastapi import APIRouter
-from pydantic import BaseModel
+from contextlib import aclosing
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 from app.modules.pipeline import run_scraper_pipeline
 from app.modules.pipeline import run_langgraph_workflow
-from app.modules.bias_detection.check_bias import check_bias
+from app.modules.pipeline import run_bias_detection
+from app.modules.pipeline import cache_stats
+from app.modules.pipeline import article_key
+from app.modules.pipeline import stream_langgraph_workflow
+from app.modules.batch import process_batch, MAX_URLS
+from app.modules.jobs import job_queue
 from app.modules.chat.get_rag_data import search_pinecone
-from app.modules.chat.llm_processing import ask_llm
+from app.modules.chat.llm_processing import ask_llm, stream_llm
+from app.modules.scraper import strategy_stats
+from app.modules.vector_store.embedding_service import embedding_service
+from app.modules.vector_store.write_behind import write_behind
+from app.modules.vector_store.index_manifest import index_manifest
+from app.utils.store_vectors import upsert_stats
+from app.utils.cache import normalize_url
+from app.utils.streaming import event_stream, wants_ndjson
+from app.utils.single_flight import SingleFlight
+from app.utils.resources import resources
+from app.utils.llm_gateway import llm_gateway
 from app.logging.logging_config import setup_logger
 import asyncio
 import json
@@ -45,11 +127,38 @@ logger = setup_logger(__name__)
 
 router = APIRouter()
 
+_scrape_flight = SingleFlight("scrape")
+_workflow_flight = SingleFlight("workflow")
+_bias_flight = SingleFlight("bias")
+
+
+async def _coalesced(flight: SingleFlight, key, fn, arg):
+    """Await `fn(arg)`, sharing the call with identical concurrent callers."""
+    if not key:
+        return await fn(arg)
+    return await flight.do(key, fn, arg)
+
+
+async def _scrape(url: str) -> dict:
+    return await _coalesced(
+        _scrape_flight, normalize_url(url), run_scraper_pipeline, url
+    )
+
+
+async def _analyse(article: dict) -> dict:
+    return await _coalesced(
+        _workflow_flight, article_key(article), run_langgraph_workflow, article
+    )
+
 
 class URlRequest(BaseModel):
     url: str
 
 
+class BatchRequest(BaseModel):
+    urls: list[str] = Field(min_length=1, max_length=MAX_URLS)
+
+
 class ChatQuery(BaseModel):
     message: str
 
@@ -61,25 +170,141 @@ async def home():
 
 @router.post("/bias")
 async def bias_detection(request: URlRequest):
-    content = await asyncio.to_thread(run_scraper_pipeline, (request.url))
-    bias_score = await asyncio.to_thread(check_bias, (content))
+    content = await _scrape(request.url)
+    bias_score = await _coalesced(
+        _bias_flight, article_key(content), run_bias_detection, content
+    )
     logger.info(f"Bias detection result: {bias_score}")
     return bias_score
 
 
 @router.post("/process")
 async def run_pipelines(request: URlRequest):
-    article_text = await asyncio.to_thread(run_scraper_pipeline, (request.url))
+    article_text = await _scrape(request.url)
     logger.debug(f"Scraper output: {json.dumps(article_text, indent=2, ensure_ascii=False)}")
-    data = await asyncio.to_thread(run_langgraph_workflow, (article_text))
+    data = await _analyse(article_text)
     return data
 
 
+@router.post("/process/stream")
+async def stream_pipelines(request: URlRequest, http_request: Request, format: str = None):
+    async def events():
+        try:
+            article_text = await _scrape(request.url)
+            yield "scrape", article_text
+            async for event in stream_langgraph_workflow(article_text):
+                yield event
+        except Exception as e:
+            logger.exception(f"Streaming pipeline failed: {e}")
+            yield "error", {"status": "error", "message": str(e)}
+
+    return event_stream(events(), wants_ndjson(http_request, format))
+
+
+@router.post("/process/batch")
+async def run_batch(request: BatchRequest, http_request: Request, format: str = None):
+    events = process_batch(request.urls, scrape=_scrape, analyse=_analyse)
+    return event_stream(events, wants_ndjson(http_request, format))
+
+
+@router.post("/jobs")
+async def submit_job(request: URlRequest):
+    return await job_queue.submit(request.url)
+
+
+@router.get("/jobs/stats")
+async def get_job_stats():
+    return await asyncio.to_thread(job_queue.stats)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        return JSONResponse({"status": "error", "message": "Unknown job"}, status_code=404)
+    return job
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = await asyncio.to_thread(job_queue.get, job_id, True)
+    if job is None:
+        return JSONResponse({"status": "error", "message": "Unknown job"}, status_code=404)
+    if job["status"] in ("queued", "running"):
+        return JSONResponse({"job_id": job_id, "status": job["status"]}, status_code=202)
+    if job["status"] == "failed":
+        return {"job_id": job_id, "status": "failed", "error": job["error"], "result": job["result"]}
+    return job["result"]
+
+
 @router.post("/chat")
 async def answer_query(request: ChatQuery):
     query = request.message
-    results = search_pinecone(query)
-    answer = ask_llm(query, results)
+    results = await search_pinecone(query)
+    answer = await ask_llm(query, results)
     logger.info(f"Chat answer generated: {answer}")
 
     return {"answer": answer}
+
+
+@router.post("/chat/stream")
+async def stream_answer(request: ChatQuery):
+    async def events():
+        try:
+            results = await search_pinecone(request.message)
+            yield "sources", [{"id": m["id"], "score": m["score"]} for m in results]
+            answer = []
+            async with aclosing(stream_llm(request.message, results)) as tokens:
+                async for token in tokens:
+                    answer.append(token)
+                    yield "token", {"text": token}
+            logger.info(f"Chat answer streamed: {''.join(answer)}")
+            yield "done", {"answer": "".join(answer)}
+        except Exception as e:
+            logger.exception(f"Streaming chat failed: {e}")
+            yield "error", {"status": "error", "message": str(e)}
+
+    return event_stream(events(), ndjson=False)
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return await asyncio.to_thread(cache_stats)
+
+
+@router.get("/extractor/stats")
+async def get_extractor_stats():
+    # snapshot() re-reads the shared SQLite routing table.
+    return await asyncio.to_thread(strategy_stats.snapshot)
+
+
+@router.get("/embeddings/stats")
+async def get_embedding_stats():
+    return await asyncio.to_thread(embedding_service.stats)
+
+
+@router.get("/vectors/stats")
+async def get_vector_stats():
+    def stats():
+        return {
+            "upserts": upsert_stats(),
+            "write_behind": write_behind.stats(),
+            "manifest": index_manifest.stats() if index_manifest is not None else None,
+        }
+
+    # The queue and manifest counts are SQLite queries.
+    return await asyncio.to_thread(stats)
+
+
+@router.get("/llm/stats")
+async def get_llm_stats():
+    return await asyncio.to_thread(llm_gateway.stats)
+
+
+@router.get("/resources")
+async def get_resources(request: Request):
+    return {
+        "startup_seconds": getattr(request.app.state, "startup_seconds", None),
+        "warmup": getattr(request.app.state, "warmup", None),
+        "resources": resources.stats(),
+    }
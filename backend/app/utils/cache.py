@@ -0,0 +1,397 @@
+"""
+cache.py
+--------
+Small key/value cache with TTL expiry, LRU eviction and pluggable storage,
+used to memoise expensive pipeline results (scraping, LangGraph runs,
+bias scores) so repeat requests for the same article cost no LLM or
+search calls.
+
+Values are pickled before they are handed to a backend, so every backend
+behaves the same way and callers always receive an independent copy they
+are free to mutate.
+
+Backends:
+    MemoryCacheBackend
+        Thread-safe in-process LRU built on an `OrderedDict`.
+    SQLiteCacheBackend
+        On-disk LRU stored in a single SQLite file, shared by several
+        namespaces and surviving restarts. The file is opened on first
+        use, so building a cache at import time touches no disk.
+
+Classes:
+    TTLCache
+        Wraps a backend for one namespace, applies the TTL and keeps
+        hit/miss counters. `aget`/`aset` run the backend in a worker
+        thread, so async code never blocks the event loop on SQLite.
+
+Functions:
+    normalize_url(url: str) -> str
+        Canonicalises a URL so trivially different spellings of the same
+        article share a cache entry.
+
+    create_backend(kind, path, max_entries, max_bytes)
+        Instantiates a "memory" or "sqlite" backend.
+
+    build_cache(namespace: str) -> TTLCache
+        Creates a cache for `namespace` configured from environment variables.
+
+Environment Variables:
+    RESULT_CACHE_BACKEND (str): "memory" (default) or "sqlite".
+    RESULT_CACHE_PATH (str): SQLite file used by the "sqlite" backend.
+    RESULT_CACHE_TTL (int): Entry lifetime in seconds (default 21600).
+    RESULT_CACHE_MAX_ENTRIES (int): Entries kept per namespace (default 1024).
+    RESULT_CACHE_MAX_BYTES (int): Optional cap on stored bytes per namespace.
+"""
+
+
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# Query parameters that only carry tracking information and never change
+# the article that is served.
+_TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "ref",
+    "ref_src",
+}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonicalise a URL for use as a cache key.
+
+    Lower-cases the scheme and host, drops default ports, fragments,
+    trailing slashes and tracking parameters (``utm_*``, ``fbclid``...),
+    and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_")
+            and key.lower() not in _TRACKING_PARAMS
+        )
+    )
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+class MemoryCacheBackend:
+    """In-process LRU storage. Entries are lost when the worker exits."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._namespaces: Dict[str, "OrderedDict[str, Tuple[bytes, float]]"] = {}
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if not entries or key not in entries:
+                return None
+            entries.move_to_end(key)
+            return entries[key]
+
+    def set(self, namespace: str, key: str, value: bytes, expires_at: float) -> None:
+        with self._lock:
+            entries = self._namespaces.setdefault(namespace, OrderedDict())
+            self._discard(namespace, key)
+            entries[key] = (value, expires_at)
+            self._sizes[namespace] = self._sizes.get(namespace, 0) + len(value)
+
+            while entries and (
+                len(entries) > self.max_entries
+                or (self.max_bytes is not None and self._sizes[namespace] > self.max_bytes)
+            ):
+                self._discard(namespace, next(iter(entries)))
+
+    def _discard(self, namespace: str, key: str) -> None:
+        entry = self._namespaces.get(namespace, {}).pop(key, None)
+        if entry is not None:
+            self._sizes[namespace] -= len(entry[0])
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._discard(namespace, key)
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+            self._sizes.pop(namespace, None)
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            return len(self._namespaces.get(namespace, {}))
+
+    def size_bytes(self, namespace: str) -> int:
+        with self._lock:
+            return self._sizes.get(namespace, 0)
+
+
+class SQLiteCacheBackend:
+    """On-disk LRU storage backed by a single SQLite table."""
+
+    def __init__(
+        self, path: str, max_entries: int = 1024, max_bytes: Optional[int] = None
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        """The cache database, opened on first use (caller holds `_lock`)."""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_lru "
+                "ON cache_entries (namespace, last_access)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _unused(self) -> bool:
+        """True if nothing was ever stored (no need to create the file)."""
+        return self._conn is None and not os.path.exists(self.path)
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            conn = self._db()
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries "
+                "WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE cache_entries SET last_access = ? "
+                    "WHERE namespace = ? AND key = ?",
+                    (time.time(), namespace, key),
+                )
+                conn.commit()
+            return row
+
+    def set(self, namespace: str, key: str, value: bytes, expires_at: float) -> None:
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries "
+                "(namespace, key, value, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, sqlite3.Binary(value), expires_at, time.time()),
+            )
+            conn.execute(
+                """
+                DELETE FROM cache_entries
+                WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (namespace, namespace, self.max_entries),
+            )
+            if self.max_bytes is not None:
+                # Drop least recently used entries beyond the byte budget.
+                conn.execute(
+                    """
+                    DELETE FROM cache_entries
+                    WHERE namespace = ? AND key IN (
+                        SELECT key FROM (
+                            SELECT key, SUM(LENGTH(value)) OVER (
+                                ORDER BY last_access DESC, rowid DESC
+                            ) AS running_bytes
+                            FROM cache_entries WHERE namespace = ?
+                        )
+                        WHERE running_bytes > ?
+                    )
+                    """,
+                    (namespace, namespace, self.max_bytes),
+                )
+            conn.commit()
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+            conn.commit()
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ?", (namespace,)
+            )
+            conn.commit()
+
+    def count(self, namespace: str) -> int:
+        if self._unused():
+            return 0
+        with self._lock:
+            conn = self._db()
+            (total,) = conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+                (namespace,),
+            ).fetchone()
+            return total
+
+    def size_bytes(self, namespace: str) -> int:
+        if self._unused():
+            return 0
+        with self._lock:
+            conn = self._db()
+            (total,) = conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(value)), 0) FROM cache_entries "
+                "WHERE namespace = ?",
+                (namespace,),
+            ).fetchone()
+            return total
+
+
+class TTLCache:
+    """
+    Namespaced view over a cache backend with TTL expiry and hit/miss counters.
+
+    Args:
+        namespace (str): Logical name separating this cache's keys from others
+            sharing the same backend.
+        backend: A `MemoryCacheBackend` or `SQLiteCacheBackend`.
+        ttl (float): Seconds an entry stays valid after it is written.
+    """
+
+    def __init__(self, namespace: str, backend, ttl: float):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.backend.get(self.namespace, key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.time():
+                self._count(hit=True)
+                return pickle.loads(value)
+            self.backend.delete(self.namespace, key)
+
+        self._count(hit=False)
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Value for '{self.namespace}:{key}' is not cacheable: {e}")
+            return
+        self.backend.set(self.namespace, key, payload, time.time() + self.ttl)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(self.namespace, key)
+
+    def clear(self) -> None:
+        self.backend.clear(self.namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": self.backend.count(self.namespace),
+            "bytes": self.backend.size_bytes(self.namespace),
+        }
+
+
+_BACKENDS: Dict[str, Any] = {}
+_BACKENDS_LOCK = threading.Lock()
+
+
+def create_backend(
+    kind: str, path: str, max_entries: int, max_bytes: Optional[int] = None
+):
+    """Instantiate a "memory" or "sqlite" cache backend."""
+    if kind == "sqlite":
+        backend = SQLiteCacheBackend(path, max_entries=max_entries, max_bytes=max_bytes)
+    elif kind == "memory":
+        backend = MemoryCacheBackend(max_entries=max_entries, max_bytes=max_bytes)
+    else:
+        raise ValueError(f"Unknown cache backend: {kind}")
+    logger.info(f"Initialised '{kind}' cache backend")
+    return backend
+
+
+def _get_backend(kind: str):
+    with _BACKENDS_LOCK:
+        if kind not in _BACKENDS:
+            max_bytes = os.getenv("RESULT_CACHE_MAX_BYTES")
+            _BACKENDS[kind] = create_backend(
+                kind,
+                path=os.getenv("RESULT_CACHE_PATH", ".cache/results.sqlite3"),
+                max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")),
+                max_bytes=int(max_bytes) if max_bytes else None,
+            )
+        return _BACKENDS[kind]
+
+
+def build_cache(namespace: str) -> TTLCache:
+    """Create a `TTLCache` for `namespace` using the configured backend."""
+    backend = _get_backend(os.getenv("RESULT_CACHE_BACKEND", "memory").lower())
+    ttl = float(os.getenv("RESULT_CACHE_TTL", "21600"))
+    return TTLCache(namespace, backend, ttl)
@@ -11,40 +11,83 @@ Pipeline Steps:
           provided article state.
         - Claims are parsed from markdown-like bullet point output.
 
-    2. Web Search:
-        - For each extracted claim, executes a Google search via `search_google` to find
-          relevant supporting or refuting sources.
-        - Stores the top search result along with the associated claim.
-        - Implements basic error handling and skips claims with no search results.
-
-    3. Fact Verification:
-        - Passes search results to `run_fact_verifier_sdk` for LLM-based evaluation.
-        - Produces verdicts and explanations for each claim.
+    2. Web Search and Fact Verification (per claim, concurrently):
+        - Executes a Google search via `search_google` to find relevant
+          supporting or refuting sources, keeping the top result.
+        - Passes that result straight to `verify_claim` for LLM-based
+          evaluation, producing a verdict and explanation.
+        - Claims are processed concurrently on the event loop, at most
+          `FACT_CHECK_CONCURRENCY` at a time, so latency tracks the slowest
+          claim rather than the sum of all of them.
+        - Results keep the order of the extracted claims; a claim whose
+          search or verification fails is logged and skipped.
+        - As before, the step fails only when no claim found a search
+          result. If results were found but every verification failed, it
+          logs that and returns no facts without an error.
+        - When the graph is streamed, each verification is also emitted as
+          a custom "fact" stream event the moment it completes.
 
 Returns:
     - A list of verification objects containing verdicts, reasoning, and source metadata.
     - An error message if the process fails at any stage.
 
 Usage:
-    final_results, error = run_fact_check_pipeline(state)
+    final_results, error = await run_fact_check_pipeline(state)
 """
 
 
 from app.modules.facts_check.web_search import search_google
 from app.modules.facts_check.llm_processing import (
+    FACT_CHECK_CONCURRENCY,
     run_claim_extractor_sdk,
-    run_fact_verifier_sdk,
+    verify_claim,
 )
 from app.logging.logging_config import setup_logger
+from langgraph.config import get_stream_writer
+import asyncio
 import re
 
 logger = setup_logger(__name__)
 
 
-def run_fact_check_pipeline(state):
-    result = run_claim_extractor_sdk(state)
+async def _check_claim(claim):
+    """
+    Search for and verify one claim. Returns (found, verification): whether
+    a search result was found, and the verification or None if it failed.
+    """
+    logger.info(f"\n🔍 Searching for claim: {claim}")
+    try:
+        results = await search_google(claim)
+    except Exception as e:
+        logger.error(f"❌ Search failed for: {claim} -> {e}")
+        return False, None
+
+    if not results:
+        logger.warning(f"⚠️ No search result for: {claim}")
+        return False, None
+
+    results[0]["claim"] = claim
+    logger.info(f"✅ Found result: {results[0]['title']}")
+
+    try:
+        return True, await verify_claim(results[0])
+    except Exception as e:
+        logger.error(f"❌ Verification failed for: {claim} -> {e}")
+        return True, None
+
+
+def _stream_writer():
+    """The LangGraph custom-stream writer, or a no-op outside a graph run."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda _: None
 
-    if state.get("status") != "success":
+
+async def run_fact_check_pipeline(state):
+    result = await run_claim_extractor_sdk(state)
+
+    if result.get("status") != "success":
         logger.error("❌ Claim extraction failed.")
         return [], "Claim extraction failed."
 
@@ -57,24 +100,26 @@ def run_fact_check_pipeline(state):
     if not claims:
         return [], "No verifiable claims found."
 
-    # Step 2: Search each claim with polite delay
-    search_results = []
-    for claim in claims:
-        logger.info(f"\n🔍 Searching for claim: {claim}")
-        try:
-            results = search_google(claim)
-            if results:
-                results[0]["claim"] = claim
-                search_results.append(results[0])
-                logger.info(f"✅ Found result: {results[0]['title']}")
-            else:
-                logger.warning(f"⚠️ No search result for: {claim}")
-        except Exception as e:
-            logger.error(f"❌ Search failed for: {claim} -> {e}")
-
-    if not search_results:
+    # Step 2: Search and verify every claim concurrently
+    semaphore = asyncio.Semaphore(FACT_CHECK_CONCURRENCY)
+    writer = _stream_writer()
+
+    async def bounded_check(index, claim):
+        async with semaphore:
+            found, verification = await _check_claim(claim)
+        if verification is not None:
+            writer({"type": "fact", "index": index, "fact": verification})
+        return found, verification
+
+    checked = await asyncio.gather(
+        *(bounded_check(i, claim) for i, claim in enumerate(claims))
+    )
+
+    if not any(found for found, _ in checked):
         return [], "All claim searches failed or returned no results."
 
-    # Step 3: Verify facts using LLM
-    final = run_fact_verifier_sdk(search_results)
-    return final.get("verifications", []), None
+    verifications = [v for _, v in checked if v is not None]
+    if not verifications:
+        logger.error("❌ Every claim verification failed; returning no facts.")
+
+    return verifications, None
@@ -0,0 +1,109 @@
+"""
+http_client.py
+--------------
+Process-wide asynchronous HTTP client shared by every module that talks to
+the web (article scraping, Google Custom Search).
+
+A single pooled `httpx.AsyncClient` keeps connections alive between
+requests, caps the total and per-host number of open connections, and
+negotiates compressed responses (gzip/deflate, plus brotli and zstd via
+the `httpx[brotli,zstd]` extras), so one worker can keep many outbound
+requests in flight without hammering any single publisher.
+
+Functions:
+    get_http_client() -> httpx.AsyncClient
+        Returns the shared client, creating it on first use.
+
+    fetch(url: str, **kwargs) -> httpx.Response
+        Sends a GET through the shared client while respecting the
+        per-host connection limit.
+
+    close_http_client() -> None
+        Closes the shared client; called on application shutdown.
+
+Environment Variables:
+    HTTP_CONNECT_TIMEOUT (float): Seconds to establish a connection (default 5).
+    HTTP_READ_TIMEOUT (float): Seconds to wait for response data (default 10).
+    HTTP_MAX_CONNECTIONS (int): Open connections across all hosts (default 100).
+    HTTP_MAX_KEEPALIVE (int): Idle keep-alive connections retained (default 20).
+    HTTP_MAX_PER_HOST (int): Concurrent requests to a single host (default 6).
+    HTTP_HOST_LIMITS_MAX (int): Hosts whose per-host limiter is kept
+        (default 1024). Least recently used idle hosts are dropped beyond
+        that; a host with requests in flight or waiting is never dropped.
+"""
+
+
+import asyncio
+import os
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import httpx
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+        " AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/113.0 Safari/537.36"
+    )
+}
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "6"))
+HOST_LIMITS_MAX = int(os.getenv("HTTP_HOST_LIMITS_MAX", "1024"))
+
+_client = None
+# host -> [semaphore, requests holding or waiting for it], in LRU order.
+_host_limits: "OrderedDict[str, list]" = OrderedDict()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE,
+            ),
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def fetch(url: str, **kwargs) -> httpx.Response:
+    """GET `url` with at most `HTTP_MAX_PER_HOST` concurrent requests per host."""
+    host = urlsplit(url).netloc.lower()
+    entry = _host_limit(host)
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            return await get_http_client().get(url, **kwargs)
+    finally:
+        entry[1] -= 1
+
+
+def _host_limit(host: str) -> list:
+    """The limiter entry of `host`, evicting idle hosts beyond HOST_LIMITS_MAX."""
+    entry = _host_limits.get(host)
+    if entry is not None:
+        _host_limits.move_to_end(host)
+        return entry
+    entry = _host_limits[host] = [asyncio.Semaphore(MAX_PER_HOST), 0]
+    if len(_host_limits) > HOST_LIMITS_MAX:
+        for stale in [h for h, (_, users) in _host_limits.items() if users == 0 and h != host]:
+            del _host_limits[stale]
+            if len(_host_limits) <= HOST_LIMITS_MAX:
+                break
+    return entry
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_limits.clear()
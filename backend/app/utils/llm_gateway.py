@@ -0,0 +1,513 @@
+"""
+llm_gateway.py
+--------------
+Central gateway for every Groq chat completion, so the sentiment, bias,
+claim extraction, claim verification, perspective, judge and chat calls
+share one view of the provider's rate limits instead of each failing on
+its own 429s.
+
+Every model gets two token buckets, one for requests per minute and one
+for tokens per minute, plus a cap on calls in flight. A call reserves one
+request and its estimated tokens (prompt characters / 4 plus `max_tokens`)
+before it is sent. Once the response arrives, the reservation is
+corrected to the `usage` the API reports. A call that does not fit waits
+in a queue; it is not rejected. Waiting calls are admitted strictly by
+priority and then in arrival order. "interactive" calls (chat) go ahead
+of "bulk" calls (the article pipeline).
+
+A 429 pauses the whole model until the `Retry-After` delay (or the
+`x-ratelimit-reset-*` headers) has passed, and then the call is retried
+at the front of its priority class. Connection errors, timeouts and 5xx
+responses are retried with exponential backoff and full jitter. The
+shared Groq client's own retries are disabled so these are the only ones.
+
+Completions are cached in front of all of this (`LLM_CACHE_*`, SQLite by
+default, so entries survive restarts). The key covers the model, the
+messages, temperature, max_tokens and every other request parameter
+(tools, response format...). A resubmitted article's sentiment, bias,
+claim and judge calls are therefore served without a paid call or a slot
+in the rate limits. Identical concurrent calls share one request. Calls
+whose output is meant to vary (e.g. `generate_perspective` at
+temperature 0.7, chat answers) opt out with `cache=False`. Streamed calls
+are never cached. Callers that parse the response pass `validate`: a
+response it rejects (e.g. invalid JSON) is returned but not cached, and a
+cached entry it rejects is dropped and fetched again. Cache reads and
+writes run in a worker thread, off the event loop.
+
+Classes:
+    TokenBucket
+        Continuously refilling budget of `per_minute` units.
+
+    LLMGateway
+        Per-model admission control and retries around the shared
+        AsyncGroq client.
+
+Attributes:
+    llm_gateway (LLMGateway): The shared gateway.
+
+Usage:
+    completion = await llm_gateway.chat(model="gemma2-9b-it", messages=[...])
+    stream = await llm_gateway.chat(priority="interactive", stream=True, ...)
+    answer = await llm_gateway.chat(cache=False, ...)  # never served from cache
+    verdict = await llm_gateway.chat(validate=is_json, ...)  # cache parseable replies only
+
+    # LangChain: route ChatGroq through the gateway.
+    ChatGroq(model=..., async_client=llm_gateway.completions("bulk"))
+    ChatGroq(..., async_client=llm_gateway.completions("bulk", validate=has_score))
+
+Environment Variables:
+    GROQ_RATE_LIMITS (str): Per-model limits as
+        "model=rpm:tpm[:concurrency],..." (defaults: Groq's published
+        limits for the models used here).
+    GROQ_DEFAULT_RPM (int): Requests per minute of other models (default 30).
+    GROQ_DEFAULT_TPM (int): Tokens per minute of other models (default 6000).
+    GROQ_MAX_CONCURRENCY (int): Calls in flight per model (default 8).
+    GROQ_RETRIES (int): Retries of a rate-limited or failed call (default 5).
+    GROQ_BACKOFF_SECONDS (float): Base backoff without `Retry-After`
+        (default 1).
+    GROQ_BACKOFF_MAX_SECONDS (float): Backoff cap (default 30).
+    LLM_CACHE (bool): Set to 0 to disable the response cache (default 1).
+    LLM_CACHE_BACKEND (str): "sqlite" (default) or "memory".
+    LLM_CACHE_PATH (str): SQLite file of the cache (default ".cache/llm.sqlite3").
+    LLM_CACHE_TTL (int): Seconds a response is reused (default 7 days).
+    LLM_CACHE_MAX_ENTRIES (int): Responses kept before LRU eviction
+        (default 50000).
+    LLM_CACHE_MAX_BYTES (int): Stored bytes before LRU eviction
+        (default 64 MiB).
+"""
+
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+from app.utils.cache import TTLCache, create_backend
+from app.utils.resources import resources
+from app.utils.single_flight import SingleFlight
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+PRIORITIES = {"interactive": 0, "bulk": 1}
+
+DEFAULT_RPM = int(os.getenv("GROQ_DEFAULT_RPM", "30"))
+DEFAULT_TPM = int(os.getenv("GROQ_DEFAULT_TPM", "6000"))
+MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+RETRIES = int(os.getenv("GROQ_RETRIES", "5"))
+BACKOFF_SECONDS = float(os.getenv("GROQ_BACKOFF_SECONDS", "1"))
+BACKOFF_MAX_SECONDS = float(os.getenv("GROQ_BACKOFF_MAX_SECONDS", "30"))
+
+# Groq's published free-tier limits (requests/min, tokens/min).
+_DEFAULT_LIMITS = {
+    "gemma2-9b-it": (30, 15000),
+    "llama-3.3-70b-versatile": (30, 12000),
+}
+
+_RETRYABLE_STATUS = {408, 409, 500, 502, 503, 504}
+# Tokens reserved for the completion when a call sets no `max_tokens`.
+_DEFAULT_COMPLETION_TOKENS = 1024
+
+
+def _parse_limits(spec: str) -> Dict[str, tuple]:
+    limits = {model: (rpm, tpm, MAX_CONCURRENCY) for model, (rpm, tpm) in _DEFAULT_LIMITS.items()}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, values = item.partition("=")
+        numbers = [int(value) for value in values.split(":")]
+        if len(numbers) not in (2, 3):
+            raise ValueError(f"Invalid GROQ_RATE_LIMITS entry: {item!r}")
+        limits[model.strip()] = (numbers[0], numbers[1], numbers[2] if len(numbers) == 3 else MAX_CONCURRENCY)
+    return limits
+
+
+def _estimate_tokens(params: Dict[str, Any]) -> int:
+    chars = 0
+    for message in params.get("messages") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            chars += len(content)
+    completion = params.get("max_tokens") or params.get("max_completion_tokens")
+    return chars // 4 + (completion or _DEFAULT_COMPLETION_TOKENS)
+
+
+def _duration(value: str) -> Optional[float]:
+    """Seconds in a Groq reset header ("7.66s", "2m59.56s", "120ms")."""
+    total, matched = 0.0, False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+        matched = True
+    return total if matched else None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Delay the provider asked for, from the 429 response headers."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    resets = [
+        _duration(headers.get(name, ""))
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+
+def _cache_key(params: Dict[str, Any]) -> str:
+    request = {name: value for name, value in params.items() if name != "stream"}
+    payload = json.dumps(request, sort_keys=True, default=str)
+    return f"{params.get('model')}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def _accepts(validate: Optional[Callable[[Any], bool]], response: Any) -> bool:
+    if validate is None:
+        return True
+    try:
+        return bool(validate(response))
+    except Exception:
+        return False
+
+
+def _status(error: Exception) -> Optional[int]:
+    return getattr(error, "status_code", None)
+
+
+def _is_transient(error: Exception) -> bool:
+    status = _status(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+    # groq.APIConnectionError / APITimeoutError carry no status.
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError") or isinstance(
+        error, (OSError, asyncio.TimeoutError)
+    )
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (capped at a full bucket)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate else 0.0
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        # May go negative after a correction; later calls then wait longer.
+        self.level -= amount
+
+    def refund(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _ModelLimiter:
+    def __init__(self, model: str, rpm: int, tpm: int, concurrency: int):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._waiters: List[tuple] = []
+        self._changed: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Waiters and events belong to one event loop.
+            self._loop = loop
+            self._waiters = []
+            self._changed = asyncio.Event()
+            self.in_flight = 0
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _delay(self, entry: tuple, tokens: int) -> Optional[float]:
+        """0 to admit `entry` now, seconds to wait, or None to wait for a change."""
+        if self._waiters[0] != entry or self.in_flight >= self.concurrency:
+            return None
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        return max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+
+    async def acquire(self, tokens: int, priority: int, seq: int) -> float:
+        """Wait for admission; returns the seconds spent queued."""
+        self._bind()
+        entry = (priority, seq)
+        heapq.heappush(self._waiters, entry)
+        started = time.monotonic()
+        try:
+            while True:
+                changed = self._changed
+                delay = self._delay(entry, tokens)
+                if delay == 0:
+                    break
+                try:
+                    await asyncio.wait_for(changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self._notify()
+            raise
+        heapq.heappop(self._waiters)
+        now = time.monotonic()
+        self.requests.take(1, now)
+        self.tokens.take(tokens, now)
+        self.in_flight += 1
+        self._notify()
+        return now - started
+
+    def release(self, reserved: int, used: Optional[int]) -> None:
+        if used is not None:
+            # Give back (or charge) the difference to the reported usage.
+            self.tokens.refund(reserved - used, time.monotonic())
+        self.in_flight -= 1
+        self._notify()
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self._notify()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+
+class _GovernedStream:
+    """A streamed completion that holds its concurrency slot until it ends."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def _done(self) -> None:
+        if self._release is not None:
+            self._release()
+            self._release = None
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        finally:
+            self._done()
+
+    async def close(self) -> None:
+        try:
+            await self._stream.close()
+        finally:
+            self._done()
+
+
+class _Completions:
+    """`chat.completions`-compatible object for LangChain's `async_client`."""
+
+    def __init__(
+        self,
+        gateway: "LLMGateway",
+        priority: str,
+        cache: bool,
+        validate: Optional[Callable[[Any], bool]],
+    ):
+        self._gateway = gateway
+        self._priority = priority
+        self._cache = cache
+        self._validate = validate
+
+    async def create(self, **params):
+        return await self._gateway.chat(
+            priority=self._priority, cache=self._cache, validate=self._validate, **params
+        )
+
+
+class LLMGateway:
+    def __init__(self, limits: Dict[str, tuple], retries: int, cache: Optional[TTLCache] = None):
+        self.limits = limits
+        self.retries = retries
+        self.cache = cache
+        self._flight = SingleFlight("llm")
+        self._limiters: Dict[str, _ModelLimiter] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    def _limiter(self, model: str) -> _ModelLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            rpm, tpm, concurrency = self.limits.get(model, (DEFAULT_RPM, DEFAULT_TPM, MAX_CONCURRENCY))
+            limiter = self._limiters[model] = _ModelLimiter(model, rpm, tpm, concurrency)
+        return limiter
+
+    def _count(self, model: str, **increments) -> None:
+        with self._lock:
+            metrics = self._metrics.setdefault(
+                model,
+                {"calls": 0, "cache_hits": 0, "tokens": 0, "rate_limited": 0, "retries": 0, "failures": 0, "wait_seconds": 0.0},
+            )
+            for name, value in increments.items():
+                metrics[name] += value
+
+    def completions(
+        self, priority: str = "bulk", cache: bool = True, validate: Optional[Callable[[Any], bool]] = None
+    ) -> _Completions:
+        return _Completions(self, priority, cache, validate)
+
+    async def chat(
+        self,
+        priority: str = "bulk",
+        cache: bool = True,
+        validate: Optional[Callable[[Any], bool]] = None,
+        **params,
+    ):
+        """
+        `chat.completions.create(**params)` through the response cache
+        (unless `cache` is False or the call streams) and the model's rate
+        limits. Only responses accepted by `validate` (all, if None) are
+        cached or served from the cache.
+
+        Raises:
+            ValueError: If `priority` is unknown.
+            groq.APIError: If the call still fails after its retries, or
+                fails with a non-retryable error.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        if not cache or self.cache is None or params.get("stream"):
+            return await self._call(priority, params)
+
+        key = _cache_key(params)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            if _accepts(validate, cached):
+                self._count(params.get("model"), cache_hits=1)
+                return cached
+            logger.warning(f"Dropping cached {params.get('model')} response rejected by its caller")
+            await asyncio.to_thread(self.cache.delete, key)
+        return await self._flight.do(key, self._call_and_cache, key, priority, params, validate)
+
+    async def _call_and_cache(
+        self, key: str, priority: str, params: Dict[str, Any], validate: Optional[Callable[[Any], bool]]
+    ):
+        response = await self._call(priority, params)
+        if _accepts(validate, response):
+            await asyncio.to_thread(self.cache.set, key, response)
+        return response
+
+    async def _call(self, priority: str, params: Dict[str, Any]):
+        model = params.get("model")
+        limiter = self._limiter(model)
+        tokens = _estimate_tokens(params)
+        # Keep the first sequence number across retries, so a retried call
+        # stays ahead of calls that arrived after it.
+        seq = next(self._seq)
+        client = resources.get("groq")
+
+        for attempt in range(self.retries + 1):
+            waited = await limiter.acquire(tokens, PRIORITIES[priority], seq)
+            self._count(model, wait_seconds=waited)
+            try:
+                response = await client.chat.completions.create(**params)
+            except BaseException as e:
+                limiter.release(tokens, None)
+                if not isinstance(e, Exception) or attempt == self.retries:
+                    if isinstance(e, Exception):
+                        self._count(model, failures=1)
+                    raise
+                if _status(e) == 429:
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2**attempt))
+                    # Every caller of this model waits, not just this one.
+                    limiter.pause(delay)
+                    self._count(model, rate_limited=1, retries=1)
+                    logger.warning(f"Groq rate limit on {model}; pausing it for {delay:.2f}s")
+                    continue
+                if not _is_transient(e):
+                    self._count(model, failures=1)
+                    raise
+                delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2**attempt))
+                self._count(model, retries=1)
+                logger.warning(
+                    f"Groq call to {model} failed ({e}); retry {attempt + 1}/{self.retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            if params.get("stream"):
+                self._count(model, calls=1, tokens=tokens)
+                return _GovernedStream(response, lambda: limiter.release(tokens, None))
+            usage = getattr(response, "usage", None)
+            used = getattr(usage, "total_tokens", None)
+            limiter.release(tokens, used)
+            self._count(model, calls=1, tokens=used if used is not None else tokens)
+            return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = {model: dict(values) for model, values in self._metrics.items()}
+        models = {}
+        for model in metrics.keys() | self._limiters.keys():
+            limiter = self._limiter(model)
+            values = metrics.get(model, {})
+            calls = values.get("calls", 0)
+            models[model] = {
+                "limits": {
+                    "rpm": int(limiter.requests.capacity),
+                    "tpm": int(limiter.tokens.capacity),
+                    "concurrency": limiter.concurrency,
+                },
+                "in_flight": limiter.in_flight,
+                "queued": limiter.queued,
+                "paused_seconds": round(max(0.0, limiter.paused_until - time.monotonic()), 3),
+                **{name: round(value, 3) for name, value in values.items()},
+                "avg_wait_seconds": round(values.get("wait_seconds", 0.0) / calls, 3) if calls else 0.0,
+            }
+        return {"models": models, "cache": self.cache.stats() if self.cache is not None else None}
+
+
+def _build_cache() -> Optional[TTLCache]:
+    if os.getenv("LLM_CACHE", "1").lower() in ("0", "false", "no"):
+        return None
+    backend = create_backend(
+        os.getenv("LLM_CACHE_BACKEND", "sqlite").lower(),
+        path=os.getenv("LLM_CACHE_PATH", ".cache/llm.sqlite3"),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000")),
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    )
+    return TTLCache("llm", backend, ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))))
+
+
+llm_gateway = LLMGateway(_parse_limits(os.getenv("GROQ_RATE_LIMITS", "")), RETRIES, _build_cache())
@@ -0,0 +1,147 @@
+"""
+resources.py
+------------
+Lazy, process-wide registry of expensive models and clients (embedding
+model, Groq clients, Pinecone connection, compiled LangGraph workflow).
+
+Nothing heavy happens at import time: modules register a factory under a
+name, and the factory runs exactly once, the first time the resource is
+requested or when `warmup()` is called from the FastAPI startup hook.
+Every module asking for the same name receives the same instance, so e.g.
+the SentenceTransformer model is loaded once for both chunk and query
+embedding.
+
+Classes:
+    ResourceRegistry
+        Named factories with thread-safe, at-most-once construction and
+        per-resource load timings.
+
+Attributes:
+    resources (ResourceRegistry): The shared registry. The "groq" resource
+        is registered here because several modules use it; other resources
+        are registered by the module that owns them (e.g. "embedder" in
+        `app.modules.vector_store.embedding_backends`).
+
+Usage:
+    @resources.register("judge_llm")
+    def _judge_llm():
+        return ChatGroq(model="gemma2-9b-it")
+
+    llm = resources.get("judge_llm")          # sync code / worker threads
+    index = await resources.aget("pinecone")  # async code, loads off-loop
+
+Environment Variables:
+    GROQ_API_KEY (str): API key used by the shared Groq client.
+"""
+
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+from dotenv import load_dotenv
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+load_dotenv()
+
+_MISSING = object()
+
+
+class ResourceRegistry:
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Optional[Callable[[], Any]] = None):
+        """
+        Register `factory` under `name`; usable as a decorator.
+
+        Registering a name twice keeps the first factory, so modules can
+        be re-imported safely.
+        """
+
+        def decorator(fn: Callable[[], Any]):
+            with self._lock:
+                if name not in self._factories:
+                    self._factories[name] = fn
+                    self._locks[name] = threading.Lock()
+            return fn
+
+        return decorator(factory) if factory is not None else decorator
+
+    def get(self, name: str) -> Any:
+        """Return the resource `name`, constructing it on first use."""
+        instance = self._instances.get(name, _MISSING)
+        if instance is not _MISSING:
+            return instance
+
+        if name not in self._factories:
+            raise KeyError(f"Unknown resource: {name}")
+
+        with self._locks[name]:
+            instance = self._instances.get(name, _MISSING)
+            if instance is _MISSING:
+                started = time.perf_counter()
+                instance = self._factories[name]()
+                elapsed = time.perf_counter() - started
+                self._instances[name] = instance
+                self._load_seconds[name] = elapsed
+                logger.info(f"Loaded resource '{name}' in {elapsed:.2f}s")
+        return instance
+
+    async def aget(self, name: str) -> Any:
+        """Like `get`, but constructs the resource in a worker thread."""
+        instance = self._instances.get(name, _MISSING)
+        if instance is not _MISSING:
+            return instance
+        return await asyncio.to_thread(self.get, name)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    async def warmup(self, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Construct the given (default: all registered) resources off the
+        event loop. Failures are logged and reported, not raised, so a
+        slow or unavailable dependency never prevents the API from serving.
+        """
+        started = time.perf_counter()
+        failures = {}
+        for name in list(names or self._factories):
+            try:
+                await self.aget(name)
+            except Exception as e:
+                logger.exception(f"Warmup of resource '{name}' failed: {e}")
+                failures[name] = str(e)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Resource warmup finished in {elapsed:.2f}s")
+        return {"seconds": round(elapsed, 3), "failures": failures}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "loaded": name in self._instances,
+                "load_seconds": round(self._load_seconds[name], 3)
+                if name in self._load_seconds
+                else None,
+            }
+            for name in self._factories
+        }
+
+
+resources = ResourceRegistry()
+
+
+@resources.register("groq")
+def _groq_client():
+    from groq import AsyncGroq
+
+    # Retries (and 429 backoff) are handled by `app.utils.llm_gateway`,
+    # which coordinates them across callers.
+    return AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), max_retries=0)
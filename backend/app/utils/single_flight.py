@@ -0,0 +1,70 @@
+"""
+single_flight.py
+----------------
+Request coalescing for concurrent, identical units of work.
+
+When many clients submit the same article at once, only the first caller
+for a given key starts the computation; every other caller awaits that
+same in-flight task and receives its result (or its exception). Once the
+task finishes the key is released, so later calls start fresh work (and
+typically hit the result cache instead).
+
+The shared task is shielded from cancellation: a client disconnecting
+mid-request only cancels its own wait, never the work other callers are
+waiting on.
+
+Classes:
+    SingleFlight
+        Keyed registry of in-flight asyncio tasks.
+
+Usage:
+    flight = SingleFlight("scrape")
+    result = await flight.do(key, run_scraper_pipeline, url)
+"""
+
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def do(
+        self, key: str, fn: Callable[..., Awaitable[Any]], *args: Any
+    ) -> Any:
+        """
+        Run `fn(*args)` once per `key` among concurrent callers.
+
+        Args:
+            key (str): Identity of the work, e.g. a normalized URL or article hash.
+            fn (Callable): Coroutine function performing the work.
+            *args: Positional arguments forwarded to `fn`.
+
+        Returns:
+            Any: The result of the (possibly shared) call.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+        else:
+            logger.info(f"Coalesced '{self.name}' request onto in-flight key: {key}")
+
+        return await asyncio.shield(task)
+
+    def _release(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every waiter has gone away.
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
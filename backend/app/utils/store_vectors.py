@@ -1,38 +1,134 @@
 """
 store_vectors.py
 ----------------
-Provides a utility for persisting vector embeddings into a Pinecone index.
+Write pipeline that persists vector embeddings into the configured vector
+index (Pinecone or the local index, see `app.db.vector_store`).
+
+Upserts are split into batches bounded by vector count and by approximate
+request size, and the batches are sent in parallel with bounded
+concurrency. A batch that fails with a transient error (connection
+errors, timeouts, HTTP 429 / 5xx) is retried with exponential backoff
+and full jitter. A failure no longer wastes the whole request: every other
+batch is still written, and the error names how many vectors were lost.
 
 Functions:
-    store(vectors: List[Dict[str, Any]], namespace: str = "default") -> None
-        - Validates and upserts a batch of vector embeddings into the 
-          configured Pinecone namespace.
+    async store(vectors: List[Dict[str, Any]], namespace: str = "default") -> None
+        - Validates and upserts vector embeddings into the given namespace
+          in size-bounded, parallel, retried batches.
         - Parameters:
             vectors: List of dictionaries containing 'id', 'values', and 'metadata'.
-            namespace: Target namespace in Pinecone (default is "default").
+            namespace: Target namespace (default is "default").
         - Raises:
             ValueError: If the vectors list is empty or malformed.
-            RuntimeError: If the upsert operation to Pinecone fails.
+            RuntimeError: If any batch still fails after its retries.
+
+    upsert_stats() -> Dict[str, int]
+        Upsert, retry and failed-batch counters.
+
+    is_transient(error: Exception) -> bool
+        Whether `error` is worth retrying (connection error, timeout,
+        HTTP 429 / 5xx). The `RuntimeError` raised by `store` is chained
+        (`__cause__`) to the underlying error.
+
+Environment Variables:
+    VECTOR_UPSERT_BATCH_SIZE (int): Maximum vectors per upsert (default 100).
+    VECTOR_UPSERT_MAX_BYTES (int): Maximum approximate JSON size of one
+        upsert request (default 2000000; Pinecone's limit is 2 MB).
+    VECTOR_UPSERT_CONCURRENCY (int): Upserts in flight at once (default 4).
+    VECTOR_UPSERT_RETRIES (int): Retries of a failed batch (default 3).
+    VECTOR_UPSERT_BACKOFF_SECONDS (float): Base backoff delay (default 0.5).
+    VECTOR_UPSERT_BACKOFF_MAX_SECONDS (float): Backoff cap (default 8).
 
 Notes:
     - Logs success and failure events for monitoring.
-    - Intended to be used after generating embeddings via 
-      the embed.py module before retrieval/semantic search.
+    - Intended to be used after generating embeddings via
+      the embed.py module before retrieval/semantic search; the
+      write-behind queue (`write_behind.py`) calls it in background mode.
 """
 
 
-from app.db.vector_store import index
+import asyncio
+import json
+import os
+import random
+import threading
+from typing import List, Dict, Any
+from app.db.vector_store import get_async_index
+from app.logging.logging_config import setup_logger
 
+logger = setup_logger(__name__)
+
+BATCH_SIZE = int(os.getenv("VECTOR_UPSERT_BATCH_SIZE", "100"))
+MAX_BATCH_BYTES = int(os.getenv("VECTOR_UPSERT_MAX_BYTES", "2000000"))
+CONCURRENCY = int(os.getenv("VECTOR_UPSERT_CONCURRENCY", "4"))
+RETRIES = int(os.getenv("VECTOR_UPSERT_RETRIES", "3"))
+BACKOFF_SECONDS = float(os.getenv("VECTOR_UPSERT_BACKOFF_SECONDS", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("VECTOR_UPSERT_BACKOFF_MAX_SECONDS", "8"))
+
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+_metrics_lock = threading.Lock()
+_metrics = {"upserts": 0, "vectors": 0, "retries": 0, "failed_batches": 0}
+
+
+def _count(**increments) -> None:
+    with _metrics_lock:
+        for name, value in increments.items():
+            _metrics[name] += value
 
-from typing import List, Dict, Any
-import logging
 
-logger = logging.getLogger(__name__)
+def is_transient(error: Exception) -> bool:
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+    # OSError covers connection resets and timeouts; aiohttp (used by the
+    # Pinecone asyncio client) raises its own ClientError hierarchy.
+    return isinstance(error, (OSError, asyncio.TimeoutError)) or (
+        type(error).__module__.split(".")[0] == "aiohttp"
+    )
 
 
-def store(vectors: List[Dict[str, Any]], namespace: str = "default") -> None:
+def _batches(vectors: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Split vectors into batches bounded by BATCH_SIZE and MAX_BATCH_BYTES."""
+    batches, batch, size = [], [], 0
+    for vector in vectors:
+        # Approximate request size: values and metadata as JSON.
+        vector_size = len(json.dumps(vector, default=str))
+        if batch and (len(batch) >= BATCH_SIZE or size + vector_size > MAX_BATCH_BYTES):
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(vector)
+        size += vector_size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def _upsert_batch(index, batch, namespace: str, semaphore: asyncio.Semaphore) -> None:
+    async with semaphore:
+        for attempt in range(RETRIES + 1):
+            try:
+                await index.upsert(vectors=batch, namespace=namespace)
+                _count(upserts=1, vectors=len(batch))
+                return
+            except Exception as e:
+                if attempt == RETRIES or not is_transient(e):
+                    _count(failed_batches=1)
+                    raise
+                # Exponential backoff with full jitter, so parallel batches
+                # that failed together do not retry in lockstep.
+                delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2**attempt))
+                _count(retries=1)
+                logger.warning(
+                    f"Upsert of {len(batch)} vectors failed ({e}); "
+                    f"retry {attempt + 1}/{RETRIES} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+
+
+async def store(vectors: List[Dict[str, Any]], namespace: str = "default") -> None:
     """
-    Store vectors in the Pinecone index.
+    Store vectors in the vector index.
 
     Args:
         vectors: List of vector dictionaries to upsert
@@ -44,12 +140,38 @@ def store(vectors: List[Dict[str, Any]], namespace: str = "default") -> None:
     """
     if not vectors:
         raise ValueError("Vectors list cannot be empty")
+    if any(not isinstance(v, dict) or "id" not in v or "values" not in v for v in vectors):
+        raise ValueError("Every vector needs an 'id' and 'values'")
 
     try:
-        index.upsert(vectors, namespace=namespace)
-        logger.info(
-            f"Successfully stored {len(vectors)} vectors in namespace '{namespace}'"
-        )
+        index = await get_async_index()
     except Exception as e:
-        logger.error(f"Failed to store vectors in namespace '{namespace}': {e}")
-        raise RuntimeError(f"Vector storage failed: {e}")
+        logger.error(f"Failed to open the vector index: {e}")
+        raise RuntimeError(f"Vector storage failed: {e}") from e
+
+    batches = _batches(vectors)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    results = await asyncio.gather(
+        *(_upsert_batch(index, batch, namespace, semaphore) for batch in batches),
+        return_exceptions=True,
+    )
+
+    failed = [(batch, r) for batch, r in zip(batches, results) if isinstance(r, BaseException)]
+    if failed:
+        lost = sum(len(batch) for batch, _ in failed)
+        logger.error(
+            f"Failed to store {lost} of {len(vectors)} vectors in namespace "
+            f"'{namespace}' ({len(failed)}/{len(batches)} batches): {failed[0][1]}"
+        )
+        raise RuntimeError(
+            f"Vector storage failed for {lost} of {len(vectors)} vectors: {failed[0][1]}"
+        ) from failed[0][1]
+    logger.info(
+        f"Successfully stored {len(vectors)} vectors in namespace '{namespace}' "
+        f"({len(batches)} batches)"
+    )
+
+
+def upsert_stats() -> Dict[str, int]:
+    with _metrics_lock:
+        return dict(_metrics)
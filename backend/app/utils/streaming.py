@@ -0,0 +1,66 @@
+"""
+streaming.py
+------------
+Helpers for streaming endpoints that push events to the client as they
+happen, either as Server-Sent Events or as newline-delimited JSON.
+
+Events are `(name, data)` pairs. `data` is made JSON-safe with FastAPI's
+`jsonable_encoder`, so pydantic models (e.g. the generated perspective)
+can be streamed directly.
+
+Functions:
+    wants_ndjson(request: Request, fmt: str | None) -> bool
+        True if the client asked for NDJSON (`?format=ndjson` or an
+        `Accept: application/x-ndjson` header); SSE otherwise.
+
+    encode_event(name: str, data: Any, ndjson: bool) -> str
+        Formats one event as an SSE frame or an NDJSON line.
+
+    event_stream(events: AsyncIterator[tuple], ndjson: bool) -> StreamingResponse
+        Wraps an async iterator of events in a streaming response with the
+        matching media type and anti-buffering headers.
+"""
+
+
+import json
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Optional, Tuple
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Proxies (nginx in particular) buffer responses by default, which would
+# hold every event back until the stream ends.
+_STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def wants_ndjson(request: Request, fmt: Optional[str] = None) -> bool:
+    if fmt:
+        return fmt.lower() == "ndjson"
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def encode_event(name: str, data: Any, ndjson: bool) -> str:
+    payload = jsonable_encoder(data)
+    if ndjson:
+        return json.dumps({"event": name, "data": payload}, ensure_ascii=False) + "\n"
+    return f"event: {name}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def event_stream(events: AsyncIterator[Tuple[str, Any]], ndjson: bool) -> StreamingResponse:
+    async def body():
+        # Close the producer as soon as the response stops (including a
+        # client disconnect), so upstream work is cancelled right away
+        # rather than whenever the generator is garbage-collected.
+        async with aclosing(events):
+            async for name, data in events:
+                yield encode_event(name, data, ndjson)
+
+    return StreamingResponse(
+        body(),
+        media_type=NDJSON_MEDIA_TYPE if ndjson else SSE_MEDIA_TYPE,
+        headers=_STREAM_HEADERS,
+    )
@@ -0,0 +1,210 @@
+"""
+text_budget.py
+--------------
+Token budgets for the article text sent to the LLM nodes, so token spend
+and latency depend on the budget rather than on the article length.
+
+Two strategies:
+    Truncation (`fit_text`)
+        The opening paragraphs (up to `TEXT_BUDGET_LEAD_SHARE` of the
+        budget) are kept. They are followed by the paragraphs densest in
+        the article's RAKE keywords (`extract_keywords`, already in the
+        pipeline state), which are kept in their original order. Skipped
+        stretches are marked with "[...]". Used where a sample of the
+        article is enough: sentiment (a 3-token answer), bias scoring and
+        perspective generation.
+    Map-reduce (`split_text` + `map_chunks`)
+        The article is split into paragraph-aligned chunks of at most the
+        budget, which the node processes in parallel and then merges (e.g.
+        claim extraction collects claims from every chunk). The total is
+        capped at `TEXT_BUDGET_MAX_CHUNKS` chunks: a longer article is
+        first truncated to that many budgets, as above.
+
+Text that already fits its budget is passed through unchanged.
+
+No tokenizer for the Groq-hosted models ships with the app, so tokens are
+estimated at ~4 characters each. That is close for English prose, and it
+is the same estimate the LLM gateway reserves rate-limit budget with.
+
+Functions:
+    count_tokens(text: str) -> int
+        Estimated token count of `text`.
+
+    budget(node: str) -> int
+        Token budget of a node ("sentiment", "bias", "claims", "perspective").
+
+    fit_text(text: str, max_tokens: int, keywords: list[str] | None = None) -> str
+        Lead plus keyword-dense paragraphs within `max_tokens`.
+
+    split_text(text: str, max_tokens: int, keywords: list[str] | None = None) -> list[str]
+        At most `TEXT_BUDGET_MAX_CHUNKS` chunks of at most `max_tokens` each.
+
+    async map_chunks(chunks: list[str], fn) -> list
+        Runs `fn(chunk)` over the chunks, at most `TEXT_BUDGET_MAP_CONCURRENCY`
+        at a time. Returns results in order, with the exception for any
+        chunk that failed.
+
+Environment Variables:
+    TEXT_BUDGET_SENTIMENT (int): Tokens of article text for sentiment
+        analysis (default 1000).
+    TEXT_BUDGET_BIAS (int): Tokens for bias scoring (default 3000).
+    TEXT_BUDGET_CLAIMS (int): Tokens per claim extraction chunk
+        (default 2500).
+    TEXT_BUDGET_PERSPECTIVE (int): Tokens for perspective generation
+        (default 4000).
+    TEXT_BUDGET_LEAD_SHARE (float): Share of a truncation budget given to
+        the opening paragraphs (default 0.4).
+    TEXT_BUDGET_MAX_CHUNKS (int): Map-reduce chunks per article (default 4).
+    TEXT_BUDGET_MAP_CONCURRENCY (int): Chunks processed at once (default 4).
+"""
+
+
+import asyncio
+import os
+import re
+from typing import Any, Awaitable, Callable, List, Optional
+from app.logging.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+BUDGETS = {
+    "sentiment": int(os.getenv("TEXT_BUDGET_SENTIMENT", "1000")),
+    "bias": int(os.getenv("TEXT_BUDGET_BIAS", "3000")),
+    "claims": int(os.getenv("TEXT_BUDGET_CLAIMS", "2500")),
+    "perspective": int(os.getenv("TEXT_BUDGET_PERSPECTIVE", "4000")),
+}
+LEAD_SHARE = float(os.getenv("TEXT_BUDGET_LEAD_SHARE", "0.4"))
+MAX_CHUNKS = int(os.getenv("TEXT_BUDGET_MAX_CHUNKS", "4"))
+MAP_CONCURRENCY = int(os.getenv("TEXT_BUDGET_MAP_CONCURRENCY", "4"))
+
+GAP = "[...]"
+# Tokens taken by the blank line between two paragraphs.
+_SEPARATOR_TOKENS = 1
+
+
+def count_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def budget(node: str) -> int:
+    return BUDGETS[node]
+
+
+def _paragraphs(text: str) -> List[str]:
+    return [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+
+
+def _pieces(paragraph: str, max_tokens: int) -> List[str]:
+    """Split a paragraph into sentence-aligned pieces of at most max_tokens."""
+    if count_tokens(paragraph) <= max_tokens:
+        return [paragraph]
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces, current = [], ""
+    for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+        # A sentence longer than the budget is cut at a word boundary.
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _keyword_density(paragraph: str, keywords: List[str]) -> float:
+    lowered = paragraph.lower()
+    hits = sum(lowered.count(keyword.lower()) * len(keyword.split()) for keyword in keywords)
+    return hits / count_tokens(paragraph)
+
+
+def fit_text(text: str, max_tokens: int, keywords: Optional[List[str]] = None) -> str:
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    # Selection works on paragraphs, split further when longer than the lead.
+    lead_tokens = max(1, int(max_tokens * LEAD_SHARE) - _SEPARATOR_TOKENS)
+    paragraphs = [piece for p in _paragraphs(text) for piece in _pieces(p, lead_tokens)]
+    chosen = {}
+    used = 0
+
+    def take(index: int, paragraph: str) -> bool:
+        nonlocal used
+        cost = count_tokens(paragraph) + _SEPARATOR_TOKENS
+        if used + cost > max_tokens:
+            return False
+        chosen[index] = paragraph
+        used += cost
+        return True
+
+    # The lead: the opening paragraphs (always at least the first).
+    for index, paragraph in enumerate(paragraphs):
+        if index and used + count_tokens(paragraph) > lead_tokens:
+            break
+        take(index, paragraph)
+
+    # Then the paragraphs densest in keywords (without keywords: in order),
+    # leaving room for the gap markers.
+    rest = [i for i in range(len(paragraphs)) if i not in chosen]
+    if keywords:
+        rest.sort(key=lambda i: -_keyword_density(paragraphs[i], keywords))
+    reserve = count_tokens(GAP) + _SEPARATOR_TOKENS
+    for index in rest:
+        if used + reserve >= max_tokens:
+            break
+        used += reserve
+        if not take(index, paragraphs[index]):
+            used -= reserve
+
+    parts, previous = [], -1
+    for index in sorted(chosen):
+        if index != previous + 1:
+            parts.append(GAP)
+        parts.append(chosen[index])
+        previous = index
+    if previous != len(paragraphs) - 1:
+        parts.append(GAP)
+    fitted = "\n\n".join(parts)
+    logger.debug(f"Fitted text from {count_tokens(text)} to {count_tokens(fitted)} tokens")
+    return fitted
+
+
+def split_text(text: str, max_tokens: int, keywords: Optional[List[str]] = None) -> List[str]:
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    # Cap the total work: at most MAX_CHUNKS budgets of text.
+    text = fit_text(text, max_tokens * MAX_CHUNKS, keywords)
+
+    chunks, current, used = [], [], 0
+    for paragraph in _paragraphs(text):
+        for piece in _pieces(paragraph, max_tokens):
+            cost = count_tokens(piece) + _SEPARATOR_TOKENS
+            if current and used + cost > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, used = [], 0
+            current.append(piece)
+            used += cost
+    if current:
+        chunks.append("\n\n".join(current))
+    if len(chunks) > MAX_CHUNKS:
+        logger.debug(f"Dropping {len(chunks) - MAX_CHUNKS} chunk(s) over the chunk limit")
+    return chunks[:MAX_CHUNKS]
+
+
+async def map_chunks(chunks: List[str], fn: Callable[[str], Awaitable[Any]]) -> List[Any]:
+    semaphore = asyncio.Semaphore(MAP_CONCURRENCY)
+
+    async def bounded(chunk: str):
+        async with semaphore:
+            return await fn(chunk)
+
+    return await asyncio.gather(*(bounded(chunk) for chunk in chunks), return_exceptions=True)
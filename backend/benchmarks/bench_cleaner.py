@@ -0,0 +1,108 @@
+"""
+bench_cleaner.py
+----------------
+Microbenchmark for `clean_extracted_text` on long articles.
+
+Compares the single-pass cleaner in `app.modules.scraper.cleaner` with the
+previous implementation (one `re.sub` per boilerplate phrase over the whole
+text, reproduced below as `reference_clean`), and checks that both produce
+byte-identical output on every generated article before timing them.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_cleaner [--articles N] [--paragraphs N] [--repeat N]
+"""
+
+import argparse
+import random
+import re
+import string
+import timeit
+from app.modules.scraper.cleaner import BOILERPLATE_PHRASES, clean_extracted_text
+
+
+def reference_clean(text: str):
+    """The cleaner as it was before the single-pass rewrite."""
+    if not text:
+        return ""
+    text = re.sub(r"\n{2,}", "\n\n", text)
+    for pattern in BOILERPLATE_PHRASES:
+        text = re.sub(pattern, "", text, flags=re.IGNORECASE)
+    lines = text.split("\n")
+    cleaned_lines = [line.strip() for line in lines if len(line.strip()) > 30]
+    cleaned_text = "\n\n".join(cleaned_lines)
+    cleaned_text = re.sub(r"[ \t]{2,}", " ", cleaned_text).strip()
+    return cleaned_text
+
+
+JUNK = [
+    "Read more at The Daily Example",
+    "SUBSCRIBE TO our newsletter today",
+    "Advertisement",
+    "© 2024 Example Media. All rights reserved.",
+    "Share this article",
+    "Photo by Jane Doe / Example",
+    "powered by ",
+    "Related Articles",
+    "Don’t miss out on our deals",
+    "Privacy Policy | Terms of Service | Cookie Policy",
+    "   \t  ",
+    "",
+    "Menu",
+]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+        for _ in range(rng.randint(6, 18))
+    ]
+    return " ".join(words).capitalize() + "."
+
+
+def make_article(rng: random.Random, paragraphs: int) -> str:
+    lines = []
+    for _ in range(paragraphs):
+        paragraph = " ".join(_sentence(rng) for _ in range(rng.randint(2, 6)))
+        if rng.random() < 0.2:
+            paragraph = paragraph.replace(" ", "  \t", 2)
+        if rng.random() < 0.1:
+            paragraph += " " + rng.choice(JUNK)
+        lines.append(paragraph)
+        lines.extend([""] * rng.randint(0, 3))
+        if rng.random() < 0.3:
+            lines.append(rng.choice(JUNK))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--articles", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1234)
+    articles = [make_article(rng, args.paragraphs) for _ in range(args.articles)]
+
+    for article in articles:
+        assert clean_extracted_text(article) == reference_clean(article), (
+            "single-pass cleaner diverged from the reference implementation"
+        )
+    print(f"Output identical on {len(articles)} articles")
+
+    total_chars = sum(len(article) for article in articles)
+    results = {}
+    for name, fn in (("reference", reference_clean), ("single-pass", clean_extracted_text)):
+        best = min(
+            timeit.repeat(lambda: [fn(a) for a in articles], number=1, repeat=args.repeat)
+        )
+        results[name] = best
+        print(
+            f"{name:>12}: {best * 1000:8.1f} ms "
+            f"({total_chars / best / 1e6:.1f} MB/s over {total_chars} chars)"
+        )
+    print(f"Speed-up: {results['reference'] / results['single-pass']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
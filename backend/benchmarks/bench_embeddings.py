@@ -0,0 +1,167 @@
+"""
+bench_embeddings.py
+-------------------
+Parity check and benchmark of the embedding backends in
+`app.modules.vector_store.embedding_backends` (torch fp32, onnx, int8).
+
+Each backend runs in its own subprocess so its memory use is measured in
+isolation. For every backend the script reports:
+    - load time and resident memory (RSS) after loading and encoding,
+    - single-query latency (median and p95 over `--queries` calls),
+    - batch throughput in texts per second,
+    - cosine similarity of its vectors to the torch fp32 baseline
+      (mean and minimum over all texts).
+
+The run fails (exit status 1) when a requested backend fails to load or
+run, or when its minimum cosine similarity to the baseline is below
+`--min-cosine`.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_embeddings [--backends torch,onnx,int8]
+        [--texts 512] [--queries 100] [--min-cosine 0.99]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+SUBJECTS = ["The council", "Researchers", "The minister", "Local residents", "The company"]
+VERBS = ["announced", "denied", "questioned", "welcomed", "criticised", "published"]
+OBJECTS = [
+    "a new climate policy",
+    "the quarterly earnings report",
+    "plans for a high-speed rail line",
+    "the results of the vaccine trial",
+    "changes to the tax code",
+    "an investigation into the election",
+]
+
+
+def make_texts(count: int) -> list:
+    rng = random.Random(42)
+    texts = []
+    for _ in range(count):
+        sentences = [
+            f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}."
+            for _ in range(rng.randint(1, 6))
+        ]
+        texts.append(" ".join(sentences))
+    return texts
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(backend: str, texts: list, queries: int, out: str) -> dict:
+    from app.modules.vector_store.embedding_backends import load_embedder
+
+    started = time.perf_counter()
+    embedder = load_embedder(backend)
+    load_seconds = time.perf_counter() - started
+
+    embedder.encode(texts[:8])  # warm up
+
+    latencies = []
+    for text in texts[:queries]:
+        started = time.perf_counter()
+        embedder.encode([text])
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    vectors = np.asarray(embedder.encode(texts), dtype=np.float32)
+    batch_seconds = time.perf_counter() - started
+    np.save(out, vectors)
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "rss_mb": round(rss_mb(), 1),
+        "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "latency_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "texts_per_second": round(len(texts) / batch_seconds, 1),
+    }
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("--backends", default="torch,onnx,int8")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts)
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, texts, args.queries, args.out)))
+        return
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    if "torch" not in backends:
+        backends.insert(0, "torch")
+
+    failed = False
+    results, vectors = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            out = os.path.join(tmp, f"{backend}.npy")
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_embeddings",
+                 "--worker", backend, "--out", out,
+                 "--texts", str(args.texts), "--queries", str(args.queries)],
+                capture_output=True,
+                text=True,
+            )
+            if proc.returncode != 0:
+                error = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+                print(f"{backend}: failed ({error})")
+                # A backend that never ran cannot pass the parity check.
+                failed = True
+                continue
+            results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+            vectors[backend] = np.load(out)
+
+    if "torch" not in vectors:
+        sys.exit("The torch fp32 baseline failed; nothing to compare against.")
+
+    header = f"{'backend':>8} {'load s':>7} {'RSS MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'texts/s':>9} {'cos mean':>9} {'cos min':>8}"
+    print(header)
+    for backend, result in results.items():
+        similarity = cosine(vectors[backend], vectors["torch"])
+        ok = similarity.min() >= args.min_cosine
+        failed |= not ok
+        print(
+            f"{backend:>8} {result['load_seconds']:>7} {result['rss_mb']:>8} "
+            f"{result['latency_p50_ms']:>8} {result['latency_p95_ms']:>8} "
+            f"{result['texts_per_second']:>9} {similarity.mean():>9.5f} "
+            f"{similarity.min():>8.5f}{'' if ok else '  below --min-cosine'}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,13 @@ Key Features:
     - Serves as the main entry point for the Perspective backend.
     - Configures CORS middleware to allow cross-origin requests.
     - Includes article processing routes via FastAPI's router.
+    - Warms up the shared models and clients (`app.utils.resources`) on
+      startup, by default in the background so the API answers at once.
+    - Resumes background jobs left queued or running by a previous run.
+    - Starts the write-behind indexing worker (replaying articles left
+      queued by a previous run) when `VECTOR_WRITE_MODE=background`.
+    - Stops the job workers, indexing worker and embedding batcher and
+      closes the shared HTTP and vector index clients on shutdown.
     - Can be run directly using uvicorn.
 
 Usage:
@@ -17,20 +24,73 @@ Usage:
 
 Attributes:
     app (FastAPI): The FastAPI application instance.
+
+Environment Variables:
+    RESOURCE_WARMUP (str): "background" (default) loads models and clients
+        after startup without delaying it, "blocking" loads them before the
+        first request is accepted, "off" loads each one on first use.
 """
 
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.routes.routes import router as article_router
 from fastapi.middleware.cors import CORSMiddleware
+from app.db.vector_store import close_async_index
+from app.utils.http_client import close_http_client
+from app.modules.vector_store.embedding_service import embedding_service
+from app.modules.vector_store.write_behind import write_behind, WRITE_MODE as VECTOR_WRITE_MODE
+from app.modules.jobs import job_queue
+from app.utils.resources import resources
 from app.logging.logging_config import setup_logger
     
 # Setup logger for this module
 logger = setup_logger(__name__)
 
+
+WARMUP_MODE = os.getenv("RESOURCE_WARMUP", "background").lower()
+
+
+async def _warmup(app: FastAPI):
+    app.state.warmup = await resources.warmup()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.warmup = None
+    warmup_task = None
+    if WARMUP_MODE == "blocking":
+        await _warmup(app)
+    elif WARMUP_MODE == "background":
+        warmup_task = asyncio.create_task(_warmup(app))
+
+    if VECTOR_WRITE_MODE == "background":
+        await write_behind.start()
+    await job_queue.resume_pending()
+
+    app.state.startup_seconds = round(time.perf_counter() - _IMPORT_STARTED, 3)
+    logger.info(f"Application ready in {app.state.startup_seconds:.2f}s")
+    yield
+
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await job_queue.close()
+    await write_behind.close()
+    await close_http_client()
+    await close_async_index()
+    await embedding_service.close()
+
+
 app = FastAPI(
     title="Perspective API",
     version="1.0.0",
     description=("An API to generate alternative perspectives on biased articles"),
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -45,7 +105,6 @@ app.include_router(article_router, prefix="/api", tags=["Articles"])
 
 if __name__ == "__main__":
     import uvicorn
-    import os
 
     port = int(os.environ.get("PORT", 7860))
     logger.info(f" Server is running on http://localhost:{port}")
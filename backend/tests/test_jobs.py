@@ -0,0 +1,148 @@
+"""
+Retry behaviour of the background job queue (`app.modules.jobs`) with the
+real LangGraph workflow and stubbed nodes.
+
+Run with `python -m pytest tests` or `python -m tests.test_jobs` from
+`backend/`.
+"""
+
+
+import asyncio
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+import app.modules.jobs as jobs
+from app.modules.langgraph_nodes import (
+    fact_check,
+    generate_perspective,
+    judge,
+    sentiment,
+    store_and_send,
+)
+
+
+@contextmanager
+def _patched(*patches):
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, value in patches:
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+
+def _run_job(fail_node: str) -> tuple:
+    """
+    Run one job whose `fail_node` fails on its first call; returns the job,
+    the node call counts and whether any of its checkpoints are left.
+    """
+    calls = {"sentiment": 0, "facts": 0, "perspective": 0, "judge": 0}
+
+    def failing_once(name):
+        return fail_node == name and calls[name] == 1
+
+    async def run_sentiment(state):
+        calls["sentiment"] += 1
+        if failing_once("sentiment"):
+            return {"status": "error", "error_from": "sentiment_analysis", "message": "boom"}
+        return {**state, "sentiment": "neutral", "status": "success"}
+
+    async def run_fact_check(state):
+        calls["facts"] += 1
+        if failing_once("facts"):
+            return {"status": "error", "error_from": "fact_checking", "message": "boom"}
+        return {**state, "facts": [{"original_claim": "c"}], "status": "success"}
+
+    async def run_generate(state):
+        calls["perspective"] += 1
+        perspective = generate_perspective.PerspectiveOutput(perspective="p", reasoning="r")
+        return {**state, "perspective": perspective, "retries": state.get("retries", 0) + 1, "status": "success"}
+
+    async def run_judge(state):
+        calls["judge"] += 1
+        if failing_once("judge"):
+            return {"status": "error", "error_from": "judge_perspective", "message": "boom"}
+        return {**state, "score": 90, "status": "success"}
+
+    async def run_store(state):
+        return {**state, "perspective": state["perspective"].perspective, "status": "success"}
+
+    async def scrape(url):
+        return {"cleaned_text": f"article at {url}", "keywords": []}
+
+    async def main(directory):
+        queue = jobs.JobQueue(
+            os.path.join(directory, "jobs.sqlite3"),
+            os.path.join(directory, "checkpoints.sqlite3"),
+            workers=1,
+            max_attempts=3,
+            retry_backoff_seconds=0.2,
+        )
+        job = await queue.submit(f"https://example.com/{fail_node}")
+        for _ in range(300):
+            await asyncio.sleep(0.02)
+            state = queue.get(job["job_id"], with_result=True)
+            if state["status"] in ("succeeded", "failed"):
+                break
+        snapshot = await queue._workflow.aget_state({"configurable": {"thread_id": job["job_id"]}})
+        await queue.close()
+        return state, bool(snapshot.values)
+
+    with _patched(
+        (sentiment, "run_sentiment_sdk", run_sentiment),
+        (fact_check, "run_fact_check", run_fact_check),
+        (generate_perspective, "generate_perspective", run_generate),
+        (judge, "judge_perspective", run_judge),
+        (store_and_send, "store_and_send", run_store),
+        (jobs, "run_scraper_pipeline", scrape),
+    ), tempfile.TemporaryDirectory() as directory:
+        job, checkpointed = asyncio.run(main(directory))
+        return job, calls, checkpointed
+
+
+def test_branch_failure_is_retried():
+    job, calls, checkpointed = _run_job("sentiment")
+    assert job["status"] == "succeeded", job
+    assert not checkpointed
+    assert job["attempts"] == 2
+    assert job["result"]["status"] == "success"
+    # The failed branch really ran again.
+    assert calls["sentiment"] == 2
+
+
+def test_judge_failure_resumes_after_analysis():
+    job, calls, _ = _run_job("judge")
+    assert job["status"] == "succeeded", job
+    assert job["attempts"] == 2
+    # Sentiment and fact-checking are not repeated.
+    assert calls["sentiment"] == 1
+    assert calls["facts"] == 1
+    assert calls["judge"] == 2
+
+
+def test_retry_waits_for_backoff():
+    with tempfile.TemporaryDirectory() as directory:
+        queue = jobs.JobQueue(
+            os.path.join(directory, "jobs.sqlite3"),
+            os.path.join(directory, "checkpoints.sqlite3"),
+            workers=1,
+            max_attempts=3,
+        )
+        queue._execute(
+            "INSERT INTO jobs (id, url, url_key, status, created_at) VALUES ('j', 'u', 'u', 'queued', 0)"
+        )
+        job_id, _, attempts = queue._claim()
+        queue._finish(job_id, "queued", error="boom", not_before=time.time() + 60)
+        # Not claimable until its backoff has passed.
+        assert queue._claim() is None
+        assert queue._next_due() > time.time()
+
+
+if __name__ == "__main__":
+    test_branch_failure_is_retried()
+    test_judge_failure_resumes_after_analysis()
+    test_retry_waits_for_backoff()
+    print("ok")
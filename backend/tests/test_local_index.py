@@ -0,0 +1,48 @@
+"""
+Behaviour of the in-process vector index (`app.db.local_index`).
+
+Run with `python -m pytest tests` or `python -m tests.test_local_index`
+from `backend/`.
+"""
+
+
+import asyncio
+import tempfile
+import numpy as np
+from app.db.local_index import LocalVectorIndex
+
+
+def _vectors(n: int, dim: int = 8) -> np.ndarray:
+    return np.random.default_rng(0).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_ivf_with_fewer_rows_than_lists():
+    vectors = _vectors(6)
+
+    async def main(directory):
+        index = LocalVectorIndex(directory, ivf_min_rows=5)
+        await index.upsert([{"id": str(i), "values": v.tolist()} for i, v in enumerate(vectors)])
+        result = await index.query(vectors[3].tolist(), top_k=1)
+        await index.close()
+        return result
+
+    with tempfile.TemporaryDirectory() as directory:
+        result = asyncio.run(main(directory))
+    assert result["matches"][0]["id"] == "3"
+
+
+def test_query_leaves_caller_vector_untouched():
+    vectors = _vectors(3)
+    query = vectors[0].copy()
+    with tempfile.TemporaryDirectory() as directory:
+        index = LocalVectorIndex(directory)
+        index.upsert_sync([{"id": str(i), "values": v.tolist()} for i, v in enumerate(vectors)])
+        index.query_sync(query, top_k=1)
+        asyncio.run(index.close())
+    assert (query == vectors[0]).all()
+
+
+if __name__ == "__main__":
+    test_ivf_with_fewer_rows_than_lists()
+    test_query_leaves_caller_vector_untouched()
+    print("ok")
@@ -0,0 +1,112 @@
+"""
+Failure handling of the RAG write-behind queue
+(`app.modules.vector_store.write_behind`) with a stubbed `index_chunks`.
+
+Run with `python -m pytest tests` or `python -m tests.test_write_behind`
+from `backend/`.
+"""
+
+
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import app.modules.vector_store.write_behind as write_behind
+
+
+def _run(index_chunks, texts, check):
+    """Queue one article per text, then run `check(queue)` with `index_chunks` stubbed."""
+    saved = write_behind.index_chunks
+    write_behind.index_chunks = index_chunks
+
+    async def main(directory):
+        queue = write_behind.WriteBehindQueue(
+            os.path.join(directory, "queue.sqlite3"), 100, 16, 0, 3
+        )
+        for text in texts:
+            queue._execute(
+                "INSERT INTO write_queue (namespace, chunks, enqueued_at) VALUES (?, ?, ?)",
+                ("default", json.dumps([{"text": text}]), 0),
+            )
+        return await check(queue)
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            return asyncio.run(main(directory))
+    finally:
+        write_behind.index_chunks = saved
+
+
+def _queued(queue):
+    return {json.loads(chunks)[0]["text"]: attempts for chunks, attempts in
+            queue._execute("SELECT chunks, attempts FROM write_queue")}
+
+
+def test_poison_article_is_isolated():
+    stored = []
+
+    async def index_chunks(chunks, namespace):
+        if any(chunk["text"] == "poison" for chunk in chunks):
+            raise ValueError("bad chunk")
+        stored.extend(chunk["text"] for chunk in chunks)
+
+    async def check(queue):
+        await queue._process(queue._claim())
+        return _queued(queue)
+
+    queued = _run(index_chunks, ["a", "b", "poison", "c", "d"], check)
+    assert sorted(stored) == ["a", "b", "c", "d"]
+    assert queued == {"poison": 1}
+
+
+def test_outage_is_not_bisected():
+    calls = []
+
+    async def index_chunks(chunks, namespace):
+        calls.append(len(chunks))
+        raise RuntimeError("Vector storage failed") from ConnectionResetError()
+
+    async def check(queue):
+        await queue._process(queue._claim())
+        return _queued(queue)
+
+    queued = _run(index_chunks, ["a", "b", "c", "d"], check)
+    assert calls == [4]
+    assert queued == {"a": 1, "b": 1, "c": 1, "d": 1}
+
+
+def test_worker_survives_queue_errors():
+    stored = []
+
+    async def index_chunks(chunks, namespace):
+        stored.extend(chunk["text"] for chunk in chunks)
+
+    async def check(queue):
+        claim = queue._claim
+        failures = iter([True])
+
+        def flaky_claim():
+            if next(failures, False):
+                raise sqlite3.OperationalError("database is locked")
+            return claim()
+
+        queue._claim = flaky_claim
+        await queue.start()
+        for _ in range(100):
+            await asyncio.sleep(0.05)
+            if stored:
+                break
+        alive = not queue._worker.done()
+        await queue.close()
+        return alive
+
+    assert _run(index_chunks, ["a"], check)
+    assert stored == ["a"]
+
+
+if __name__ == "__main__":
+    test_poison_article_is_isolated()
+    test_outage_is_not_bisected()
+    test_worker_survives_queue_errors()
+    print("ok")